@@ -1,38 +1,18 @@
-import csv
 from pathlib import Path
-from sqlmodel import SQLModel, Session, create_engine
-from model.models import WordType
+from sqlmodel import create_engine
+
+from service.migration_service import MigrationService
 
 # SQLite用DBファイルパスの設定
 sqlite_file_path = Path("data", "database.db")
 sqlite_url = f"sqlite:///{sqlite_file_path}"
 
-# マスターファイルパスの設定
-master_folder_path = Path("data/seed")
-word_types_csv_path = master_folder_path / "word_types.csv"
-
 # エンジンの取得
-engine = create_engine(sqlite_url, echo=True)
-
-# テーブルの初期化処理
-SQLModel.metadata.create_all(engine)
-
-# セッションの取得
-session = Session(engine)
-
-# マスターデータの投入
-# 単語タイプ
-with open(word_types_csv_path, "r", encoding="utf-8") as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        word_type = WordType(
-            id=int(row["id"]),
-            title_jp=row["title_jp"],
-            title_en=row["title_en"],
-            title_short_jp=row["title_short_jp"],
-            title_short_en=row["title_short_en"],
-        )
-        session.add(word_type)
+engine = create_engine(sqlite_url)
 
-# コミット処理
-session.commit()
+# スキーマの作成・更新およびマスターデータの投入
+# Note: 適用済みのバージョンはスキップされるため、既存DBに対して何度実行してもよい
+migration_service = MigrationService(engine)
+for version, description in migration_service.migrate():
+    print(f"migrated database to version {version}: {description}")
+print(f"database version: {migration_service.get_current_version()}")
@@ -1,4 +1,5 @@
 import flet as ft
+import multiprocessing
 from pathlib import Path
 from configparser import ConfigParser
 
@@ -36,5 +37,6 @@ def main(page: ft.Page):
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     ft.app(target=main)
 
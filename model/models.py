@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 from sqlalchemy.orm import declared_attr
-from sqlmodel import SQLModel, Field, Column, Relationship, DateTime, Enum, JSON
+from sqlmodel import SQLModel, Field, Column, Relationship, DateTime, Enum, JSON, Index, LargeBinary
 
 
 class TimestampMixin(object):
@@ -47,6 +47,9 @@ class WordBook(SQLModel, TimestampMixin, table=True):
 
 class WordItem(SQLModel, TimestampMixin, table=True):
     __tablename__ = "word_items"
+    __table_args__ = (
+        Index("ix_word_items_word_book_id_seq_no", "word_book_id", "seq_no"),
+    )
 
     id: int = Field(default=None, primary_key=True)
     word_book_id: int = Field(foreign_key="word_books.id")
@@ -63,8 +66,44 @@ class WordItem(SQLModel, TimestampMixin, table=True):
     word_sentences: list["WordSentence"] = Relationship(back_populates="word_item")
 
 
+class WordItemHash(SQLModel, table=True):
+    __tablename__ = "word_item_hashes"
+
+    word_item_id: int = Field(primary_key=True, foreign_key="word_items.id")
+    content_hash: str
+
+
+class WordItemSummary(SQLModel, table=True):
+    __tablename__ = "word_item_summaries"
+    __table_args__ = (
+        Index("ix_word_item_summaries_word_book_id_seq_no", "word_book_id", "seq_no"),
+    )
+
+    word_item_id: int = Field(primary_key=True, foreign_key="word_items.id")
+    word_book_id: int = Field(foreign_key="word_books.id")
+    is_active: bool = Field(default=True)
+    seq_no: int
+    word: str
+    meaning: str
+
+
+class WordItemStat(SQLModel, table=True):
+    __tablename__ = "word_item_stats"
+    __table_args__ = (
+        Index("ix_word_item_stats_word_book_id", "word_book_id"),
+    )
+
+    word_item_id: int = Field(primary_key=True, foreign_key="word_items.id")
+    word_book_id: int = Field(foreign_key="word_books.id")
+    quiz_count: int = Field(default=0)
+    last_quiz_dt: datetime | None
+
+
 class WordMeaning(SQLModel, TimestampMixin, table=True):
     __tablename__ = "word_meanings"
+    __table_args__ = (
+        Index("ix_word_meanings_word_item_id", "word_item_id"),
+    )
 
     id: int = Field(default=None, primary_key=True)
     word_item_id: int = Field(foreign_key="word_items.id")
@@ -79,6 +118,9 @@ class WordMeaning(SQLModel, TimestampMixin, table=True):
 
 class WordSentence(SQLModel, TimestampMixin, table=True):
     __tablename__ = "word_sentences"
+    __table_args__ = (
+        Index("ix_word_sentences_word_item_id", "word_item_id"),
+    )
 
     id: int = Field(default=None, primary_key=True)
     word_item_id: int = Field(foreign_key="word_items.id")
@@ -91,6 +133,10 @@ class WordSentence(SQLModel, TimestampMixin, table=True):
 
 class VocabQuiz(SQLModel, TimestampMixin, table=True):
     __tablename__ = "vocab_quizzes"
+    __table_args__ = (
+        Index("ix_vocab_quizzes_word_book_id_created_at", "word_book_id", "created_at"),
+        Index("ix_vocab_quizzes_created_at_id", "created_at", "id"),
+    )
 
     id: int = Field(default=None, primary_key=True)
     word_book_id: int = Field(foreign_key="word_books.id")
@@ -104,6 +150,40 @@ class VocabQuiz(SQLModel, TimestampMixin, table=True):
     word_book: WordBook = Relationship(back_populates="vocab_quizzes")
 
 
+class VocabQuizItemSet(SQLModel, table=True):
+    __tablename__ = "vocab_quiz_item_sets"
+    __table_args__ = (
+        Index("ix_vocab_quiz_item_sets_word_book_id_vocab_quiz_id", "word_book_id", "vocab_quiz_id"),
+    )
+
+    vocab_quiz_id: int = Field(primary_key=True, foreign_key="vocab_quizzes.id")
+    word_book_id: int = Field(foreign_key="word_books.id")
+    base_id: int
+    item_bits: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+
+
+#
+# 取込処理関連データ
+#
+
+class ImportJob(SQLModel, TimestampMixin, table=True):
+    __tablename__ = "import_jobs"
+    __table_args__ = (
+        Index("ix_import_jobs_word_book_id_file_hash", "word_book_id", "file_hash"),
+    )
+
+    id: int = Field(default=None, primary_key=True)
+    word_book_id: int = Field(foreign_key="word_books.id")
+    file_path: str
+    file_hash: str
+    file_size: int
+    byte_offset: int = Field(default=0)
+    first_word_item_id: int
+    word_item_id_ranges: list = Field(default_factory=list, sa_column=Column(JSON))
+    row_count: int = Field(default=0)
+    status: str = Field(default="running")
+
+
 class WordItemInfo(SQLModel, table=False):
     word_item_id: int
     seq_no: int
@@ -117,4 +197,33 @@ class VocabQuizInputParam(SQLModel, table=False):
     area: Optional[list]
     quiz_dt: datetime | None
     count: int | None
-
+    weighted: bool = False
+    seed: int | None = None
+    exclude_recent_count: int = 0
+    exclude_quiz_id_list: Optional[list] = None
+
+
+
+class WordImportResult(SQLModel, table=False):
+    row_count: int = 0
+    meaning_count: int = 0
+    sentence_count: int = 0
+    elapsed_sec: float = 0.0
+    rows_per_sec: float = 0.0
+    inserted_count: int = 0
+    updated_count: int = 0
+    deactivated_count: int = 0
+    unchanged_count: int = 0
+    error_count: int = 0
+    error_list: list[str] = Field(default_factory=list)
+    cancelled: bool = False
+    resumed: bool = False
+
+
+class WordImportProgress(SQLModel, table=False):
+    total_count: int = 0
+    parsed_count: int = 0
+    inserted_count: int = 0
+    elapsed_sec: float = 0.0
+    rows_per_sec: float = 0.0
+    eta_sec: float | None = None
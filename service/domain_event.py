@@ -0,0 +1,61 @@
+import threading
+import traceback
+from collections import defaultdict
+from typing import Callable
+from sqlmodel import Session
+
+# ドメインイベント名(payloadの項目)
+WORD_BOOK_CREATED = "word_book_created"      # word_book_id
+WORD_BOOK_UPDATED = "word_book_updated"      # word_book_id
+WORD_BOOK_DELETED = "word_book_deleted"      # word_book_id
+WORD_ITEMS_IMPORTED = "word_items_imported"  # word_book_id
+VOCAB_QUIZ_CREATED = "vocab_quiz_created"    # word_book_id, vocab_quiz_id_list
+VOCAB_QUIZ_UPDATED = "vocab_quiz_updated"    # word_book_id, vocab_quiz_id
+VOCAB_QUIZ_DELETED = "vocab_quiz_deleted"    # word_book_id, vocab_quiz_id
+
+# セッションのinfoにイベント通知を保持するキー
+DOMAIN_EVENT_BUS_KEY = "domain_event_bus"
+
+
+class DomainEventBus:
+    # データ更新の通知先(画面・キャッシュ)をイベント名毎に登録し、更新処理の完了後に通知する
+    # Note: 通知は発行元のスレッドで同期的に行う(ワーカースレッドからの発行もあり得る)
+    # Note: 通知先は画面(ページ)単位のため、ページ毎に作成してセッションに紐付ける(get_domain_event_bus)
+    def __init__(self):
+        self._handler_dict = defaultdict(list)
+        self._lock = threading.Lock()
+
+    #
+    # 各種メソッド
+    #
+
+    def subscribe(self, event_name: str, handler: Callable[[str, dict], None]):
+        with self._lock:
+            if handler not in self._handler_dict[event_name]:
+                self._handler_dict[event_name].append(handler)
+
+    def unsubscribe(self, event_name: str, handler: Callable[[str, dict], None]):
+        with self._lock:
+            if handler in self._handler_dict[event_name]:
+                self._handler_dict[event_name].remove(handler)
+
+    def publish(self, event_name: str, **payload):
+        # 通知先の処理でエラーが発生しても、発行元(コミット済み)の処理は継続する
+        with self._lock:
+            handler_list = list(self._handler_dict[event_name])
+
+        for handler in handler_list:
+            try:
+                handler(event_name, payload)
+            except Exception:
+                traceback.print_exc()
+
+    def clear(self):
+        with self._lock:
+            self._handler_dict.clear()
+
+
+def get_domain_event_bus(session: Session) -> DomainEventBus:
+    # セッションに紐付いたページのイベント通知を取得(未設定の場合は作成)
+    # Note: ワーカースレッド用のセッションは作成時にinfoを引き継ぎ、同じページへ通知する
+    return session.info.setdefault(DOMAIN_EVENT_BUS_KEY, DomainEventBus())
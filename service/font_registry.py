@@ -0,0 +1,55 @@
+import hashlib
+import threading
+from pathlib import Path
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+# フォントファイルのフォルダパス
+FONT_FOLDER_PATH = Path(__file__).parent.parent / "data" / "fonts"
+
+# PDF出力で使用する既定のフォント名(フォルダ内の"<フォント名>.ttf"を使用)
+DEFAULT_FONT_NAME = "KosugiMaru-Regular"
+
+
+class FontRegistry:
+    # プロセス内でフォントの解析・登録を1回だけ行うためのレジストリ
+    # Note: 登録済みのTTFontはreportlab側に保持され、解析済みのフォント情報は全PDFで共有される
+    def __init__(self, font_folder_path: Path = FONT_FOLDER_PATH):
+        self.font_folder_path = font_folder_path
+        self._registered_font_name_set = set()
+        self._font_version_dict = {}
+        self._lock = threading.Lock()
+
+    #
+    # 各種メソッド
+    #
+
+    def register_font(self, font_name: str = DEFAULT_FONT_NAME) -> str:
+        # 登録済みの場合はファイルの解析を行わない
+        if font_name in self._registered_font_name_set:
+            return font_name
+
+        with self._lock:
+            if font_name not in self._registered_font_name_set:
+                font_file_path = self.font_folder_path / f"{font_name}.ttf"
+                pdfmetrics.registerFont(TTFont(font_name, str(font_file_path)))
+                self._registered_font_name_set.add(font_name)
+
+        return font_name
+
+    def get_font_version(self, font_name: str = DEFAULT_FONT_NAME) -> str:
+        # フォントファイルの内容のハッシュ値(作成済みPDFのキャッシュキーに使用)
+        font_version = self._font_version_dict.get(font_name)
+        if font_version is None:
+            font_file_path = self.font_folder_path / f"{font_name}.ttf"
+            font_version = hashlib.sha1(font_file_path.read_bytes()).hexdigest()
+            self._font_version_dict[font_name] = font_version
+        return font_version
+
+    def is_registered(self, font_name: str = DEFAULT_FONT_NAME) -> bool:
+        return font_name in self._registered_font_name_set
+
+
+# プロセス全体で共有するレジストリ
+font_registry = FontRegistry()
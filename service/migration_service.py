@@ -0,0 +1,170 @@
+import csv
+from pathlib import Path
+from sqlalchemy import Engine, Connection
+from sqlmodel import SQLModel, Session, text, select, update
+
+from model.models import WordType, VocabQuiz, ImportJob
+from service.word_book_service import WordBookService
+from service.word_item_stats_service import WordItemStatsService
+from service.quiz_item_set_service import QuizItemSetService
+from service.quiz_data_service import QuizDataService
+from service.quiz_data import QUIZ_DATA_VERSION, is_compact_quiz_data, to_compact_quiz_data, to_item_text
+
+# マスターファイルのフォルダパス
+SEED_FOLDER_PATH = Path(__file__).parent.parent / "data" / "seed"
+
+# 移行処理でまとめて更新する行数
+MIGRATION_BATCH_SIZE = 500
+
+
+class MigrationService:
+    def __init__(self, engine: Engine, seed_folder_path: Path = SEED_FOLDER_PATH):
+        self.engine = engine
+        self.seed_folder_path = seed_folder_path
+
+        # バージョン番号と移行処理の一覧
+        # Note: 各処理は既存DB(旧initdb.pyで作成済み)に対しても再実行可能な内容とする
+        self.migration_list = [
+            (1, "create tables", self._migrate_create_tables),
+            (2, "seed word types", self._migrate_seed_word_types),
+            (3, "create indexes", self._migrate_create_indexes),
+            (4, "backfill word item summaries", self._migrate_backfill_word_item_summaries),
+            (5, "backfill word item stats", self._migrate_backfill_word_item_stats),
+            (6, "backfill vocab quiz item sets", self._migrate_backfill_vocab_quiz_item_sets),
+            (7, "compact vocab quiz data", self._migrate_compact_vocab_quiz_data),
+            (8, "create history indexes", self._migrate_create_indexes),
+            (9, "track import job word item ids", self._migrate_add_import_job_id_ranges),
+            (10, "keep vocab quiz item text", self._migrate_backfill_vocab_quiz_item_text),
+        ]
+
+    #
+    # 各種メソッド
+    #
+
+    def get_current_version(self) -> int:
+        with self.engine.connect() as conn:
+            return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+    def get_latest_version(self) -> int:
+        return self.migration_list[-1][0]
+
+    def migrate(self) -> list:
+        # 未適用のバージョンのみ順に適用し、適用した(バージョン, 説明)のlistを返す(1バージョン毎に1トランザクション)
+        # Note: 適用結果の表示は呼び出し元で行う
+        current_version = self.get_current_version()
+        applied_list = []
+        for version, description, migrate_func in self.migration_list:
+            if version <= current_version:
+                continue
+
+            with self.engine.begin() as conn:
+                migrate_func(conn)
+                conn.exec_driver_sql(f"PRAGMA user_version = {int(version)}")
+
+            applied_list.append((version, description))
+            current_version = version
+
+        return applied_list
+
+    #
+    # 移行処理
+    #
+
+    def _migrate_create_tables(self, conn: Connection):
+        # 未作成のテーブルのみ作成する
+        SQLModel.metadata.create_all(conn, checkfirst=True)
+
+    def _migrate_seed_word_types(self, conn: Connection):
+        # 単語タイプ
+        word_types_csv_path = self.seed_folder_path / "word_types.csv"
+        statement = text(f"""
+            INSERT OR IGNORE INTO {WordType.__tablename__} (id, title_en, title_jp, title_short_en, title_short_jp)
+            VALUES (:id, :title_en, :title_jp, :title_short_en, :title_short_jp)
+        """)
+
+        with open(word_types_csv_path, "r", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            rows = [
+                {
+                    "id": int(row["id"]),
+                    "title_en": row["title_en"],
+                    "title_jp": row["title_jp"],
+                    "title_short_en": row["title_short_en"],
+                    "title_short_jp": row["title_short_jp"],
+                }
+                for row in reader
+            ]
+        conn.execute(statement, rows)
+
+    def _migrate_create_indexes(self, conn: Connection):
+        # 既存テーブルに対して未作成のインデックスを作成する
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+    def _migrate_backfill_word_item_summaries(self, conn: Connection):
+        # 集計テーブル追加前に登録された単語アイテムの集計データを作成
+        with Session(bind=conn) as session:
+            WordBookService(session).rebuild_word_item_summaries()
+
+    def _migrate_backfill_word_item_stats(self, conn: Connection):
+        # 出題履歴テーブル追加前に作成されたテストから出題回数を集計
+        SQLModel.metadata.create_all(conn, checkfirst=True)
+        with Session(bind=conn) as session:
+            WordItemStatsService(session).rebuild_word_item_stats()
+
+    def _migrate_backfill_vocab_quiz_item_sets(self, conn: Connection):
+        # 出題単語の集合テーブル追加前に作成されたテストの集合データを作成
+        SQLModel.metadata.create_all(conn, checkfirst=True)
+        with Session(bind=conn) as session:
+            QuizItemSetService(session).rebuild_quiz_item_sets()
+
+    def _migrate_compact_vocab_quiz_data(self, conn: Connection):
+        # 作成済みテストの内部データを単語アイテムIDとハッシュ値、圧縮した作成時の内容の形式に変換する
+        # Note: 保存済みの単語・意味は圧縮して保持するため、変換後に単語帳が更新されても作成時の内容で出力できる
+        with Session(bind=conn) as session:
+            statement = select(VocabQuiz.id, VocabQuiz.quiz_data)
+            update_rows = [
+                {"id": quiz_id, "quiz_data": to_compact_quiz_data(quiz_data)}
+                for quiz_id, quiz_data in session.exec(statement)
+                if quiz_data and not is_compact_quiz_data(quiz_data)
+            ]
+            for i in range(0, len(update_rows), MIGRATION_BATCH_SIZE):
+                session.exec(update(VocabQuiz), params=update_rows[i:i + MIGRATION_BATCH_SIZE])
+            session.commit()
+
+    def _migrate_add_import_job_id_ranges(self, conn: Connection):
+        # 取込ジョブで登録した単語アイテムIDの範囲を保持する列を追加(新規DBは作成済み)
+        # Note: 追加前のジョブは範囲が不明なため空とし、中止時に単語アイテムを削除しない
+        table_name = ImportJob.__tablename__
+        column_name_list = [x[1] for x in conn.exec_driver_sql(f"PRAGMA table_info({table_name})")]
+        if "word_item_id_ranges" not in column_name_list:
+            conn.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN word_item_id_ranges JSON")
+        conn.exec_driver_sql(f"UPDATE {table_name} SET word_item_id_ranges = '[]' WHERE word_item_id_ranges IS NULL")
+
+    def _migrate_backfill_vocab_quiz_item_text(self, conn: Connection):
+        # バージョン7で変換済み(作成時の内容を保持していない)テストに、作成時の内容を圧縮して追加する
+        # Note: 単語帳の現在の内容が作成時のハッシュ値と一致するテストのみ(更新済みのテストは復元できない)
+        with Session(bind=conn) as session:
+            quiz_data_service = QuizDataService(session)
+            statement = select(VocabQuiz).order_by(VocabQuiz.id)
+            vocab_quiz_list = [
+                x for x in session.exec(statement)
+                if x.quiz_data and is_compact_quiz_data(x.quiz_data) and "item_text" not in x.quiz_data
+            ]
+            update_rows = []
+            for i in range(0, len(vocab_quiz_list), MIGRATION_BATCH_SIZE):
+                batch_list = vocab_quiz_list[i:i + MIGRATION_BATCH_SIZE]
+                for vocab_quiz, quiz_data in zip(batch_list,
+                                                 quiz_data_service.get_resolved_quiz_data_list(batch_list)):
+                    if quiz_data.get("snapshot_changed", False):
+                        continue
+                    update_quiz_data = dict(vocab_quiz.quiz_data)
+                    update_quiz_data["version"] = QUIZ_DATA_VERSION
+                    update_quiz_data["item_text"] = to_item_text(quiz_data["item_list"])
+                    update_rows.append({"id": vocab_quiz.id, "quiz_data": update_quiz_data})
+            session.expunge_all()
+
+            for i in range(0, len(update_rows), MIGRATION_BATCH_SIZE):
+                session.exec(update(VocabQuiz), params=update_rows[i:i + MIGRATION_BATCH_SIZE])
+            session.commit()
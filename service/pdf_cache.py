@@ -0,0 +1,134 @@
+import os
+import threading
+from pathlib import Path
+
+# キャッシュ全体の上限サイズ(バイト)の既定値
+DEFAULT_PDF_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+class PdfFileCache:
+    # 作成済みPDFのバイト列をキー(内容のハッシュ値)毎にファイルとして保存するキャッシュ
+    # Note: 保存先フォルダが未設定の場合はキャッシュを使用しない
+    def __init__(self, cache_folder_path: Path | None = None, max_bytes: int = DEFAULT_PDF_CACHE_MAX_BYTES):
+        self.cache_folder_path = cache_folder_path
+        self.max_bytes = max_bytes
+
+        # 統計情報
+        self.hit_count = 0
+        self.miss_count = 0
+        self.eviction_count = 0
+
+        # 保存済みファイルの合計サイズ(初回の保存時にフォルダを走査して求める)
+        self._current_bytes = None
+        self._lock = threading.Lock()
+
+    #
+    # 各種メソッド
+    #
+
+    def configure(self, cache_folder_path: Path | None, max_bytes: int = DEFAULT_PDF_CACHE_MAX_BYTES):
+        with self._lock:
+            self.cache_folder_path = cache_folder_path
+            self.max_bytes = max_bytes
+            self._current_bytes = None
+
+    def is_enabled(self) -> bool:
+        return self.cache_folder_path is not None
+
+    def get(self, key: str) -> bytes | None:
+        if not self.is_enabled():
+            return None
+
+        file_path = self._get_file_path(key)
+        try:
+            data = file_path.read_bytes()
+        except FileNotFoundError:
+            with self._lock:
+                self.miss_count += 1
+            return None
+
+        # 最近使用したファイルとして更新日時を更新(破棄の順序に使用)
+        try:
+            os.utime(file_path)
+        except FileNotFoundError:
+            pass
+
+        with self._lock:
+            self.hit_count += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        if not self.is_enabled() or len(data) > self.max_bytes:
+            return
+
+        file_path = self._get_file_path(key)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._lock:
+            if self._current_bytes is None:
+                self._current_bytes = sum(x.stat().st_size for x in self._iter_cache_files())
+
+            # 書込み途中のファイルを読まれないよう、一時ファイルへ書込んだ後に置換する
+            old_size = file_path.stat().st_size if file_path.exists() else 0
+            tmp_file_path = file_path.with_name(file_path.name + f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_file_path.write_bytes(data)
+            os.replace(tmp_file_path, file_path)
+            self._current_bytes += len(data) - old_size
+
+            if self._current_bytes > self.max_bytes:
+                self._evict()
+
+    def clear(self):
+        if not self.is_enabled():
+            return
+
+        with self._lock:
+            for file_path in self._iter_cache_files():
+                file_path.unlink(missing_ok=True)
+            self._current_bytes = 0
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            total_count = self.hit_count + self.miss_count
+            return {
+                "current_bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+                "hit_count": self.hit_count,
+                "miss_count": self.miss_count,
+                "hit_ratio": self.hit_count / total_count if total_count > 0 else 0.0,
+                "eviction_count": self.eviction_count,
+            }
+
+    #
+    # privateメソッド
+    #
+
+    def _get_file_path(self, key: str) -> Path:
+        # 1フォルダ内のファイル数を抑えるため、キーの先頭2文字でフォルダを分ける
+        return self.cache_folder_path / key[:2] / f"{key}.pdf"
+
+    def _iter_cache_files(self):
+        return self.cache_folder_path.glob("*/*.pdf")
+
+    def _evict(self):
+        # 上限サイズに収まるまで、最も長く使用されていないファイルから破棄
+        file_list = []
+        for file_path in self._iter_cache_files():
+            try:
+                stat = file_path.stat()
+            except FileNotFoundError:
+                continue
+            file_list.append((stat.st_mtime, stat.st_size, file_path))
+        file_list.sort(key=lambda x: x[0])
+
+        self._current_bytes = sum(x[1] for x in file_list)
+        for _, size, file_path in file_list:
+            if self._current_bytes <= self.max_bytes:
+                break
+            file_path.unlink(missing_ok=True)
+            self._current_bytes -= size
+            self.eviction_count += 1
+
+
+# プロセス全体で共有するキャッシュ(保存先はアプリ起動時に設定)
+pdf_file_cache = PdfFileCache()
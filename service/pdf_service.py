@@ -1,53 +1,293 @@
+import io
+import json
+import random
+import hashlib
+from functools import lru_cache
 from pathlib import Path
 from sqlmodel import Session, select
 
 from reportlab.pdfgen import canvas
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.cidfonts import UnicodeCIDFont
-from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.pagesizes import A4, portrait
-from reportlab.platypus import Table, TableStyle
 from reportlab.lib.units import mm
-from reportlab.lib import colors
 
 from model.models import VocabQuiz
+from service.font_registry import font_registry, DEFAULT_FONT_NAME
+from service.pdf_cache import PdfFileCache, pdf_file_cache
+
+# PDFのレイアウトのバージョン(レイアウト変更時に作成済みPDFのキャッシュを無効化するため更新する)
+PDF_LAYOUT_VERSION = 3
+
+# 出力モード(0: 解答, 1: 単語→意味, 2: 意味→単語, 3: 混合)とファイル名の接尾辞
+PDF_MODE_ANSWER = 0
+PDF_MODE_WORD_TO_MEANING = 1
+PDF_MODE_MEANING_TO_WORD = 2
+PDF_MODE_MIXED = 3
+PDF_MODE_SUFFIX_DICT = {
+    PDF_MODE_ANSWER: "answer",
+    PDF_MODE_WORD_TO_MEANING: "quiz",
+    PDF_MODE_MEANING_TO_WORD: "quiz_reverse",
+    PDF_MODE_MIXED: "quiz_mixed",
+}
+
+# 1ページ目に表示する出題形式(単語→意味は従来通り表示しない)
+PDF_MODE_LABEL_DICT = {
+    PDF_MODE_MEANING_TO_WORD: "意味→単語",
+    PDF_MODE_MIXED: "混合",
+}
+
+# 問題PDFの出力モードの既定値
+DEFAULT_QUIZ_MODE_LIST = [PDF_MODE_WORD_TO_MEANING]
+
+# 単語テスト表のレイアウト(1ページ目は氏名・得点欄の下から表示)
+TABLE_LEFT = 30*mm
+TABLE_COLUMN_X_LIST = [TABLE_LEFT, TABLE_LEFT + 10*mm, TABLE_LEFT + 50*mm, TABLE_LEFT + 150*mm]
+TABLE_ROW_HEIGHT = 9*mm
+TABLE_FIRST_PAGE_TOP = 229*mm
+TABLE_OTHER_PAGE_TOP = 275*mm
+TABLE_BOTTOM = 20*mm
+TABLE_FONT_SIZE = 10
+TABLE_MIN_FONT_SIZE = 6
+TABLE_CELL_PADDING = 6
+TABLE_HEADER_ROW = ["No.", "単語", "意味"]
+
+
+@lru_cache(maxsize=None)
+def get_page_range_list(quiz_count: int) -> tuple:
+    # 出題数毎のページ割付((表の上端位置, 開始行, 終了行)のtuple)
+    # Note: 行の高さは固定のため、出題数が同じであれば出力モード・テストによらず同じ割付となる
+    first_page_row_count = int((TABLE_FIRST_PAGE_TOP - TABLE_BOTTOM) // TABLE_ROW_HEIGHT) - 1
+    other_page_row_count = int((TABLE_OTHER_PAGE_TOP - TABLE_BOTTOM) // TABLE_ROW_HEIGHT) - 1
+
+    page_range_list = [(TABLE_FIRST_PAGE_TOP, 0, min(first_page_row_count, quiz_count))]
+    for start in range(first_page_row_count, quiz_count, other_page_row_count):
+        page_range_list.append((TABLE_OTHER_PAGE_TOP, start, min(start + other_page_row_count, quiz_count)))
+    return tuple(page_range_list)
 
 
 class PdfService:
-    def __init__(self, session: Session):
+    def __init__(self, session: Session, pdf_cache: PdfFileCache | None = pdf_file_cache):
         self.session = session
+        self.pdf_cache = pdf_cache
 
-        # フォントの登録および埋込み処理
+        # フォント名の設定
+        # Note: フォントの解析・登録はPDF作成時に1回だけ行う(font_registry参照)
         #self.default_font_name = "HeiseiKakuGo-W5"
         #pdfmetrics.registerFont(UnicodeCIDFont(self.default_font_name))
-        self.default_font_name = "KosugiMaru-Regular"
-        self.default_font_file_path = "data/fonts/KosugiMaru-Regular.ttf"
-        pdfmetrics.registerFont(TTFont(self.default_font_name, self.default_font_file_path))
+        self.default_font_name = DEFAULT_FONT_NAME
 
 
     def save_answer_pdf_file(self, save_file_path: Path, vocab_quiz: VocabQuiz):
-        pdf_canvas = canvas.Canvas(str(save_file_path), pagesize=A4)
-        self.set_pdf_info(pdf_canvas, vocab_quiz)
-        self.print_string_to_pdf(pdf_canvas, vocab_quiz, 0)
-        pdf_canvas.save()
+        Path(save_file_path).write_bytes(self.get_answer_pdf_bytes(vocab_quiz))
 
     def save_quiz_pdf_file(self, save_file_path: Path, vocab_quiz: VocabQuiz):
-        pdf_canvas = canvas.Canvas(str(save_file_path))
-        self.set_pdf_info(pdf_canvas, vocab_quiz)
-        self.print_string_to_pdf(pdf_canvas, vocab_quiz, 1)
-        pdf_canvas.save()
+        Path(save_file_path).write_bytes(self.get_quiz_pdf_bytes(vocab_quiz))
+
+    def get_answer_pdf_bytes(self, vocab_quiz: VocabQuiz) -> bytes:
+        # ファイルを介さずにメモリ上でPDFを作成する(作成済みの場合はキャッシュから取得)
+        return self.get_pdf_entry_list(vocab_quiz, [])[0][1]
+
+    def get_quiz_pdf_bytes(self, vocab_quiz: VocabQuiz, mode: int = PDF_MODE_WORD_TO_MEANING) -> bytes:
+        return self.get_pdf_entry_list(vocab_quiz, [mode])[1][1]
+
+    def get_combined_pdf_bytes(self, vocab_quiz_list: list, mode: int, variant_index: int = 0,
+                               variant_count: int = 1) -> bytes:
+        # 複数テストを1つのPDFにまとめて作成する(印刷用、キャッシュは使用しない)
+        font_registry.register_font(self.default_font_name)
+        sheet_list = [
+            (x, mode, variant_index, variant_count, self.get_sheet_layout(x)) for x in vocab_quiz_list
+        ]
+        return self._render_pdf(sheet_list)
+
+    def get_pdf_entry_spec_list(self, file_name_prefix: str, mode_list: list | None = None,
+                                variant_count: int = 1) -> list:
+        # 作成するPDFの(ファイル名, 出力モード, バリエーション番号)のlist
+        # Note: ファイル名の先頭はテストのタイトル(全テストのまとめPDFの場合は"all")
+        # Note: バリエーションが1つの場合は従来通りのファイル名とする
+        if mode_list is None:
+            mode_list = DEFAULT_QUIZ_MODE_LIST
+
+        spec_list = []
+        for variant_index in range(variant_count):
+            variant_str = "" if variant_count == 1 else "_" + self._get_variant_name(variant_index)
+            for mode in [PDF_MODE_ANSWER] + list(mode_list):
+                arcname = f"{file_name_prefix}{variant_str}_{PDF_MODE_SUFFIX_DICT[mode]}.pdf"
+                spec_list.append((arcname, mode, variant_index))
+        return spec_list
+
+    def get_pdf_entry_list(self, vocab_quiz: VocabQuiz, mode_list: list | None = None,
+                           variant_count: int = 1) -> list:
+        # バリエーション毎の解答・問題(指定モード分)のPDFの(ファイル名, バイト列)のlist
+        # Note: 行毎の文字サイズ・ページ割付は全モード・バリエーションで共通のため、未作成のPDFがある場合のみ1回だけ計算する
+        sheet_layout = None
+        entry_list = []
+        for arcname, mode, variant_index in self.get_pdf_entry_spec_list(vocab_quiz.title, mode_list, variant_count):
+            cache_key = None
+            data = None
+            if self.pdf_cache is not None:
+                cache_key = self.get_pdf_cache_key(vocab_quiz, mode, variant_index, variant_count)
+                data = self.pdf_cache.get(cache_key)
+
+            if data is None:
+                if sheet_layout is None:
+                    font_registry.register_font(self.default_font_name)
+                    sheet_layout = self.get_sheet_layout(vocab_quiz)
+                data = self._render_pdf([(vocab_quiz, mode, variant_index, variant_count, sheet_layout)])
+                if cache_key is not None:
+                    self.pdf_cache.put(cache_key, data)
+
+            entry_list.append((arcname, data))
+
+        return entry_list
+
+    def get_cached_pdf_entry_list(self, vocab_quiz: VocabQuiz, mode_list: list | None = None,
+                                  variant_count: int = 1) -> list | None:
+        # 全てのPDFがキャッシュ済みの場合のみ返す
+        if self.pdf_cache is None:
+            return None
+
+        entry_list = []
+        for arcname, mode, variant_index in self.get_pdf_entry_spec_list(vocab_quiz.title, mode_list, variant_count):
+            data = self.pdf_cache.get(self.get_pdf_cache_key(vocab_quiz, mode, variant_index, variant_count))
+            if data is None:
+                return None
+            entry_list.append((arcname, data))
+        return entry_list
+
+    def put_cached_pdf_entry_list(self, vocab_quiz: VocabQuiz, entry_list: list, mode_list: list | None = None,
+                                  variant_count: int = 1):
+        # 別プロセスで作成したPDFのキャッシュへの登録(entry_listはget_pdf_entry_listと同じ順序)
+        if self.pdf_cache is None:
+            return
+
+        spec_list = self.get_pdf_entry_spec_list(vocab_quiz.title, mode_list, variant_count)
+        for (_, mode, variant_index), (_, data) in zip(spec_list, entry_list):
+            self.pdf_cache.put(self.get_pdf_cache_key(vocab_quiz, mode, variant_index, variant_count), data)
+
+    def get_pdf_cache_key(self, vocab_quiz: VocabQuiz, mode: int, variant_index: int = 0,
+                          variant_count: int = 1) -> str:
+        # PDFの出力内容に影響する項目のハッシュ値
+        content = {
+            "uuid": vocab_quiz.uuid,
+            "title": vocab_quiz.title,
+            "description": vocab_quiz.description,
+            "author": vocab_quiz.author,
+            "quiz_dt": vocab_quiz.quiz_dt.isoformat() if vocab_quiz.quiz_dt is not None else None,
+            "quiz_data": vocab_quiz.quiz_data,
+            "mode": mode,
+            "variant_index": variant_index,
+            "variant_count": variant_count,
+            "font_name": self.default_font_name,
+            "font_version": font_registry.get_font_version(self.default_font_name),
+            "layout_version": PDF_LAYOUT_VERSION,
+        }
+        content_str = json.dumps(content, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(content_str.encode("utf-8")).hexdigest()
+
+    def get_sheet_layout(self, vocab_quiz: VocabQuiz) -> dict:
+        # 出力モード・バリエーションによらないレイアウト情報(単語・意味毎の文字サイズとページ割付)
+        # Note: 文字サイズは列幅に収まるよう縮小する(文字幅の計測は単語・意味毎に1回のみ)
+        word_width = TABLE_COLUMN_X_LIST[2] - TABLE_COLUMN_X_LIST[1] - TABLE_CELL_PADDING * 2
+        meaning_width = TABLE_COLUMN_X_LIST[3] - TABLE_COLUMN_X_LIST[2] - TABLE_CELL_PADDING * 2
+
+        item_list = vocab_quiz.quiz_data["item_list"]
+        font_size_list = [
+            (self._get_fit_font_size(x["word"], word_width), self._get_fit_font_size(x["meaning"], meaning_width))
+            for x in item_list
+        ]
+
+        return {
+            "font_size_list": font_size_list,
+            "page_range_list": get_page_range_list(len(item_list)),
+        }
 
     def set_pdf_info(self, pdf_canvas, vocab_quiz):
         pdf_canvas.setTitle(vocab_quiz.title)
         pdf_canvas.setAuthor(vocab_quiz.author)
         #pdf_canvas.setSubject(subject)
 
-    def print_string_to_pdf(self, pdf_canvas, vocab_quiz: VocabQuiz, mode: int):
+    def print_string_to_pdf(self, pdf_canvas, vocab_quiz: VocabQuiz, mode: int, variant_index: int = 0,
+                            variant_count: int = 1, sheet_layout: dict | None = None):
+        # フォントの登録(プロセス内で初回のみ)
+        font_registry.register_font(self.default_font_name)
+        if sheet_layout is None:
+            sheet_layout = self.get_sheet_layout(vocab_quiz)
+
         # get quiz count
         quiz_count = len(vocab_quiz.quiz_data["item_list"])
+        page_range_list = sheet_layout["page_range_list"]
+        page_count = len(page_range_list)
+
+        # 1ページ目のテスト情報の表示
+        self._draw_first_page_header(pdf_canvas, vocab_quiz, quiz_count)
+        sheet_label = self._get_sheet_label(mode, variant_index, variant_count)
+        if sheet_label != "":
+            pdf_canvas.setFont(self.default_font_name, 9)
+            pdf_canvas.drawString(420, 720, sheet_label)
 
-        # サイズの取得(A4準拠)
-        #width, height = A4
+        # 単語テスト行をページ割付に従って描画する
+        # Note: 行数が多い場合は2ページ目以降にテーブルの見出し行を繰り返し表示する
+        row_list = self._get_table_row_list(vocab_quiz, mode, variant_index, sheet_layout)
+        for page_no, (table_top, start, end) in enumerate(page_range_list, start=1):
+            if page_no > 1:
+                pdf_canvas.showPage()
+                self._draw_other_page_header(pdf_canvas, vocab_quiz)
+
+            self._draw_table(pdf_canvas, table_top, row_list[start:end])
+
+            # ページ番号の表示(複数ページの場合のみ)
+            if page_count > 1:
+                pdf_canvas.setFont(self.default_font_name, 9)
+                pdf_canvas.drawCentredString(A4[0] / 2, 12*mm, f"{page_no} / {page_count}")
+
+    #
+    # privateメソッド
+    #
+
+    def _render_pdf(self, sheet_list: list) -> bytes:
+        # sheet_listは(テスト, 出力モード, バリエーション番号, バリエーション数, レイアウト情報)のlist
+        # 同じ内容からは常に同じバイト列となるよう、作成日時・IDを固定(invariant)して作成する
+        # Note: 複数テストを1つのPDFにまとめる場合、固定部分のフォームは全テストで共有される
+        buffer = io.BytesIO()
+        pdf_canvas = canvas.Canvas(buffer, pagesize=A4, invariant=1)
+        self.set_pdf_info(pdf_canvas, sheet_list[0][0])
+        for index, (vocab_quiz, mode, variant_index, variant_count, sheet_layout) in enumerate(sheet_list):
+            if index > 0:
+                pdf_canvas.showPage()
+            self.print_string_to_pdf(pdf_canvas, vocab_quiz, mode, variant_index, variant_count, sheet_layout)
+        pdf_canvas.save()
+        return buffer.getvalue()
+
+    def _get_fit_font_size(self, text: str, width: float) -> float:
+        # 列幅に収まらない文字列は文字サイズを縮小する(下限以下にはしない)
+        text_width = pdfmetrics.stringWidth(text, self.default_font_name, TABLE_FONT_SIZE)
+        if text_width <= width:
+            return TABLE_FONT_SIZE
+        return max(TABLE_MIN_FONT_SIZE, int(TABLE_FONT_SIZE * width / text_width * 10) / 10)
+
+    def _get_variant_name(self, variant_index: int) -> str:
+        return chr(ord("A") + variant_index)
+
+    def _get_variant_random(self, vocab_quiz: VocabQuiz, variant_index: int, purpose: str) -> random.Random:
+        # テストのシード値(未設定の場合はUUID)とバリエーション番号から決まる乱数
+        # Note: 同じテスト・バリエーションからは常に同じ並び順・出題形式となる
+        seed = vocab_quiz.quiz_data.get("seed")
+        if seed is None:
+            seed = vocab_quiz.uuid
+        return random.Random(f"{seed}:{variant_index}:{purpose}")
+
+    def _get_sheet_label(self, mode: int, variant_index: int, variant_count: int) -> str:
+        label_list = []
+        if mode in PDF_MODE_LABEL_DICT:
+            label_list.append("形式: " + PDF_MODE_LABEL_DICT[mode])
+        if variant_count > 1:
+            label_list.append("パターン: " + self._get_variant_name(variant_index))
+        return " / ".join(label_list)
+
+    def _draw_first_page_header(self, pdf_canvas, vocab_quiz: VocabQuiz, quiz_count: int):
+        # 固定部分(氏名・得点欄)はフォームとして1回だけ作成し、以降は参照のみ
+        self._do_form(pdf_canvas, "first_page_chrome", self._draw_first_page_chrome)
 
         # テストタイトルのテキスト表示
         pdf_canvas.setFont(self.default_font_name, 20)
@@ -62,45 +302,110 @@ class PdfService:
         pdf_canvas.setFont(self.default_font_name, 9)
         pdf_canvas.drawString(420, 735, "実施日: " + quiz_dt_str)
 
+        # 出題数の表示
+        pdf_canvas.setFont(self.default_font_name, 10)
+        pdf_canvas.drawString(485, 660, "/ " + str(quiz_count))
+
+    def _draw_first_page_chrome(self, pdf_canvas):
         # 得点・氏名記入欄の表示
         pdf_canvas.setFont(self.default_font_name, 10)
         pdf_canvas.setLineWidth(1)
         pdf_canvas.drawString(360, 695, "氏名")
         pdf_canvas.drawString(360, 660, "得点")
-        pdf_canvas.drawString(485, 660, "/ " + str(quiz_count))
         pdf_canvas.line(360, 690, 510, 690)
         pdf_canvas.line(360, 655, 510, 655)
 
-        # 単語テスト用のテーブル作成
-        # Note: WrapOn/drawOn設定時は表示開始位置の調整が必要
-        table_row_list = self._get_table_row_list(vocab_quiz, mode)
-        table = Table(table_row_list, colWidths=(10*mm, 40*mm, 100*mm), rowHeights=9*mm, hAlign="LEFT")
-        table.setStyle(TableStyle([
-            ("FONT", (0, 0), (-1, -1), self.default_font_name, 10),
-            ("BOX", (0, 0), (-1, -1), 1, colors.black),
-            ("INNERGRID", (0, 0), (-1, -1), 1, colors.black),
-            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-        ]))
-        table.wrapOn(pdf_canvas, 30*mm, (220 - 9 * quiz_count)*mm)
-        table.drawOn(pdf_canvas, 30*mm, (220 - 9 * quiz_count)*mm)
-
-    def _get_table_row_list(self, vocab_quiz: VocabQuiz, mode: int):
-        row_list = []
-        quiz_data = vocab_quiz.quiz_data
+    def _draw_other_page_header(self, pdf_canvas, vocab_quiz: VocabQuiz):
+        # 2ページ目以降はタイトルのみ表示
+        pdf_canvas.setFont(self.default_font_name, 10)
+        pdf_canvas.drawString(85, 800, vocab_quiz.title)
+
+    def _draw_table(self, pdf_canvas, table_top: float, row_list: list):
+        # 罫線・見出し行はページ上の位置・行数毎のフォームとして1回だけ作成し、以降は参照のみ
+        # Note: 最終ページ以外は行数が同じため、ほぼ全ページで同じフォームを使用する
+        form_name = "table_grid_{0:.0f}_{1}".format(table_top, len(row_list))
+        self._do_form(pdf_canvas, form_name, self._draw_table_grid, table_top, len(row_list))
+
+        # データ行の文字列の描画(上下中央揃え、文字サイズが変わる場合のみフォントを再設定)
+        current_font_size = TABLE_FONT_SIZE
+        pdf_canvas.setFont(self.default_font_name, current_font_size)
+        for i, row in enumerate(row_list, start=1):
+            y = self._get_table_text_y(table_top, i)
+            for x, (value, font_size) in zip(TABLE_COLUMN_X_LIST, row):
+                if value == "":
+                    continue
+                if font_size != current_font_size:
+                    current_font_size = font_size
+                    pdf_canvas.setFont(self.default_font_name, current_font_size)
+                pdf_canvas.drawString(x + TABLE_CELL_PADDING, y, str(value))
+
+    def _draw_table_grid(self, pdf_canvas, table_top: float, row_count: int):
+        # 見出し行 + データ行の罫線を描画する(各列の位置は固定)
+        table_bottom = table_top - TABLE_ROW_HEIGHT * (row_count + 1)
+        table_right = TABLE_COLUMN_X_LIST[-1]
+
+        pdf_canvas.setLineWidth(1)
+        pdf_canvas.rect(TABLE_LEFT, table_bottom, table_right - TABLE_LEFT, table_top - table_bottom)
+        for i in range(1, row_count + 1):
+            y = table_top - TABLE_ROW_HEIGHT * i
+            pdf_canvas.line(TABLE_LEFT, y, table_right, y)
+        for x in TABLE_COLUMN_X_LIST[1:-1]:
+            pdf_canvas.line(x, table_bottom, x, table_top)
+
+        # 見出し行の文字列
+        pdf_canvas.setFont(self.default_font_name, TABLE_FONT_SIZE)
+        y = self._get_table_text_y(table_top, 0)
+        for x, value in zip(TABLE_COLUMN_X_LIST, TABLE_HEADER_ROW):
+            pdf_canvas.drawString(x + TABLE_CELL_PADDING, y, value)
+
+    def _get_table_text_y(self, table_top: float, row_index: int) -> float:
+        # row_index行目(0: 見出し行)の文字列のベースライン位置
+        return table_top - TABLE_ROW_HEIGHT * (row_index + 1) + (TABLE_ROW_HEIGHT - TABLE_FONT_SIZE * 0.7) / 2
+
+    def _do_form(self, pdf_canvas, form_name: str, draw_func, *args):
+        # 同じPDF内で未作成のフォーム(XObject)のみ作成し、現在のページから参照する
+        if not pdf_canvas.hasForm(form_name):
+            pdf_canvas.beginForm(form_name)
+            draw_func(pdf_canvas, *args)
+            pdf_canvas.endForm()
+        pdf_canvas.doForm(form_name)
+
+    def _get_table_row_list(self, vocab_quiz: VocabQuiz, mode: int, variant_index: int, sheet_layout: dict) -> list:
+        # 単語テスト行((値, 文字サイズ)のlist)のlist
+        item_list = vocab_quiz.quiz_data["item_list"]
+        font_size_list = sheet_layout["font_size_list"]
+
+        # 出題順(バリエーション0は作成時の順序、以降はバリエーション毎に並べ替え)
+        # Note: 解答と問題で同じ並び順となるよう、出力モードによらない乱数を使用する
+        index_list = list(range(len(item_list)))
+        if variant_index > 0:
+            self._get_variant_random(vocab_quiz, variant_index, "order").shuffle(index_list)
+
+        # 混合の場合は行毎に出題形式を決める
+        direction_list = [mode] * len(item_list)
+        if mode == PDF_MODE_MIXED:
+            direction_random = self._get_variant_random(vocab_quiz, variant_index, "mixed")
+            direction_list = [
+                direction_random.choice([PDF_MODE_WORD_TO_MEANING, PDF_MODE_MEANING_TO_WORD]) for _ in item_list
+            ]
 
         # 単語テスト行の生成
-        for index, word_info in enumerate(quiz_data["item_list"], start=1):
-            word = word_info["word"]
-            meaning = word_info["meaning"]
+        row_list = []
+        for no, (item_index, direction) in enumerate(zip(index_list, direction_list), start=1):
+            word_info = item_list[item_index]
+            word_font_size, meaning_font_size = font_size_list[item_index]
+            word = (word_info["word"], word_font_size)
+            meaning = (word_info["meaning"], meaning_font_size)
+            blank = ("", TABLE_FONT_SIZE)
 
             # 行設定
             row = []
-            if mode == 0:
-                row = [index, word, meaning]
-            if mode == 1:
-                row = [index, word, ""]
-            elif mode == 2:
-                row = [index, "", meaning]
+            if direction == PDF_MODE_ANSWER:
+                row = [(no, TABLE_FONT_SIZE), word, meaning]
+            elif direction == PDF_MODE_WORD_TO_MEANING:
+                row = [(no, TABLE_FONT_SIZE), word, blank]
+            elif direction == PDF_MODE_MEANING_TO_WORD:
+                row = [(no, TABLE_FONT_SIZE), blank, meaning]
 
             row_list.append(row)
 
@@ -0,0 +1,52 @@
+import re
+
+# 範囲指定文字列の区切り(カンマ・読点・空白)
+AREA_SEPARATOR_PATTERN = re.compile(r"[,、\s]+")
+
+# 範囲の開始・終了の区切り記号(前後の空白を含む)
+AREA_DASH_PATTERN = re.compile(r"\s*[-~～ー－]\s*")
+
+# 1つの範囲指定("100-200" または "100")
+AREA_RANGE_PATTERN = re.compile(r"^(\d+)(?:-(\d+))?$")
+
+
+def parse_area_str(area_str: str) -> list:
+    # "1-200, 450-600, 580-900" 形式の文字列を(lower, upper)のlistに変換する
+    area_list = []
+
+    normalized_str = AREA_DASH_PATTERN.sub("-", area_str.strip())
+    for token in AREA_SEPARATOR_PATTERN.split(normalized_str):
+        if token == "":
+            continue
+
+        match = AREA_RANGE_PATTERN.match(token)
+        if match is None:
+            raise ValueError(f"出題範囲の指定が不正です: {token}")
+
+        lower = int(match.group(1))
+        upper = int(match.group(2)) if match.group(2) is not None else lower
+        if lower > upper:
+            raise ValueError(f"出題範囲の開始が終了より大きいです: {token}")
+
+        area_list.append((lower, upper))
+
+    return merge_area_list(area_list)
+
+
+def merge_area_list(area_list: list | None) -> list:
+    # 重複・隣接する範囲を結合し、最小の区間集合にまとめる
+    if not area_list:
+        return []
+
+    merged_list = []
+    for lower, upper in sorted((int(x[0]), int(x[1])) for x in area_list):
+        if len(merged_list) > 0 and lower <= merged_list[-1][1] + 1:
+            merged_list[-1] = (merged_list[-1][0], max(merged_list[-1][1], upper))
+        else:
+            merged_list.append((lower, upper))
+
+    return merged_list
+
+
+def format_area_list(area_list: list) -> str:
+    return ", ".join(f"{x[0]}-{x[1]}" for x in area_list)
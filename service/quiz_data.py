@@ -0,0 +1,99 @@
+import json
+import zlib
+import base64
+import hashlib
+
+# テストの内部データの形式のバージョン
+# Note: 1: 単語・意味の文字列を含む出題単語のlist(item_list)を保持, 2: 単語アイテムIDとハッシュ値のみを保持,
+#       3: 2に加えて作成時の単語・意味を圧縮して保持(表示・出力には常にこの内容を使用し、単語帳は参照しない)
+QUIZ_DATA_VERSION = 3
+
+
+def get_quiz_word_item_id_list(quiz_data: dict | None) -> list:
+    # テストの内部データから出題単語アイテムIDを出題順に取得
+    if not quiz_data:
+        return []
+    if "item_ids" in quiz_data:
+        return list(quiz_data["item_ids"])
+    return [x["word_item_id"] for x in quiz_data.get("item_list", [])]
+
+
+def is_compact_quiz_data(quiz_data: dict | None) -> bool:
+    return bool(quiz_data) and "item_ids" in quiz_data
+
+
+def get_snapshot_hash(item_list: list) -> str:
+    # 出題単語の内容(ID・単語・意味)のハッシュ値(作成時の内容を保持していないテストの、作成後の単語帳の更新の検出に使用)
+    content = [[x["word_item_id"], x["word"], x["meaning"]] for x in item_list]
+    content_str = json.dumps(content, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(content_str.encode("utf-8")).hexdigest()
+
+
+def to_item_text(item_list: list) -> str:
+    # 作成時の出題単語の内容(seq_no・単語・意味)をzlib圧縮した文字列(JSON列に保存するためbase64)
+    # Note: 保存したテストの単語・意味はこの内容のみから解決する(単語帳の現在の内容と二重に持たない)
+    content = [[x["seq_no"], x["word"], x["meaning"]] for x in item_list]
+    content_str = json.dumps(content, ensure_ascii=False, separators=(",", ":"))
+    return base64.b64encode(zlib.compress(content_str.encode("utf-8"), 9)).decode("ascii")
+
+
+def from_item_text(item_text: str, item_ids: list) -> list:
+    # to_item_textで圧縮した内容を出題単語のlistに戻す
+    content = json.loads(zlib.decompress(base64.b64decode(item_text)).decode("utf-8"))
+    return [
+        {"word_item_id": word_item_id, "seq_no": seq_no, "word": word, "meaning": meaning}
+        for word_item_id, (seq_no, word, meaning) in zip(item_ids, content)
+    ]
+
+
+def to_compact_quiz_data(quiz_data: dict) -> dict:
+    # 単語・意味の文字列を除き、単語アイテムIDと作成時の内容のハッシュ値・圧縮した内容を保持する形式に変換
+    # Note: 解決済みの内部データを変換する場合は、作成時のハッシュ値・内容をそのまま引き継ぐ
+    if "item_list" not in quiz_data:
+        return dict(quiz_data)
+
+    item_list = quiz_data["item_list"]
+    compact_quiz_data = {k: v for k, v in quiz_data.items()
+                         if k not in ("item_list", "snapshot_changed", "missing_item_ids")}
+    compact_quiz_data["version"] = QUIZ_DATA_VERSION
+    compact_quiz_data["item_ids"] = [x["word_item_id"] for x in item_list]
+    compact_quiz_data["snapshot_hash"] = quiz_data.get("snapshot_hash") or get_snapshot_hash(item_list)
+    compact_quiz_data["item_text"] = quiz_data.get("item_text") or to_item_text(item_list)
+    return compact_quiz_data
+
+
+def get_candidate_hash(candidate_id_list: list) -> str:
+    # 抽選対象の候補IDのハッシュ値(シードからの再作成時に同じ候補から抽選できるかの判定に使用)
+    content_str = json.dumps(candidate_id_list, separators=(",", ":"))
+    return hashlib.sha1(content_str.encode("utf-8")).hexdigest()
+
+
+def to_item_bitset(word_item_id_list: list) -> tuple[int, bytes]:
+    # 単語アイテムIDの集合を(最小ID, 最小IDからのビット列)に変換する
+    if len(word_item_id_list) == 0:
+        return 0, b""
+
+    base_id = min(word_item_id_list)
+    item_bits = bytearray((max(word_item_id_list) - base_id) // 8 + 1)
+    for word_item_id in word_item_id_list:
+        offset = word_item_id - base_id
+        item_bits[offset >> 3] |= 1 << (offset & 7)
+    return base_id, bytes(item_bits)
+
+
+def from_item_bitset(base_id: int, item_bits: bytes) -> int:
+    # ビット位置 = 単語アイテムID となる整数のビット集合に戻す
+    return int.from_bytes(item_bits, "little") << base_id
+
+
+def exclude_item_bitset(word_item_id_list: list, item_bits: int) -> list:
+    # ビット集合に含まれる単語アイテムIDを除外する(ID毎の判定はO(1))
+    if item_bits == 0:
+        return list(word_item_id_list)
+
+    item_bytes = item_bits.to_bytes((item_bits.bit_length() + 7) // 8, "little")
+    byte_count = len(item_bytes)
+    return [
+        x for x in word_item_id_list
+        if (x >> 3) >= byte_count or not (item_bytes[x >> 3] >> (x & 7)) & 1
+    ]
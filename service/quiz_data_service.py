@@ -0,0 +1,156 @@
+from sqlalchemy import inspect
+from sqlalchemy.orm import undefer
+from sqlmodel import Session, select
+
+from model.models import VocabQuiz, WordItemSummary
+from service.quiz_data import is_compact_quiz_data, get_snapshot_hash, from_item_text
+from service.word_item_cache import quiz_item_list_cache
+
+# 単語・意味の解決時にまとめて取得する単語アイテム数
+RESOLVE_BATCH_SIZE = 1000
+
+
+class QuizDataService:
+    def __init__(self, session: Session):
+        self.session = session
+
+    #
+    # 各種メソッド
+    #
+
+    def get_item_list(self, vocab_quiz: VocabQuiz) -> list:
+        # 出題単語(単語アイテムID, 番号, 単語, 意味のdict)のlistを出題順に取得
+        return self.get_resolved_quiz_data_list([vocab_quiz])[0]["item_list"]
+
+    def is_snapshot_changed(self, vocab_quiz: VocabQuiz) -> bool:
+        # テスト作成後に出題単語の単語・意味が更新されたかどうか
+        return self.get_resolved_quiz_data_list([vocab_quiz])[0].get("snapshot_changed", False)
+
+    def get_snapshot_notice(self, vocab_quiz: VocabQuiz) -> str:
+        # テスト作成後の単語帳の更新に関する注意書き(更新がない場合は空文字)
+        quiz_data = self.get_resolved_quiz_data_list([vocab_quiz])[0]
+        if not quiz_data.get("snapshot_changed", False):
+            return ""
+
+        missing_item_id_list = quiz_data.get("missing_item_ids", [])
+        if len(missing_item_id_list) > 0:
+            return "※テスト作成後に単語帳から出題単語が{0}件削除されたため、PDFを出力できません".format(
+                len(missing_item_id_list))
+        return "※テスト作成後に単語帳が更新されたため、作成時と異なる単語・意味が含まれます"
+
+    def get_resolved_vocab_quiz(self, vocab_quiz: VocabQuiz) -> VocabQuiz:
+        return self.get_resolved_vocab_quiz_list([vocab_quiz])[0]
+
+    def get_resolved_vocab_quiz_list(self, vocab_quiz_list: list) -> list:
+        # PDF作成・エクスポート用に、単語・意味を解決済みのテストのコピーを作成する(DBには登録しない)
+        quiz_data_list = self.get_resolved_quiz_data_list(vocab_quiz_list)
+        return [
+            VocabQuiz(
+                id=x.id,
+                word_book_id=x.word_book_id,
+                uuid=x.uuid,
+                title=x.title,
+                description=x.description,
+                author=x.author,
+                quiz_dt=x.quiz_dt,
+                quiz_data=y,
+            )
+            for x, y in zip(vocab_quiz_list, quiz_data_list)
+        ]
+
+    def get_resolved_quiz_data_list(self, vocab_quiz_list: list) -> list:
+        # 内部データから単語・意味を解決し、item_listを付加したdictのlistを返す
+        # Note: 作成時の内容(item_text)を保持するテストは、その内容のみを使用する(単語帳の現在の内容は参照しない)
+        # Note: 作成時の内容を保持していないテストは、キャッシュにないものの単語アイテムを1回のクエリ(一定件数毎)で
+        #       まとめて取得し、作成時のハッシュ値と異なる場合はsnapshot_changed、解決できない単語アイテムIDを
+        #       missing_item_idsに設定する
+        # Note: 旧形式(item_listを保持)の内部データはそのまま返す
+        self._load_quiz_data(vocab_quiz_list)
+        quiz_data_list = [None] * len(vocab_quiz_list)
+        missing_list = []
+        for index, vocab_quiz in enumerate(vocab_quiz_list):
+            quiz_data = vocab_quiz.quiz_data or {}
+            if not is_compact_quiz_data(quiz_data):
+                quiz_data_list[index] = quiz_data
+                continue
+
+            cache_key = self._get_cache_key(vocab_quiz)
+            entry = quiz_item_list_cache.get(cache_key)
+            if entry is None and "item_text" in quiz_data:
+                entry = (from_item_text(quiz_data["item_text"], quiz_data["item_ids"]), False, [])
+                quiz_item_list_cache.put(cache_key, *entry)
+            if entry is None:
+                missing_list.append((index, cache_key))
+                continue
+            quiz_data_list[index] = self._get_resolved_quiz_data(quiz_data, *entry)
+
+        if len(missing_list) > 0:
+            word_item_id_set = set()
+            for index, _ in missing_list:
+                word_item_id_set.update(vocab_quiz_list[index].quiz_data["item_ids"])
+            item_dict = self._get_item_dict(list(word_item_id_set))
+
+            for index, cache_key in missing_list:
+                quiz_data = vocab_quiz_list[index].quiz_data
+                item_list = [item_dict[x] for x in quiz_data["item_ids"] if x in item_dict]
+                snapshot_changed = (len(item_list) != len(quiz_data["item_ids"])
+                                    or get_snapshot_hash(item_list) != quiz_data.get("snapshot_hash"))
+                missing_item_id_list = []
+                if snapshot_changed:
+                    missing_item_id_list = [x for x in quiz_data["item_ids"] if x not in item_dict]
+
+                quiz_item_list_cache.put(cache_key, item_list, snapshot_changed, missing_item_id_list)
+                quiz_data_list[index] = self._get_resolved_quiz_data(quiz_data, item_list, snapshot_changed,
+                                                                     missing_item_id_list)
+
+        return quiz_data_list
+
+    def put_item_list(self, vocab_quiz: VocabQuiz, item_list: list):
+        # 作成直後のテストの出題単語をキャッシュに登録する(確認画面・PDF作成時に再取得しない)
+        quiz_item_list_cache.put(self._get_cache_key(vocab_quiz), item_list, False, [])
+
+    #
+    # privateメソッド
+    #
+
+    def _load_quiz_data(self, vocab_quiz_list: list):
+        # 一覧の取得時に読込を省略した内部データを、1回のクエリ(一定件数毎)でまとめて読み込む
+        # Note: 取得したテストはセッション内で同じインスタンスのため、未読込の内部データのみ設定される
+        vocab_quiz_id_list = [x.id for x in vocab_quiz_list if "quiz_data" in inspect(x).unloaded and x.id is not None]
+        for i in range(0, len(vocab_quiz_id_list), RESOLVE_BATCH_SIZE):
+            statement = (select(VocabQuiz)
+                         .where(VocabQuiz.id.in_(vocab_quiz_id_list[i:i + RESOLVE_BATCH_SIZE]))
+                         .options(undefer(VocabQuiz.quiz_data)))
+            self.session.exec(statement).all()
+
+    def _get_cache_key(self, vocab_quiz: VocabQuiz) -> tuple:
+        # 登録前(flush前)のテストは単語帳IDが未設定のためリレーションから取得
+        word_book_id = vocab_quiz.word_book_id
+        if word_book_id is None:
+            word_book_id = vocab_quiz.word_book.id
+        return word_book_id, vocab_quiz.uuid, vocab_quiz.quiz_data.get("snapshot_hash")
+
+    def _get_resolved_quiz_data(self, quiz_data: dict, item_list: list, snapshot_changed: bool,
+                                missing_item_id_list: list) -> dict:
+        resolved_quiz_data = dict(quiz_data)
+        resolved_quiz_data["item_list"] = item_list
+        if snapshot_changed:
+            resolved_quiz_data["snapshot_changed"] = True
+        if len(missing_item_id_list) > 0:
+            resolved_quiz_data["missing_item_ids"] = missing_item_id_list
+        return resolved_quiz_data
+
+    def _get_item_dict(self, word_item_id_list: list) -> dict:
+        item_dict = {}
+        for i in range(0, len(word_item_id_list), RESOLVE_BATCH_SIZE):
+            statement = (select(WordItemSummary.word_item_id, WordItemSummary.seq_no,
+                                WordItemSummary.word, WordItemSummary.meaning)
+                         .where(WordItemSummary.word_item_id.in_(word_item_id_list[i:i + RESOLVE_BATCH_SIZE])))
+            for word_item_id, seq_no, word, meaning in self.session.exec(statement):
+                item_dict[word_item_id] = {
+                    "word_item_id": word_item_id,
+                    "seq_no": seq_no,
+                    "word": word,
+                    "meaning": meaning,
+                }
+        return item_dict
@@ -0,0 +1,98 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from model.models import VocabQuiz
+from service.pdf_service import PdfService
+
+# プロセスプールで並列作成を行うテスト数の下限(これ未満はプロセス内で作成)
+PARALLEL_EXPORT_MIN_COUNT = 3
+
+
+def to_quiz_export_dict(vocab_quiz: VocabQuiz) -> dict:
+    # プロセス間で受け渡しできるよう、PDF作成に必要な項目のみのdictに変換する
+    # Note: quiz_dataは単語・意味を解決済みのもの(QuizDataService.get_resolved_vocab_quiz参照)
+    return {
+        "uuid": vocab_quiz.uuid,
+        "title": vocab_quiz.title,
+        "description": vocab_quiz.description,
+        "author": vocab_quiz.author,
+        "quiz_dt": vocab_quiz.quiz_dt,
+        "quiz_data": vocab_quiz.quiz_data,
+    }
+
+
+def render_quiz_pdf_entries(quiz_export_dict: dict, mode_list: list | None = None, variant_count: int = 1) -> list:
+    # 解答・問題のPDFを作成し、(ファイル名, バイト列)のlistを返す
+    # Note: ワーカープロセスで実行されるため、DBセッションは使用しない
+    # Note: キャッシュへの登録は呼出し元のプロセスで行う
+    pdf_service = PdfService(None, pdf_cache=None)
+    return pdf_service.get_pdf_entry_list(VocabQuiz(**quiz_export_dict), mode_list, variant_count)
+
+
+def render_combined_quiz_pdf(quiz_export_dict_list: list, mode: int, variant_index: int = 0,
+                             variant_count: int = 1) -> bytes:
+    # 全テストを1つのPDFにまとめて作成する(ワーカープロセスで実行)
+    vocab_quiz_list = [VocabQuiz(**x) for x in quiz_export_dict_list]
+    pdf_service = PdfService(None, pdf_cache=None)
+    return pdf_service.get_combined_pdf_bytes(vocab_quiz_list, mode, variant_index, variant_count)
+
+
+def render_combined_quiz_pdf_entries(quiz_export_dict_list: list, workers: int | None = None,
+                                     mode_list: list | None = None, variant_count: int = 1) -> list:
+    # バリエーション毎の解答・問題のまとめPDFの(ファイル名, バイト列)のlist(PDF毎に別プロセスで並列作成)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    # ファイル名・出力モードはテスト毎のPDFと共通(ファイル名の先頭のみ"all")
+    spec_list = PdfService(None, pdf_cache=None).get_pdf_entry_spec_list("all", mode_list, variant_count)
+
+    if workers <= 1:
+        data_list = [
+            render_combined_quiz_pdf(quiz_export_dict_list, mode, variant_index, variant_count)
+            for _, mode, variant_index in spec_list
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(spec_list))) as executor:
+            data_list = list(executor.map(
+                render_combined_quiz_pdf,
+                [quiz_export_dict_list] * len(spec_list),
+                [x[1] for x in spec_list],
+                [x[2] for x in spec_list],
+                [variant_count] * len(spec_list),
+            ))
+
+    return [(arcname, data) for (arcname, _, _), data in zip(spec_list, data_list)]
+
+
+def iter_rendered_quiz_pdf_entries(quiz_export_dict_list: list, workers: int | None = None,
+                                   pdf_service: PdfService | None = None, mode_list: list | None = None,
+                                   variant_count: int = 1):
+    # テスト毎のPDFを指定順に返す(テスト数が多い場合はプロセスプールで並列作成)
+    # Note: pdf_service指定時は作成済みのPDFをキャッシュから取得し、未作成のもののみ作成してキャッシュに登録する
+    if pdf_service is not None:
+        vocab_quiz_list = [VocabQuiz(**x) for x in quiz_export_dict_list]
+        cached_entry_lists = [
+            pdf_service.get_cached_pdf_entry_list(x, mode_list, variant_count) for x in vocab_quiz_list
+        ]
+        missing_dict_list = [x for x, y in zip(quiz_export_dict_list, cached_entry_lists) if y is None]
+
+        rendered_iter = iter_rendered_quiz_pdf_entries(missing_dict_list, workers, None, mode_list, variant_count)
+        for vocab_quiz, entry_list in zip(vocab_quiz_list, cached_entry_lists):
+            if entry_list is None:
+                entry_list = next(rendered_iter)
+                pdf_service.put_cached_pdf_entry_list(vocab_quiz, entry_list, mode_list, variant_count)
+            yield entry_list
+        return
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1 or len(quiz_export_dict_list) < PARALLEL_EXPORT_MIN_COUNT:
+        for quiz_export_dict in quiz_export_dict_list:
+            yield render_quiz_pdf_entries(quiz_export_dict, mode_list, variant_count)
+        return
+
+    count = len(quiz_export_dict_list)
+    with ProcessPoolExecutor(max_workers=min(workers, count)) as executor:
+        yield from executor.map(render_quiz_pdf_entries, quiz_export_dict_list, [mode_list] * count,
+                                [variant_count] * count)
@@ -0,0 +1,88 @@
+from sqlmodel import Session, select, insert, delete
+
+from model.models import WordBook, VocabQuiz, VocabQuizItemSet
+from service.quiz_data import get_quiz_word_item_id_list, to_item_bitset, from_item_bitset
+
+# 集合データをまとめて登録する行数
+ITEM_SET_BATCH_SIZE = 500
+
+
+class QuizItemSetService:
+    def __init__(self, session: Session):
+        self.session = session
+
+    #
+    # 各種メソッド
+    #
+
+    def add_vocab_quiz_list(self, vocab_quiz_list: list):
+        # テスト毎の出題単語アイテムIDのビット集合を登録(コミットは呼出し元で行う)
+        # Note: テストIDが必要なため、未登録のテストは先にflushする
+        self.session.flush()
+
+        item_set_rows = []
+        for vocab_quiz in vocab_quiz_list:
+            base_id, item_bits = to_item_bitset(get_quiz_word_item_id_list(vocab_quiz.quiz_data))
+            item_set_rows.append({
+                "vocab_quiz_id": vocab_quiz.id,
+                "word_book_id": vocab_quiz.word_book_id,
+                "base_id": base_id,
+                "item_bits": item_bits,
+            })
+
+        for i in range(0, len(item_set_rows), ITEM_SET_BATCH_SIZE):
+            self.session.exec(insert(VocabQuizItemSet), params=item_set_rows[i:i + ITEM_SET_BATCH_SIZE])
+
+    def remove_vocab_quiz(self, vocab_quiz: VocabQuiz):
+        # コミットは呼出し元で行う
+        self.session.exec(delete(VocabQuizItemSet).where(VocabQuizItemSet.vocab_quiz_id == vocab_quiz.id))
+
+    def rebuild_quiz_item_sets(self, word_book: WordBook | None = None):
+        # 対象の単語帳(指定がない場合は全件)の集合データを作成済みのテストから再作成する
+        delete_statement = delete(VocabQuizItemSet)
+        statement = select(VocabQuiz)
+        if word_book is not None:
+            delete_statement = delete_statement.where(VocabQuizItemSet.word_book_id == word_book.id)
+            statement = statement.where(VocabQuiz.word_book_id == word_book.id)
+        self.session.exec(delete_statement)
+
+        self.add_vocab_quiz_list(list(self.session.exec(statement)))
+        self.session.commit()
+
+    def get_all_item_bits(self, word_book: WordBook) -> int:
+        # 単語帳の作成済みテストで出題した単語アイテムIDのビット集合(和集合)
+        statement = (select(VocabQuizItemSet.base_id, VocabQuizItemSet.item_bits)
+                     .where(VocabQuizItemSet.word_book_id == word_book.id))
+
+        all_item_bits = 0
+        for base_id, item_bits in self.session.exec(statement):
+            all_item_bits |= from_item_bitset(base_id, item_bits)
+        return all_item_bits
+
+    def get_recent_vocab_quiz_id_list(self, word_book: WordBook, quiz_count: int) -> list:
+        # 直近に作成したquiz_count件のテストのID
+        if quiz_count <= 0:
+            return []
+
+        statement = (select(VocabQuizItemSet.vocab_quiz_id)
+                     .where(VocabQuizItemSet.word_book_id == word_book.id)
+                     .order_by(VocabQuizItemSet.vocab_quiz_id.desc())
+                     .limit(quiz_count))
+        return list(self.session.exec(statement))
+
+    def get_item_bits(self, vocab_quiz_id_list: list) -> int:
+        # 指定したテストで出題した単語アイテムIDのビット集合(和集合)
+        if len(vocab_quiz_id_list) == 0:
+            return 0
+
+        statement = (select(VocabQuizItemSet.base_id, VocabQuizItemSet.item_bits)
+                     .where(VocabQuizItemSet.vocab_quiz_id.in_(vocab_quiz_id_list)))
+
+        item_bits = 0
+        for base_id, quiz_item_bits in self.session.exec(statement):
+            item_bits |= from_item_bitset(base_id, quiz_item_bits)
+        return item_bits
+
+    def get_recent_item_bits(self, word_book: WordBook, quiz_count: int) -> int:
+        # 直近に作成したquiz_count件のテストで出題した単語アイテムIDのビット集合(和集合)
+        return self.get_item_bits(self.get_recent_vocab_quiz_id_list(word_book, quiz_count))
@@ -1,20 +1,49 @@
-import tempfile
 import uuid
 import random
+import itertools
 import zipfile
 from pathlib import Path
+from typing import Callable
 from datetime import datetime
-from sqlmodel import Session, select
+from sqlalchemy.orm import defer
+from sqlmodel import Session, select, or_, and_
 
 from model.models import VocabQuiz, WordBook, WordItem, WordMeaning, VocabQuizInputParam, WordItemInfo
 from service.pdf_service import PdfService
 from service.word_book_service import WordBookService
+from service.quiz_area import merge_area_list
+from service.weighted_sampler import AliasTable
+from service.word_item_stats_service import WordItemStatsService
+from service.quiz_item_set_service import QuizItemSetService
+from service.quiz_data import exclude_item_bitset, to_compact_quiz_data, get_candidate_hash
+from service.quiz_data_service import QuizDataService
+from service.domain_event import get_domain_event_bus, VOCAB_QUIZ_CREATED, VOCAB_QUIZ_DELETED
+from service.quiz_export import iter_rendered_quiz_pdf_entries, render_combined_quiz_pdf_entries, \
+    to_quiz_export_dict
+
+# zipファイルの圧縮方式の既定値(圧縮方式, 圧縮レベル)
+DEFAULT_ZIP_COMPRESSION = (zipfile.ZIP_DEFLATED, 6)
+
+# 作成済みテスト一覧の1回あたりの取得件数の既定値
+DEFAULT_HISTORY_PAGE_SIZE = 100
+
+# seq_noによる抽選の試行回数の上限(欠番・無効な単語が多く揃わない場合は候補全体から抽選する)
+SEQ_NO_SAMPLE_MAX_ROUNDS = 4
+
+# ファイルの種類毎の圧縮方式
+# Note: PDFは内部のストリームが圧縮済みのため、高い圧縮レベルでもほぼ縮まない(最速のレベルで十分)
+ZIP_COMPRESSION_DICT = {
+    ".pdf": (zipfile.ZIP_DEFLATED, 1),
+}
 
 
 class QuizService:
     def __init__(self, session: Session):
         self.session = session
         self.word_book_service = WordBookService(session)
+        self.word_item_stats_service = WordItemStatsService(session)
+        self.quiz_item_set_service = QuizItemSetService(session)
+        self.quiz_data_service = QuizDataService(session)
         self.pdf_service = PdfService(session)
 
     #
@@ -22,66 +51,388 @@ class QuizService:
     #
 
     def generate_new_quiz_data(self, word_book: WordBook, input_param: VocabQuizInputParam, dry_run=False) -> VocabQuiz:
-        # wordinfoのlist取得
-        word_item_info_list = self.word_book_service.get_word_item_info_list(word_book, input_param.area)
+        # 乱数シードの決定(未指定時は新規に採番し、テストデータに保存して再現できるようにする)
+        seed = input_param.seed if input_param.seed is not None else self._get_new_seed()
 
-        # listからランダムで必要な要素を取得したのちにソートする
-        sample_list = random.sample(word_item_info_list, input_param.count)
-        sample_list = sorted(sample_list, key=lambda x: x.seq_no)
+        # 抽選された要素のみを取得する(seq_no順にソート済み)
+        [(sample_id_list, sample_info)] = self._sample_quiz_item_id_lists(word_book, input_param, [seed])
+        sample_list = self.word_book_service.get_word_item_info_list_by_ids(sample_id_list)
 
-        # json/serialize処理
-        item_list = [x.__dict__ for x in sample_list]
+        # テストデータの作成
+        vocab_quiz = self._create_vocab_quiz(word_book, input_param, input_param.title, sample_list, seed,
+                                             sample_info)
 
-        # 最終的なテストの内容を整理
-        quiz_data = {
-            "count": input_param.count,
-            "area": input_param.area,
-            "item_list": item_list
+        # dry_runフラグによる処理分岐(確認画面用の場合は登録しない)
+        if not dry_run:
+            # コミット処理の実行
+            self.save_vocab_quiz_list([vocab_quiz])
+
+        return vocab_quiz
+
+    def generate_quiz_data_batch(self, word_book: WordBook, input_param: VocabQuizInputParam,
+                                 variant_count: int) -> list:
+        # 全バリエーション分の抽選をまとめて行う(候補IDのみを対象とする)
+        # Note: 各バリエーションのシードは 基準シード + 連番 とし、1件ずつ再生成できるようにする
+        base_seed = input_param.seed if input_param.seed is not None else self._get_new_seed()
+        seed_list = [base_seed + i for i in range(variant_count)]
+        sample_result_list = self._sample_quiz_item_id_lists(word_book, input_param, seed_list)
+        sample_id_lists = [x[0] for x in sample_result_list]
+        sample_info_list = [x[1] for x in sample_result_list]
+
+        # 抽選された単語アイテムの情報を1回のクエリでまとめて取得
+        sample_id_set = set(itertools.chain.from_iterable(sample_id_lists))
+        word_item_info_dict = {
+            x.word_item_id: x for x in self.word_book_service.get_word_item_info_list_by_ids(list(sample_id_set))
         }
 
+        # テストデータの作成
+        vocab_quiz_list = []
+        for index, (sample_id_list, seed, sample_info) in enumerate(
+                zip(sample_id_lists, seed_list, sample_info_list), start=1):
+            sample_list = sorted((word_item_info_dict[x] for x in sample_id_list), key=lambda x: x.seq_no)
+            title = "{0} #{1:0{2}d}".format(input_param.title, index, len(str(variant_count)))
+            vocab_quiz = self._create_vocab_quiz(word_book, input_param, title, sample_list, seed, sample_info)
+            vocab_quiz_list.append(vocab_quiz)
+
+        # 1トランザクションでの一括登録
+        self.save_vocab_quiz_list(vocab_quiz_list)
+
+        return vocab_quiz_list
+
+    def regenerate_quiz_data(self, vocab_quiz: VocabQuiz) -> dict:
+        # 保存済みのシード・除外したテストから同じ出題単語のテストの内部データを再作成する(テストの作成・登録はしない)
+        # Note: 重み付き抽選は出題履歴(テストの保存により変化)に依存するため再現できない
+        # Note: 作成後に出題範囲の単語・除外したテストが変更された場合は、抽選時の候補のハッシュ値の不一致で検出する
+        quiz_data = vocab_quiz.quiz_data or {}
+        if quiz_data.get("seed") is None:
+            raise ValueError("シードが保存されていないテストは再作成できません")
+        if quiz_data.get("weighted"):
+            raise ValueError("重み付き抽選のテストは出題履歴に依存するため再作成できません")
+        if quiz_data.get("candidate_hash") is None:
+            raise ValueError("抽選時の候補の情報が保存されていないテストは再作成できません")
+
+        input_param = VocabQuizInputParam(
+            title=vocab_quiz.title,
+            description=vocab_quiz.description,
+            area=quiz_data.get("area", []),
+            quiz_dt=vocab_quiz.quiz_dt,
+            count=quiz_data["count"],
+            seed=quiz_data["seed"],
+            exclude_recent_count=quiz_data.get("exclude_recent_count", 0),
+            exclude_quiz_id_list=quiz_data.get("exclude_quiz_ids", []),
+        )
+        [(sample_id_list, sample_info)] = self._sample_quiz_item_id_lists(vocab_quiz.word_book, input_param,
+                                                                          [input_param.seed])
+        if sample_info["candidate_hash"] != quiz_data["candidate_hash"]:
+            raise ValueError("作成時から出題範囲の単語または除外したテストが変更されているため再作成できません")
+
+        sample_list = self.word_book_service.get_word_item_info_list_by_ids(sample_id_list)
+        return self._get_quiz_data(input_param, [x.__dict__ for x in sample_list], input_param.seed, sample_info)
+
+    def get_vocab_quiz_history_page(self, last_key: tuple | None = None,
+                                    page_size: int = DEFAULT_HISTORY_PAGE_SIZE) -> list:
+        # 作成済みテストを新しい順に1ページ分取得する((テスト, 単語帳名)のlist)
+        # Note: 前ページ末尾の(作成日時, ID)より後の行を取得する(OFFSETを使用しないため件数によらず一定時間)
+        # Note: 一覧に表示しない内部データは読み込まず、単語帳名は同じクエリで取得する
+        statement = (select(VocabQuiz, WordBook.title)
+                     .join(WordBook, WordBook.id == VocabQuiz.word_book_id)
+                     .options(defer(VocabQuiz.quiz_data))
+                     .order_by(VocabQuiz.created_at.desc(), VocabQuiz.id.desc())
+                     .limit(page_size))
+        if last_key is not None:
+            last_created_at, last_id = last_key
+            statement = statement.where(or_(
+                VocabQuiz.created_at < last_created_at,
+                and_(VocabQuiz.created_at == last_created_at, VocabQuiz.id < last_id)
+            ))
+        return list(self.session.exec(statement))
+
+    def save_vocab_quiz_list(self, vocab_quiz_list: list):
+        # テストの登録と出題履歴の集計を1トランザクションで行う
+        self.session.add_all(vocab_quiz_list)
+        self.word_item_stats_service.add_vocab_quiz_list(vocab_quiz_list)
+        self.quiz_item_set_service.add_vocab_quiz_list(vocab_quiz_list)
+        self.session.flush()
+
+        # 通知用のIDはコミット前に取得する(コミット後の参照による再読込を避ける)
+        word_book_id_set = {x.word_book_id for x in vocab_quiz_list}
+        vocab_quiz_id_list = [x.id for x in vocab_quiz_list]
+        self.session.commit()
+
+        domain_event_bus = get_domain_event_bus(self.session)
+        for word_book_id in word_book_id_set:
+            domain_event_bus.publish(VOCAB_QUIZ_CREATED, word_book_id=word_book_id, vocab_quiz_id_list=[
+                x for x, y in zip(vocab_quiz_id_list, vocab_quiz_list) if y.word_book_id == word_book_id
+            ])
+
+    def delete_vocab_quiz(self, vocab_quiz: VocabQuiz):
+        # テストの削除と出題履歴の集計を1トランザクションで行う
+        word_book_id, vocab_quiz_id = vocab_quiz.word_book_id, vocab_quiz.id
+        self.word_item_stats_service.remove_vocab_quiz(vocab_quiz)
+        self.quiz_item_set_service.remove_vocab_quiz(vocab_quiz)
+        self.session.delete(vocab_quiz)
+        self.session.commit()
+
+        get_domain_event_bus(self.session).publish(VOCAB_QUIZ_DELETED,
+                                                   word_book_id=word_book_id, vocab_quiz_id=vocab_quiz_id)
+
+    def generate_quiz_zip_file(self, save_path: Path, vocab_quiz: VocabQuiz,
+                               compression: int | None = None, compresslevel: int | None = None,
+                               mode_list: list | None = None, variant_count: int = 1) -> Path:
+        # 日時の文字列の取得
+        date_str = datetime.now().strftime('%Y%m%d%H%M%S')
+
+        # PDFファイルの作成(一時ファイルを作成せずメモリ上で作成、作成済みの場合はキャッシュから取得)
+        # Note: 出題形式(mode_list)・バリエーション数の分だけ作成する(レイアウト計算は共通)
+        resolved_vocab_quiz = self.quiz_data_service.get_resolved_vocab_quiz(vocab_quiz)
+        self._check_resolved_vocab_quiz(resolved_vocab_quiz)
+        entry_list = self.pdf_service.get_pdf_entry_list(resolved_vocab_quiz, mode_list, variant_count)
+
+        # zipファイル名およびパスの設定
+        zip_file_name = date_str + ".zip"
+        zip_file_path = save_path / zip_file_name
+
+        # zipファイルの作成
+        with zipfile.ZipFile(zip_file_path, "w") as zf:
+            for arcname, data in entry_list:
+                self._write_zip_entry(zf, arcname, data, compression, compresslevel)
+
+        return zip_file_path
+
+    def get_quiz_export_dict_list(self, vocab_quiz_list: list) -> list:
+        # ワーカープロセスへ渡すため、単語・意味を解決済みのdictのlistに変換する
+        resolved_vocab_quiz_list = self.quiz_data_service.get_resolved_vocab_quiz_list(vocab_quiz_list)
+        for resolved_vocab_quiz in resolved_vocab_quiz_list:
+            self._check_resolved_vocab_quiz(resolved_vocab_quiz)
+        return [to_quiz_export_dict(x) for x in resolved_vocab_quiz_list]
+
+    def generate_quiz_zip_file_bulk(self, save_path: Path, quiz_export_dict_list: list, workers: int | None = None,
+                                    progress_callback: Callable[[int, int], None] | None = None,
+                                    compression: int | None = None, compresslevel: int | None = None,
+                                    combined: bool = False, mode_list: list | None = None,
+                                    variant_count: int = 1) -> Path:
+        # 複数テストのPDFを1つのzipファイルにまとめて保存する
+        # Note: quiz_export_dict_listはget_quiz_export_dict_listで変換済みのもの(ワーカーへ渡すため)
+        date_str = datetime.now().strftime('%Y%m%d%H%M%S')
+        zip_file_path = save_path / f"{date_str}_bulk.zip"
+        total_count = len(quiz_export_dict_list)
+        folder_name_width = len(str(total_count))
+
+        # 全テストを解答・問題毎に1つのPDFにまとめる場合(固定部分のフォームを全テストで共有)
+        if combined:
+            entry_list = render_combined_quiz_pdf_entries(quiz_export_dict_list, workers, mode_list, variant_count)
+            with zipfile.ZipFile(zip_file_path, "w") as zf:
+                for arcname, data in entry_list:
+                    self._write_zip_entry(zf, arcname, data, compression, compresslevel)
+
+            if progress_callback is not None:
+                progress_callback(total_count, total_count)
+            return zip_file_path
+
+        # 未作成(キャッシュなし)のPDFはプロセスプールで並列作成し、作成済みのものから順にzipファイルへ書込む
+        with zipfile.ZipFile(zip_file_path, "w") as zf:
+            rendered_iter = iter_rendered_quiz_pdf_entries(quiz_export_dict_list, workers, self.pdf_service,
+                                                           mode_list, variant_count)
+            for index, (quiz_export_dict, entry_list) in enumerate(zip(quiz_export_dict_list, rendered_iter), start=1):
+                # 同名のテストがあっても衝突しないよう、テスト毎に連番付きのフォルダに格納
+                folder_name = "{0:0{1}d}_{2}".format(index, folder_name_width, quiz_export_dict["title"])
+                for arcname, data in entry_list:
+                    self._write_zip_entry(zf, f"{folder_name}/{arcname}", data, compression, compresslevel)
+
+                if progress_callback is not None:
+                    progress_callback(index, total_count)
+
+        return zip_file_path
+
+    #
+    # privateメソッド
+    #
+
+    def _write_zip_entry(self, zf: zipfile.ZipFile, arcname: str, data: bytes,
+                         compression: int | None = None, compresslevel: int | None = None):
+        # 圧縮方式・圧縮レベルは引数の指定がない場合、ファイルの種類毎の既定値
+        # Note: 圧縮レベルのみ指定された場合は、ファイルの種類毎の既定の圧縮方式にその圧縮レベルを適用する
+        entry_compression, entry_compresslevel = ZIP_COMPRESSION_DICT.get(
+            Path(arcname).suffix.lower(), DEFAULT_ZIP_COMPRESSION)
+        if compression is not None:
+            entry_compression, entry_compresslevel = compression, None
+        if compresslevel is not None:
+            entry_compresslevel = compresslevel
+        zf.writestr(arcname, data, compress_type=entry_compression, compresslevel=entry_compresslevel)
+
+    def _check_resolved_vocab_quiz(self, resolved_vocab_quiz: VocabQuiz):
+        # 出題単語が単語帳から削除され、作成時の内容も保持していないテストは出力しない(一部の単語が欠けるため)
+        missing_item_id_list = resolved_vocab_quiz.quiz_data.get("missing_item_ids", [])
+        if len(missing_item_id_list) > 0:
+            raise ValueError("テスト「{0}」の出題単語のうち{1}件が単語帳から削除されているため出力できません".format(
+                resolved_vocab_quiz.title, len(missing_item_id_list)))
+
+    def _get_exclude_quiz_id_list(self, word_book: WordBook, input_param: VocabQuizInputParam) -> list:
+        # 出題済みの単語アイテムを除外するテストのID(再作成時は作成時に除外したテスト)
+        if input_param.exclude_quiz_id_list is not None:
+            return list(input_param.exclude_quiz_id_list)
+        return self.quiz_item_set_service.get_recent_vocab_quiz_id_list(word_book, input_param.exclude_recent_count)
+
+    def _get_candidate_id_list(self, word_book: WordBook, input_param: VocabQuizInputParam,
+                               exclude_quiz_id_list: list) -> list:
+        candidate_id_list = self.word_book_service.get_candidate_word_item_id_list(word_book, input_param.area)
+
+        # 直近のテストで出題済みの単語アイテムを除外する(テスト毎のビット集合の和集合で判定)
+        if len(exclude_quiz_id_list) > 0:
+            exclude_item_bits = self.quiz_item_set_service.get_item_bits(exclude_quiz_id_list)
+            candidate_id_list = exclude_item_bitset(candidate_id_list, exclude_item_bits)
+
+        if len(candidate_id_list) < input_param.count:
+            raise ValueError("出題範囲内の単語数({0})が出題単語数({1})より少ないです".format(
+                len(candidate_id_list), input_param.count))
+        return candidate_id_list
+
+    def _get_new_seed(self) -> int:
+        return random.SystemRandom().getrandbits(31)
+
+    def _sample_quiz_item_id_lists(self, word_book: WordBook, input_param: VocabQuizInputParam,
+                                   seed_list: list) -> list:
+        # シード毎に、抽選した単語アイテムIDのlistと抽選時の情報(除外したテストのID・候補のハッシュ値)の組を返す
+        # Note: 抽選時の情報はテストデータに保存し、同じ候補から再作成できるか(regenerate_quiz_data)の判定に使用する
+        # Note: 候補全体から抽選する場合、候補ID・重み付き抽選用のテーブルは1回だけ作成し、全シードで共有する
+        exclude_quiz_id_list = self._get_exclude_quiz_id_list(word_book, input_param)
+        sample_result_list = self._sample_word_item_id_lists_by_seq_no(word_book, input_param, seed_list,
+                                                                       exclude_quiz_id_list)
+        if any(x is None for x in sample_result_list):
+            candidate_id_list = self._get_candidate_id_list(word_book, input_param, exclude_quiz_id_list)
+            candidate_hash = get_candidate_hash(candidate_id_list)
+            alias_table = self._get_alias_table(candidate_id_list) if input_param.weighted else None
+            sample_result_list = [
+                x if x is not None else (
+                    self._sample_word_item_id_list(candidate_id_list, input_param.count, y, alias_table),
+                    candidate_hash)
+                for x, y in zip(sample_result_list, seed_list)
+            ]
+
+        return [(x[0], {"exclude_quiz_ids": exclude_quiz_id_list, "candidate_hash": x[1]})
+                for x in sample_result_list]
+
+    def _sample_word_item_id_lists_by_seq_no(self, word_book: WordBook, input_param: VocabQuizInputParam,
+                                             seed_list: list, exclude_quiz_id_list: list) -> list:
+        # シード毎に出題範囲内のseq_noを抽選し、該当する単語アイテムのIDのみを取得する(候補全体を読み込まない)
+        # シード毎に、抽選した単語アイテムIDのlistと抽選に使用した候補(seq_noの範囲・抽選したseq_noの単語アイテムID)の
+        # ハッシュ値の組を返す(揃わなかったシードはNone)
+        # Note: 取得件数・クエリはインデックスの参照のみで出題単語数に比例し、単語帳の単語数によらない
+        # Note: seq_noの範囲は1回だけ取得し、各回の抽選は全シード分をまとめて1回のクエリで参照する(シード数によらない)
+        # Note: 欠番・無効な単語のseq_noは抽選し直し、数回で揃わない場合はNone(候補全体からの抽選)とする
+        # Note: 重み付き抽選・直近のテストの除外は候補全体が必要なため対象外
+        if input_param.weighted or len(exclude_quiz_id_list) > 0:
+            return [None] * len(seed_list)
+
+        seq_no_bounds = self.word_book_service.get_word_seq_no_bounds(word_book)
+        if seq_no_bounds is None:
+            return [None] * len(seed_list)
+        range_list = merge_area_list(input_param.area) or [seq_no_bounds]
+        range_list = [(max(x[0], seq_no_bounds[0]), min(x[1], seq_no_bounds[1])) for x in range_list]
+        range_list = [x for x in range_list if x[0] <= x[1]]
+        total_span = sum(x[1] - x[0] + 1 for x in range_list)
+
+        # シード毎の抽選状態(乱数生成器は独立させ、1件ずつ作成した場合と同じ結果とする)
+        rng_list = [random.Random(x) for x in seed_list]
+        drawn_position_sets = [set() for _ in seed_list]
+        drawn_item_lists = [[] for _ in seed_list]
+        sample_id_lists = [[] for _ in seed_list]
+        sample_result_list = [None] * len(seed_list)
+        active_index_list = list(range(len(seed_list)))
+        word_item_id_dict = {}
+        fetched_seq_no_set = set()
+        for _ in range(SEQ_NO_SAMPLE_MAX_ROUNDS):
+            seq_no_lists = {}
+            for index in active_index_list:
+                # 欠番・無効な単語を見込んで不足数の2倍を抽選する
+                draw_count = min((input_param.count - len(sample_id_lists[index])) * 2,
+                                 total_span - len(drawn_position_sets[index]))
+                if draw_count <= 0:
+                    continue
+
+                position_list = []
+                while len(position_list) < draw_count:
+                    position = rng_list[index].randrange(total_span)
+                    if position not in drawn_position_sets[index]:
+                        drawn_position_sets[index].add(position)
+                        position_list.append(position)
+                seq_no_lists[index] = [self._get_seq_no_at_position(range_list, x) for x in position_list]
+            if len(seq_no_lists) == 0:
+                break
+
+            # 全シードで未取得のseq_noをまとめて参照する
+            fetch_seq_no_set = set(itertools.chain.from_iterable(seq_no_lists.values())) - fetched_seq_no_set
+            word_item_id_dict.update(
+                self.word_book_service.get_candidate_word_item_id_dict(word_book, sorted(fetch_seq_no_set)))
+            fetched_seq_no_set.update(fetch_seq_no_set)
+
+            # 抽選順に採用する(同じシード・単語帳からは同じ結果)
+            for index, seq_no_list in seq_no_lists.items():
+                drawn_item_lists[index].extend([x, word_item_id_dict.get(x)] for x in seq_no_list)
+                for seq_no in seq_no_list:
+                    if seq_no in word_item_id_dict and len(sample_id_lists[index]) < input_param.count:
+                        sample_id_lists[index].append(word_item_id_dict[seq_no])
+                if len(sample_id_lists[index]) == input_param.count:
+                    sample_result_list[index] = (
+                        sample_id_lists[index],
+                        get_candidate_hash([list(seq_no_bounds)] + drawn_item_lists[index]))
+            active_index_list = [x for x in seq_no_lists if sample_result_list[x] is None]
+
+        return sample_result_list
+
+    def _get_seq_no_at_position(self, range_list: list, position: int) -> int:
+        # 範囲のlistを連結した中での位置からseq_noを求める
+        for lower, upper in range_list:
+            if position <= upper - lower:
+                return lower + position
+            position -= upper - lower + 1
+        raise IndexError(position)
+
+    def _sample_word_item_id_list(self, candidate_id_list: list, count: int, seed: int,
+                                  alias_table: AliasTable | None = None) -> list:
+        # 同じ候補・シードからは常に同じ結果となるよう、専用の乱数生成器で抽選する
+        rng = random.Random(seed)
+        if alias_table is not None:
+            return [candidate_id_list[x] for x in alias_table.sample_unique(count, rng)]
+        return rng.sample(candidate_id_list, count)
+
+    def _get_alias_table(self, candidate_id_list: list) -> AliasTable:
+        # 出題回数・最終出題日時から重みを求め、O(1)で抽選できるテーブルを作成
+        weight_list = self.word_item_stats_service.get_weight_list(candidate_id_list)
+        return AliasTable(weight_list)
+
+    def _create_vocab_quiz(self, word_book: WordBook, input_param: VocabQuizInputParam, title: str,
+                           sample_list: list, seed: int, sample_info: dict) -> VocabQuiz:
+        # json/serialize処理
+        item_list = [x.__dict__ for x in sample_list]
+        quiz_data = self._get_quiz_data(input_param, item_list, seed, sample_info)
+
         # テストデータの作成
         vocab_quiz = VocabQuiz(
             word_book=word_book,
             uuid=str(uuid.uuid4()),
-            title=input_param.title,
+            title=title,
             description=input_param.description,
             quiz_dt=input_param.quiz_dt,
             quiz_data=quiz_data,
         )
 
-        # dry_runフラグによる処理分岐
-        if dry_run:
-            # 結果のみ表示
-            print(vocab_quiz)
-        else:
-            # コミット処理の実行
-            self.session.add(vocab_quiz)
-            self.session.commit()
+        # 確認画面・PDF作成時に単語・意味を再取得しないよう、作成時の内容をキャッシュに登録
+        self.quiz_data_service.put_item_list(vocab_quiz, item_list)
 
         return vocab_quiz
 
-    def generate_quiz_zip_file(self, save_path: Path, vocab_quiz: VocabQuiz):
-        # 日時の文字列の取得
-        date_str = datetime.now().strftime('%Y%m%d%H%M%S')
-
-        # 一時フォルダの作成
-        with tempfile.TemporaryDirectory("w+") as td:
-            # 各種ファイルパスの設定
-            tmp_save_dir_path = Path(td)
-            answer_file_path = tmp_save_dir_path / f"{vocab_quiz.title}_answer.pdf"
-            quiz_file_path = tmp_save_dir_path / f"{vocab_quiz.title}_quiz.pdf"
-
-            # PDFファイルの作成および保存
-            self.pdf_service.save_answer_pdf_file(answer_file_path, vocab_quiz)
-            self.pdf_service.save_quiz_pdf_file(quiz_file_path, vocab_quiz)
-
-            # zipファイル名およびパスの設定
-            zip_file_name = date_str + ".zip"
-            zip_file_path = save_path / zip_file_name
-
-            # zipファイルの作成
-            with zipfile.ZipFile(zip_file_path, "w",
-                             compression=zipfile.ZIP_DEFLATED,
-                             compresslevel=9) as zf:
-                zf.write(answer_file_path, arcname=answer_file_path.name)
-                zf.write(quiz_file_path, arcname=quiz_file_path.name)
+    def _get_quiz_data(self, input_param: VocabQuizInputParam, item_list: list, seed: int, sample_info: dict) -> dict:
+        # 最終的なテストの内容を整理
+        # Note: 単語・意味は出題単語アイテムIDと共に作成時の内容を圧縮して保存する(表示・出力は常にこの内容を使用)
+        quiz_data = {
+            "count": input_param.count,
+            "area": merge_area_list(input_param.area),
+            "weighted": input_param.weighted,
+            "exclude_recent_count": input_param.exclude_recent_count,
+            "seed": seed,
+            "exclude_quiz_ids": sample_info.get("exclude_quiz_ids", []),
+            "candidate_hash": sample_info.get("candidate_hash"),
+            "item_list": item_list
+        }
+        return to_compact_quiz_data(quiz_data)
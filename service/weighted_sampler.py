@@ -0,0 +1,95 @@
+import random
+from datetime import datetime
+
+# 出題回数による重みの減衰率(出題回数1回毎に重みを 1 / (1 + 減衰率 * 出題回数) とする)
+QUIZ_COUNT_DECAY_RATE = 1.0
+
+# 直近出題による重みの減衰の最大割合(0.0-1.0未満、出題直後の重みは (1 - この値) 倍)
+RECENCY_PENALTY_RATE = 0.9
+
+# 直近出題による減衰が半分になるまでの日数
+RECENCY_HALF_LIFE_DAYS = 14.0
+
+
+def get_word_item_weight(quiz_count: int, last_quiz_dt: datetime | None, now: datetime) -> float:
+    # 出題回数が多いほど・直近に出題されたほど重みを小さくする(常に正の値)
+    weight = 1.0 / (1.0 + QUIZ_COUNT_DECAY_RATE * quiz_count)
+
+    if last_quiz_dt is not None:
+        elapsed_days = max((now - last_quiz_dt).total_seconds() / 86400, 0.0)
+        weight *= 1.0 - RECENCY_PENALTY_RATE * 0.5 ** (elapsed_days / RECENCY_HALF_LIFE_DAYS)
+
+    return weight
+
+
+class AliasTable:
+    # Walker/Voseのエイリアス法による重み付き抽選(構築O(n)、1回の抽選O(1))
+    def __init__(self, weight_list: list):
+        self.size = len(weight_list)
+        self.weight_list = list(weight_list)
+
+        total_weight = sum(self.weight_list)
+        if self.size == 0 or total_weight <= 0:
+            raise ValueError("重み付き抽選の対象がありません")
+
+        # 平均が1となるように重みを正規化
+        scaled_list = [x * self.size / total_weight for x in self.weight_list]
+        self.prob_list = [1.0] * self.size
+        self.alias_list = list(range(self.size))
+
+        small_list = [i for i, x in enumerate(scaled_list) if x < 1.0]
+        large_list = [i for i, x in enumerate(scaled_list) if x >= 1.0]
+
+        # 1未満の要素の不足分を1以上の要素で埋める
+        while len(small_list) > 0 and len(large_list) > 0:
+            small = small_list.pop()
+            large = large_list.pop()
+
+            self.prob_list[small] = scaled_list[small]
+            self.alias_list[small] = large
+
+            scaled_list[large] = scaled_list[large] + scaled_list[small] - 1.0
+            if scaled_list[large] < 1.0:
+                small_list.append(large)
+            else:
+                large_list.append(large)
+
+        # 誤差で残った要素は確率1とする
+        for i in small_list + large_list:
+            self.prob_list[i] = 1.0
+
+    #
+    # 各種メソッド
+    #
+
+    def draw(self, rng: random.Random = random) -> int:
+        index = int(rng.random() * self.size)
+        if rng.random() < self.prob_list[index]:
+            return index
+        return self.alias_list[index]
+
+    def sample_unique(self, count: int, rng: random.Random = random) -> list:
+        # 重複なしでcount件のインデックスを抽選する
+        if count > self.size:
+            raise ValueError("抽選数({0})が対象数({1})より多いです".format(count, self.size))
+
+        selected_list = []
+        selected_set = set()
+        reject_count = 0
+
+        while len(selected_list) < count:
+            index = self.draw(rng)
+            if index not in selected_set:
+                selected_list.append(index)
+                selected_set.add(index)
+                continue
+
+            # 重複が多い場合(抽選数が対象数に近い場合など)は残りの要素で作り直して抽選する
+            reject_count += 1
+            if reject_count > count:
+                remain_list = [i for i in range(self.size) if i not in selected_set]
+                remain_table = AliasTable([self.weight_list[i] for i in remain_list])
+                selected_list.extend(remain_list[i] for i in remain_table.sample_unique(count - len(selected_list), rng))
+                break
+
+        return selected_list
@@ -1,8 +1,26 @@
-import csv
+import time
+import itertools
+import threading
 from pathlib import Path
-from sqlmodel import Session, select, func
+from datetime import datetime
+from typing import Callable
+from sqlmodel import Session, select, func, insert, update, delete, or_, tuple_
 
-from model.models import WordType, WordBook, WordItem, WordMeaning, WordSentence, WordItemInfo
+from model.models import WordType, WordBook, WordItem, WordItemHash, WordItemStat, WordItemSummary, WordMeaning, \
+    WordSentence, WordItemInfo, WordImportResult, WordImportProgress, ImportJob, VocabQuiz, \
+    VocabQuizItemSet
+from service.word_csv_parser import iter_parsed_csv_chunks, count_csv_rows, get_jp_word_type_id, get_file_hash, \
+    MAX_ERROR_LIST_SIZE
+from service.word_item_cache import word_item_pool_cache, quiz_item_list_cache
+from service.quiz_item_set_service import QuizItemSetService
+from service.quiz_area import merge_area_list
+from service.domain_event import get_domain_event_bus, WORD_BOOK_DELETED, WORD_ITEMS_IMPORTED
+
+# CSV取込時にまとめて登録・コミットする行数の既定値
+DEFAULT_IMPORT_BATCH_SIZE = 1000
+
+# seq_noから出題候補を参照する際の1クエリあたりのseq_no数(SQLiteのパラメータ数の上限未満とする)
+SEQ_NO_LOOKUP_BATCH_SIZE = 10000
 
 
 class WordBookService:
@@ -21,25 +39,7 @@ class WordBookService:
     #
 
     def get_jp_word_type_id(self, word_type: str):
-        if word_type == "":
-            return None
-
-        conv_dict = {
-            "名詞": 1,
-            "代名詞": 2,
-            "動詞": 3,
-            "形容詞": 4,
-            "副詞": 5,
-            "助動詞": 6,
-            "前置詞": 7,
-            "冠詞": 8,
-            "間投詞": 9,
-            "接続詞": 10,
-            "句動詞": 20,
-            "熟語": 30,
-            "その他": 99,
-        }
-        return conv_dict[word_type]
+        return get_jp_word_type_id(word_type)
 
     def get_word_book_list(self):
         statement = select(WordBook)
@@ -47,7 +47,9 @@ class WordBookService:
         return word_book_list
 
     def get_max_word_seq_no(self, word_book_id):
-        statement = select(func.max(WordItem.seq_no)).where(WordItem.word_book_id == word_book_id)
+        statement = (select(func.max(WordItem.seq_no))
+                     .where(WordItem.word_book_id == word_book_id)
+                     .where(WordItem.is_active == True))
         max_word_seq_no = self.session.exec(statement).first()
         return max_word_seq_no
 
@@ -65,129 +67,637 @@ class WordBookService:
         self.session.add(word_book)
 
     def delete_wordbook(self, word_book: WordBook):
+        word_book_id = word_book.id
+
+        # 単語帳に紐づくデータの一括削除
+        word_item_ids = select(WordItem.id).where(WordItem.word_book_id == word_book.id)
+        self.session.exec(delete(WordItemSummary).where(WordItemSummary.word_book_id == word_book.id))
+        self.session.exec(delete(WordItemStat).where(WordItemStat.word_book_id == word_book.id))
+        self.session.exec(delete(VocabQuizItemSet).where(VocabQuizItemSet.word_book_id == word_book.id))
+        self.session.exec(delete(WordItemHash).where(WordItemHash.word_item_id.in_(word_item_ids)))
+        self.session.exec(delete(WordMeaning).where(WordMeaning.word_item_id.in_(word_item_ids)))
+        self.session.exec(delete(WordSentence).where(WordSentence.word_item_id.in_(word_item_ids)))
+        self.session.exec(delete(WordItem).where(WordItem.word_book_id == word_book.id))
+        self.session.exec(delete(ImportJob).where(ImportJob.word_book_id == word_book.id))
+        self.session.exec(delete(VocabQuiz).where(VocabQuiz.word_book_id == word_book.id))
+
         self.session.delete(word_book)
         self.session.commit()
+        word_item_pool_cache.invalidate(word_book_id)
+        quiz_item_list_cache.invalidate(word_book_id)
+        get_domain_event_bus(self.session).publish(WORD_BOOK_DELETED, word_book_id=word_book_id)
 
     def get_word_item_info_list(self, word_book: WordBook, area_list: list=[]):
-        all_word_items_list = []
+        # 重複・隣接する範囲を結合し、1回のクエリで取得する(同じ行を重複して取得しない)
+        statement = (select(WordItemSummary.word_item_id, WordItemSummary.seq_no,
+                            WordItemSummary.word, WordItemSummary.meaning)
+                     .where(*self._get_candidate_conditions(word_book, area_list))
+                     .order_by(WordItemSummary.seq_no))
+
+        word_item_info_list = []
+        for word_item_id, seq_no, word, meaning in self.session.exec(statement):
+            word_item_info = WordItemInfo(
+                word_item_id=word_item_id,
+                seq_no=seq_no,
+                word=word,
+                meaning=meaning
+            )
+            word_item_info_list.append(word_item_info)
+
+        return word_item_info_list
+
+    def get_word_item_count(self, word_book: WordBook, area_list: list=[]) -> int:
+        statement = (select(func.count())
+                     .select_from(WordItemSummary)
+                     .where(*self._get_candidate_conditions(word_book, area_list)))
+        return self.session.exec(statement).one()
+
+    def get_word_item_page_key_list(self, word_book: WordBook, page_size: int, area_list: list=[]) -> list:
+        # 一覧表示のページ毎の先頭の単語アイテムのキー((seq_no, 単語アイテムID)のtuple)をseq_no順に取得する
+        # Note: 行番号を付与したサブクエリから各ページの先頭の行のみを取得する(インデックスの1回の走査)
+        row_number = func.row_number().over(
+            order_by=(WordItemSummary.seq_no, WordItemSummary.word_item_id)).label("row_number")
+        subquery = (select(WordItemSummary.seq_no, WordItemSummary.word_item_id, row_number)
+                    .where(*self._get_candidate_conditions(word_book, area_list))
+                    .subquery())
+        statement = (select(subquery.c.seq_no, subquery.c.word_item_id)
+                     .where((subquery.c.row_number - 1) % page_size == 0)
+                     .order_by(subquery.c.row_number))
+        return [tuple(x) for x in self.session.exec(statement)]
+
+    def get_word_item_row_list(self, word_book: WordBook, page_key: tuple, limit: int, area_list: list=[]) -> list:
+        # 一覧表示用に、seq_no順で指定したキーの位置からの単語アイテムの([seq_no, 単語, 意味]のlist)を取得する
+        # Note: 開始位置をキー(get_word_item_page_key_list)で指定し、読み飛ばす行数によらずインデックスの範囲のみ参照する
+        statement = (select(WordItemSummary.seq_no, WordItemSummary.word, WordItemSummary.meaning)
+                     .where(*self._get_candidate_conditions(word_book, area_list))
+                     .where(tuple_(WordItemSummary.seq_no, WordItemSummary.word_item_id) >= tuple_(*page_key))
+                     .order_by(WordItemSummary.seq_no, WordItemSummary.word_item_id)
+                     .limit(limit))
+        return [list(x) for x in self.session.exec(statement)]
+
+    def get_word_seq_no_bounds(self, word_book: WordBook) -> tuple | None:
+        # 単語帳のseq_noの最小値・最大値(未登録の場合はNone)
+        # Note: 最小値・最大値を別々のクエリとし、それぞれインデックスの端のみを参照させる
+        base_statement = select(WordItemSummary.seq_no).where(WordItemSummary.word_book_id == word_book.id)
+        min_seq_no = self.session.exec(base_statement.order_by(WordItemSummary.seq_no).limit(1)).first()
+        if min_seq_no is None:
+            return None
+        max_seq_no = self.session.exec(base_statement.order_by(WordItemSummary.seq_no.desc()).limit(1)).first()
+        return min_seq_no, max_seq_no
+
+    def get_candidate_word_item_id_dict(self, word_book: WordBook, seq_no_list: list) -> dict:
+        # 指定したseq_noの出題候補の単語アイテムID(seq_no -> ID、同じseq_noが複数ある場合は最小のID)
+        word_item_id_dict = {}
+        for i in range(0, len(seq_no_list), SEQ_NO_LOOKUP_BATCH_SIZE):
+            statement = (select(WordItemSummary.seq_no, func.min(WordItemSummary.word_item_id))
+                         .where(*self._get_candidate_conditions(word_book, []))
+                         .where(WordItemSummary.seq_no.in_(seq_no_list[i:i + SEQ_NO_LOOKUP_BATCH_SIZE]))
+                         .group_by(WordItemSummary.seq_no))
+            word_item_id_dict.update(self.session.exec(statement).all())
+        return word_item_id_dict
+
+    def get_candidate_word_item_id_list(self, word_book: WordBook, area_list: list) -> list:
+        # 出題候補の単語アイテムIDのみをseq_no順に取得する
+        # Note: キャッシュ済みの場合はDBへの問い合わせを行わない(単語アイテムの更新時に単語帳単位で破棄)
+        word_item_id_list = word_item_pool_cache.get(word_book.id, area_list)
+        if word_item_id_list is not None:
+            return word_item_id_list
+
+        statement = (select(WordItemSummary.word_item_id)
+                     .where(*self._get_candidate_conditions(word_book, area_list))
+                     .order_by(WordItemSummary.seq_no))
+        word_item_id_list = list(self.session.exec(statement))
+        word_item_pool_cache.put(word_book.id, area_list, word_item_id_list)
+        return word_item_id_list
+
+    def get_word_item_cache_stats(self) -> dict:
+        return word_item_pool_cache.get_stats()
+
+    def get_word_item_info_list_by_ids(self, word_item_id_list: list) -> list:
+        statement = (select(WordItemSummary.word_item_id, WordItemSummary.seq_no,
+                            WordItemSummary.word, WordItemSummary.meaning)
+                     .where(WordItemSummary.word_item_id.in_(word_item_id_list))
+                     .order_by(WordItemSummary.seq_no))
+
+        word_item_info_list = []
+        for word_item_id, seq_no, word, meaning in self.session.exec(statement):
+            word_item_info = WordItemInfo(
+                word_item_id=word_item_id,
+                seq_no=seq_no,
+                word=word,
+                meaning=meaning
+            )
+            word_item_info_list.append(word_item_info)
+
+        return word_item_info_list
+
+    def rebuild_word_item_summaries(self, word_book: WordBook | None = None):
+        # 対象の単語アイテム(単語帳指定がない場合は全件)の集計データを削除
+        delete_statement = delete(WordItemSummary)
+        statement = (select(WordItem.id, WordItem.word_book_id, WordItem.is_active, WordItem.seq_no, WordItem.word,
+                            WordMeaning.word_type, WordMeaning.sub_word_type, WordMeaning.meaning)
+                     .outerjoin(WordMeaning, WordMeaning.word_item_id == WordItem.id)
+                     .order_by(WordItem.id, WordMeaning.seq_no, WordMeaning.id))
+        if word_book is not None:
+            delete_statement = delete_statement.where(WordItemSummary.word_book_id == word_book.id)
+            statement = statement.where(WordItem.word_book_id == word_book.id)
+        self.session.exec(delete_statement)
+
+        # 単語アイテム毎に意味文字列を整形して再登録
+        summary_rows = []
+        for key, row_group in itertools.groupby(self.session.exec(statement), key=lambda x: x[0:5]):
+            word_item_id, word_book_id, is_active, seq_no, word = key
+            meaning_str = ", ".join(self._get_meaning_str(x[5], x[6], x[7]) for x in row_group if x[7] is not None)
+            summary_rows.append({
+                "word_item_id": word_item_id,
+                "word_book_id": word_book_id,
+                "is_active": is_active,
+                "seq_no": seq_no,
+                "word": word,
+                "meaning": meaning_str,
+            })
+
+        for i in range(0, len(summary_rows), DEFAULT_IMPORT_BATCH_SIZE):
+            self.session.exec(insert(WordItemSummary), params=summary_rows[i:i + DEFAULT_IMPORT_BATCH_SIZE])
+        self.session.commit()
 
-        if len(area_list) == 0:
-            # 単語帳に紐づくすべての単語アイテム取得
-            statement = select(WordItem).join(WordMeaning).where(WordItem.word_book_id == word_book.id)
-            fetch_word_items = self.session.exec(statement)
-            all_word_items_list.extend(fetch_word_items)
+        # 単語アイテム一覧のキャッシュ破棄
+        if word_book is not None:
+            word_item_pool_cache.invalidate(word_book.id)
+            quiz_item_list_cache.invalidate(word_book.id)
         else:
-            for area in area_list:
-                lower, upper = area[0], area[1]
-                statement = (select(WordItem).join(WordMeaning)
-                             .where(WordItem.word_book_id == word_book.id)
-                             .where(lower <= WordItem.id)
-                             .where(WordItem.id <= upper))
-                fetch_word_items = self.session.exec(statement)
-                all_word_items_list.extend(fetch_word_items)
-
-        # 各単語アイテムの詳細のdictを作成
-        word_item_info_dict = {}
-        for word_item in all_word_items_list:
-            word_item_id = word_item.id
-
-            if word_item_id not in word_item_info_dict:
-                meaning_str_list = []
-
-                for m in word_item.word_meanings:
-                    # 意味の文字列を作成
-                    word_type_str = self.word_type_str_dict[m.word_type]
-                    word_meaning = m.meaning
-
-                    # 複数品詞情報がある場合に対応する
-                    if m.sub_word_type is not None:
-                        sub_word_type_str = self.word_type_str_dict[m.sub_word_type]
-                        tmp_str = "[{0}/{1}]{2}".format(word_type_str, sub_word_type_str, word_meaning)
-                        meaning_str_list.append(tmp_str)
+            word_item_pool_cache.clear()
+            quiz_item_list_cache.clear()
+
+    def import_wordbook_contents(self, word_book: WordBook, csv_file_path: Path,
+                                 batch_size: int = DEFAULT_IMPORT_BATCH_SIZE,
+                                 single_transaction: bool = False,
+                                 incremental: bool = False,
+                                 parse_workers: int | None = None,
+                                 progress_callback: Callable[[WordImportProgress], None] | None = None,
+                                 cancel_event: threading.Event | None = None) -> WordImportResult:
+        return self.import_wordbook_files(word_book, [Path(csv_file_path)], batch_size, single_transaction,
+                                          incremental, parse_workers, progress_callback, cancel_event)
+
+    def import_wordbook_folder(self, word_book: WordBook, folder_path: Path,
+                               batch_size: int = DEFAULT_IMPORT_BATCH_SIZE,
+                               single_transaction: bool = False,
+                               incremental: bool = False,
+                               parse_workers: int | None = None,
+                               progress_callback: Callable[[WordImportProgress], None] | None = None,
+                               cancel_event: threading.Event | None = None) -> WordImportResult:
+        # フォルダ内のCSVファイルをファイル名順に取込む
+        csv_file_path_list = sorted(Path(folder_path).glob("*.csv"))
+        return self.import_wordbook_files(word_book, csv_file_path_list, batch_size, single_transaction,
+                                          incremental, parse_workers, progress_callback, cancel_event)
+
+    def import_wordbook_files(self, word_book: WordBook, csv_file_path_list: list,
+                              batch_size: int = DEFAULT_IMPORT_BATCH_SIZE,
+                              single_transaction: bool = False,
+                              incremental: bool = False,
+                              parse_workers: int | None = None,
+                              progress_callback: Callable[[WordImportProgress], None] | None = None,
+                              cancel_event: threading.Event | None = None) -> WordImportResult:
+        # 取込結果(中止・エラー時を含む)によらず、単語データの更新を通知する
+        word_book_id = word_book.id
+        try:
+            if incremental:
+                return self._upsert_csv_files(word_book, csv_file_path_list, batch_size,
+                                              parse_workers, progress_callback, cancel_event)
+            return self._import_csv_files(word_book, csv_file_path_list, batch_size, single_transaction,
+                                          parse_workers, progress_callback, cancel_event)
+        finally:
+            get_domain_event_bus(self.session).publish(WORD_ITEMS_IMPORTED, word_book_id=word_book_id)
+
+    #
+    # privateメソッド
+    #
+
+    def _get_candidate_conditions(self, word_book: WordBook, area_list: list) -> list:
+        # 出題対象となる単語アイテムの条件(有効・意味登録済み・seq_noの範囲内)
+        condition_list = [
+            WordItemSummary.word_book_id == word_book.id,
+            WordItemSummary.is_active == True,
+            WordItemSummary.meaning != "",
+        ]
+        merged_area_list = merge_area_list(area_list)
+        if len(merged_area_list) > 0:
+            condition_list.append(or_(*[WordItemSummary.seq_no.between(x[0], x[1]) for x in merged_area_list]))
+
+        return condition_list
+
+    def _get_meaning_str(self, word_type: int, sub_word_type: int | None, meaning: str) -> str:
+        # 意味の文字列を作成
+        word_type_str = self.word_type_str_dict[word_type]
+
+        # 複数品詞情報がある場合に対応する
+        if sub_word_type is not None:
+            sub_word_type_str = self.word_type_str_dict[sub_word_type]
+            return "[{0}/{1}]{2}".format(word_type_str, sub_word_type_str, meaning)
+        else:
+            return "[{0}]{1}".format(word_type_str, meaning)
+
+    def _get_summary_row(self, word_book_id: int, word_item_id: int, parsed_row: dict) -> dict:
+        # 1つの連続した文字列として意味情報を連結する
+        meaning_str = ", ".join(self._get_meaning_str(m["word_type"], m["sub_word_type"], m["meaning"])
+                                for m in parsed_row["meanings"])
+        return {
+            "word_item_id": word_item_id,
+            "word_book_id": word_book_id,
+            "is_active": True,
+            "seq_no": parsed_row["item"]["seq_no"],
+            "word": parsed_row["item"]["word"],
+            "meaning": meaning_str,
+        }
+
+    def _import_csv_files(self, word_book: WordBook, csv_file_path_list: list, batch_size: int,
+                          single_transaction: bool, parse_workers: int | None,
+                          progress_callback: Callable[[WordImportProgress], None] | None,
+                          cancel_event: threading.Event | None) -> WordImportResult:
+        start_time = time.perf_counter()
+        result = WordImportResult()
+
+        # 進捗通知用の情報(ETA算出のため総行数を事前に数える)
+        progress = None
+        if progress_callback is not None:
+            total_count = sum(count_csv_rows(x) for x in csv_file_path_list)
+            progress = WordImportProgress(total_count=total_count)
+
+        # 単語アイテムのIDを事前に確保する(行毎のコミット・refreshを避けるため)
+        next_word_item_id = self._get_next_word_item_id()
+
+        # ファイル毎の取込ジョブ(チェックポイント)の取得・作成
+        # Note: 1トランザクションで処理する場合は途中状態が残らないため記録しない
+        import_job_dict = {}
+        start_offset_dict = None
+        if not single_transaction:
+            import_job_dict = self._get_or_create_import_jobs(word_book, csv_file_path_list, next_word_item_id)
+            start_offset_dict = {k: v.byte_offset for k, v in import_job_dict.items()}
+            result.resumed = any(x.byte_offset > 0 for x in import_job_dict.values())
+
+        # チャンク単位で解析・検証済みの行を受け取り、このスレッドのみでDB登録を行う
+        parsed_count = 0
+        pending_count = 0
+        chunk_iter = iter_parsed_csv_chunks(csv_file_path_list, workers=parse_workers,
+                                            start_offset_dict=start_offset_dict)
+        try:
+            for chunk_result in chunk_iter:
+                # キャンセル要求の確認
+                if cancel_event is not None and cancel_event.is_set():
+                    self._rollback_import(word_book, result, import_job_dict)
+                    return result
+
+                parsed_count += chunk_result["parsed_count"]
+                self._append_import_errors(result, chunk_result["error_list"])
+
+                # executemany用のバッチに分割して登録
+                rows = chunk_result["rows"]
+                chunk_first_word_item_id = next_word_item_id
+                for i in range(0, len(rows), batch_size):
+                    batch = rows[i:i + batch_size]
+                    next_word_item_id = self._insert_word_item_batch(word_book, batch, next_word_item_id, result)
+                    pending_count += len(batch)
+
+                # チェックポイントの更新(登録データと同一トランザクションでコミットされる)
+                import_job = import_job_dict.get(chunk_result["file_path"])
+                if import_job is not None:
+                    import_job.byte_offset = chunk_result["end"]
+                    import_job.row_count += len(rows)
+                    if next_word_item_id > chunk_first_word_item_id:
+                        import_job.word_item_id_ranges = self._get_appended_id_ranges(
+                            import_job.word_item_id_ranges, chunk_first_word_item_id, next_word_item_id - 1)
+                    self.session.add(import_job)
+
+                # チャンク境界でのコミット
+                if not single_transaction and pending_count >= batch_size:
+                    self.session.commit()
+                    word_item_pool_cache.invalidate(word_book.id)
+                    quiz_item_list_cache.invalidate(word_book.id)
+                    pending_count = 0
+
+                if progress is not None:
+                    self._notify_import_progress(progress, progress_callback, parsed_count, result, start_time)
+        finally:
+            chunk_iter.close()
+
+        if cancel_event is not None and cancel_event.is_set():
+            self._rollback_import(word_book, result, import_job_dict)
+            return result
+
+        # 取込ジョブの完了およびコミット処理
+        for import_job in import_job_dict.values():
+            import_job.status = "completed"
+            self.session.add(import_job)
+        self.session.commit()
+        word_item_pool_cache.invalidate(word_book.id)
+        quiz_item_list_cache.invalidate(word_book.id)
+
+        # 処理件数・速度の集計
+        result.elapsed_sec = time.perf_counter() - start_time
+        if result.elapsed_sec > 0:
+            result.rows_per_sec = result.row_count / result.elapsed_sec
+
+        if progress is not None:
+            self._notify_import_progress(progress, progress_callback, parsed_count, result, start_time)
+
+        return result
+
+    def _upsert_csv_files(self, word_book: WordBook, csv_file_path_list: list, batch_size: int,
+                          parse_workers: int | None,
+                          progress_callback: Callable[[WordImportProgress], None] | None,
+                          cancel_event: threading.Event | None) -> WordImportResult:
+        start_time = time.perf_counter()
+        result = WordImportResult()
+
+        # 進捗通知用の情報
+        progress = None
+        if progress_callback is not None:
+            total_count = sum(count_csv_rows(x) for x in csv_file_path_list)
+            progress = WordImportProgress(total_count=total_count)
+
+        # 登録済み単語アイテムのseq_no毎のID・有効フラグ・ハッシュ値を取得
+        statement = (select(WordItem.id, WordItem.seq_no, WordItem.is_active, WordItemHash.content_hash)
+                     .outerjoin(WordItemHash, WordItemHash.word_item_id == WordItem.id)
+                     .where(WordItem.word_book_id == word_book.id)
+                     .order_by(WordItem.seq_no, WordItem.id))
+        existing_dict = {}
+        duplicate_id_list = []
+        for word_item_id, seq_no, is_active, content_hash in self.session.exec(statement):
+            if seq_no in existing_dict:
+                # 過去の重複登録分は無効化の対象とする
+                if is_active:
+                    duplicate_id_list.append(word_item_id)
+                continue
+            existing_dict[seq_no] = (word_item_id, is_active, content_hash)
+
+        next_word_item_id = self._get_next_word_item_id()
+
+        # 変更のあった行のみ追加・更新する(全体を1トランザクションで処理)
+        parsed_count = 0
+        seen_seq_no_set = set()
+        error_seq_no_set = set()
+        chunk_iter = iter_parsed_csv_chunks(csv_file_path_list, workers=parse_workers)
+        try:
+            for chunk_result in chunk_iter:
+                if cancel_event is not None and cancel_event.is_set():
+                    self.session.rollback()
+                    result.cancelled = True
+                    return result
+
+                parsed_count += chunk_result["parsed_count"]
+                self._append_import_errors(result, chunk_result["error_list"])
+                error_seq_no_set.update(chunk_result["error_seq_no_list"])
+
+                insert_rows = []
+                update_rows = []
+                reactivate_id_list = []
+                for parsed_row in chunk_result["rows"]:
+                    seq_no = parsed_row["item"]["seq_no"]
+                    if seq_no in seen_seq_no_set:
+                        continue
+                    seen_seq_no_set.add(seq_no)
+
+                    existing = existing_dict.get(seq_no)
+                    if existing is None:
+                        insert_rows.append(parsed_row)
+                    elif existing[2] != parsed_row["content_hash"]:
+                        update_rows.append((existing[0], parsed_row))
+                    elif not existing[1]:
+                        reactivate_id_list.append(existing[0])
                     else:
-                        tmp_str = "[{0}]{1}".format(word_type_str, word_meaning)
-                        meaning_str_list.append(tmp_str)
-
-                # 1つの連続した文字列としてlist内の要素を連結する
-                meaning_str = ", ".join(meaning_str_list)
-                word_item_info = WordItemInfo(
-                    word_item_id=word_item_id,
-                    seq_no=word_item.seq_no,
-                    word=word_item.word,
-                    meaning=meaning_str
-                )
-                word_item_info_dict[word_item_id] = word_item_info
+                        result.unchanged_count += 1
 
-        # dict形式からlistに変更する
-        word_item_info_list = list(word_item_info_dict.values())
+                for i in range(0, len(insert_rows), batch_size):
+                    next_word_item_id = self._insert_word_item_batch(
+                        word_book, insert_rows[i:i + batch_size], next_word_item_id, result)
+                result.inserted_count += len(insert_rows)
 
-        return word_item_info_list
+                if len(update_rows) > 0:
+                    self._update_word_item_batch(word_book, update_rows, result)
+                if len(reactivate_id_list) > 0:
+                    self._set_word_items_active(reactivate_id_list, True)
+                    result.updated_count += len(reactivate_id_list)
+
+                if progress is not None:
+                    self._notify_import_progress(progress, progress_callback, parsed_count, result, start_time)
+        finally:
+            chunk_iter.close()
+
+        if cancel_event is not None and cancel_event.is_set():
+            self.session.rollback()
+            result.cancelled = True
+            return result
+
+        # CSVに存在しない行および重複行の無効化
+        # Note: 検証エラーの行は既存データを残す(seq_noが読めないエラー行がある場合は無効化自体を行わない)
+        deactivate_id_list = []
+        if None not in error_seq_no_set:
+            deactivate_id_list = [x[0] for seq_no, x in existing_dict.items()
+                                  if seq_no not in seen_seq_no_set and seq_no not in error_seq_no_set and x[1]]
+        deactivate_id_list.extend(duplicate_id_list)
+        if len(deactivate_id_list) > 0:
+            self._set_word_items_active(deactivate_id_list, False)
+        result.deactivated_count = len(deactivate_id_list)
+
+        # コミット処理
+        self.session.commit()
+        word_item_pool_cache.invalidate(word_book.id)
+        quiz_item_list_cache.invalidate(word_book.id)
+
+        result.elapsed_sec = time.perf_counter() - start_time
+        if result.elapsed_sec > 0:
+            result.rows_per_sec = parsed_count / result.elapsed_sec
+
+        if progress is not None:
+            self._notify_import_progress(progress, progress_callback, parsed_count, result, start_time)
+
+        return result
+
+    def _update_word_item_batch(self, word_book: WordBook, update_rows: list, result: WordImportResult):
+        now = datetime.now()
+        word_item_id_list = [x[0] for x in update_rows]
+
+        # 単語アイテムの更新(主キー指定のexecutemany)
+        item_rows = [dict(parsed_row["item"], id=word_item_id, is_active=True, updated_at=now)
+                     for word_item_id, parsed_row in update_rows]
+        self.session.exec(update(WordItem), params=item_rows)
+
+        # 意味・例文・ハッシュ値・集計データは削除の上で再登録する
+        self.session.exec(delete(WordMeaning).where(WordMeaning.word_item_id.in_(word_item_id_list)))
+        self.session.exec(delete(WordSentence).where(WordSentence.word_item_id.in_(word_item_id_list)))
+        self.session.exec(delete(WordItemHash).where(WordItemHash.word_item_id.in_(word_item_id_list)))
+        self.session.exec(delete(WordItemSummary).where(WordItemSummary.word_item_id.in_(word_item_id_list)))
+
+        meaning_rows = []
+        sentence_rows = []
+        hash_rows = []
+        summary_rows = []
+        for word_item_id, parsed_row in update_rows:
+            summary_rows.append(self._get_summary_row(word_book.id, word_item_id, parsed_row))
+            for meaning in parsed_row["meanings"]:
+                meaning_rows.append(dict(meaning, word_item_id=word_item_id, created_at=now, updated_at=now))
+            for sentence in parsed_row["sentences"]:
+                sentence_rows.append(dict(sentence, word_item_id=word_item_id, created_at=now, updated_at=now))
+            hash_rows.append({"word_item_id": word_item_id, "content_hash": parsed_row["content_hash"]})
 
-    def import_wordbook_contents(self, word_book: WordBook, csv_file_path: Path):
-        # 単語帳情報の取得及び登録
-        with open(csv_file_path, "r", encoding="utf-8") as csv_file:
-            csv_reader = csv.DictReader(csv_file, delimiter=",")
+        if len(meaning_rows) > 0:
+            self.session.exec(insert(WordMeaning), params=meaning_rows)
+        if len(sentence_rows) > 0:
+            self.session.exec(insert(WordSentence), params=sentence_rows)
+        self.session.exec(insert(WordItemHash), params=hash_rows)
+        self.session.exec(insert(WordItemSummary), params=summary_rows)
 
-            # CSV1行あたりの処理実行
-            for row in csv_reader:
-                if row["word"] == "":
-                    continue
+        result.row_count += len(update_rows)
+        result.updated_count += len(update_rows)
 
-                # 単語アイテムおよび意味情報・例文情報の追加
-                word_item = WordItem(
+    def _set_word_items_active(self, word_item_id_list: list, is_active: bool):
+        statement = (update(WordItem)
+                     .where(WordItem.id.in_(word_item_id_list))
+                     .values(is_active=is_active, updated_at=datetime.now()))
+        self.session.exec(statement)
+
+        statement = (update(WordItemSummary)
+                     .where(WordItemSummary.word_item_id.in_(word_item_id_list))
+                     .values(is_active=is_active))
+        self.session.exec(statement)
+
+    def _append_import_errors(self, result: WordImportResult, error_list: list):
+        result.error_count += len(error_list)
+        remain_size = MAX_ERROR_LIST_SIZE - len(result.error_list)
+        if remain_size > 0:
+            result.error_list.extend(error_list[:remain_size])
+
+    def _get_next_word_item_id(self) -> int:
+        statement = select(func.max(WordItem.id))
+        max_word_item_id = self.session.exec(statement).first()
+        return (max_word_item_id or 0) + 1
+
+    def _get_or_create_import_jobs(self, word_book: WordBook, csv_file_path_list: list,
+                                   first_word_item_id: int) -> dict:
+        import_job_dict = {}
+
+        for csv_file_path in csv_file_path_list:
+            # 同一内容のファイルで未完了のジョブがあれば再開する
+            file_hash = get_file_hash(csv_file_path)
+            statement = (select(ImportJob)
+                         .where(ImportJob.word_book_id == word_book.id)
+                         .where(ImportJob.file_hash == file_hash)
+                         .where(ImportJob.status == "running")
+                         .order_by(ImportJob.id.desc()))
+            import_job = self.session.exec(statement).first()
+
+            if import_job is None:
+                now = datetime.now()
+                import_job = ImportJob(
                     word_book_id=word_book.id,
-                    word=row["word"],
-                    seq_no=int(row["seq_no"]),
-                    section_no=row["section_no"],
-                    section_title=row["section_title"],
-                    pronunciation=row["pronunciation"],
-                    pronunciation_kana=row["pronunciation_kana"],
+                    file_path=str(csv_file_path),
+                    file_hash=file_hash,
+                    file_size=Path(csv_file_path).stat().st_size,
+                    first_word_item_id=first_word_item_id,
+                    created_at=now,
+                    updated_at=now,
                 )
+                self.session.add(import_job)
+
+            import_job_dict[str(csv_file_path)] = import_job
+
+        self.session.commit()
+        return import_job_dict
+
+    def _rollback_import(self, word_book: WordBook, result: WordImportResult, import_job_dict: dict | None = None):
+        # 未コミット分の破棄
+        self.session.rollback()
+
+        # 取込ジョブの中止およびコミット済みのバッチ分のIDの取得
+        # Note: 再開した取込の間に他の取込で登録された単語アイテムを含めないよう、ジョブで登録したIDのみが対象
+        word_item_id_list = []
+        for import_job in (import_job_dict or {}).values():
+            import_job.status = "cancelled"
+            self.session.add(import_job)
+            for first_id, last_id in import_job.word_item_id_ranges:
+                word_item_id_list.extend(range(first_id, last_id + 1))
+
+        # 作成済みテストで出題済みの単語アイテムは削除せず無効化する
+        quiz_item_bits = QuizItemSetService(self.session).get_all_item_bits(word_book)
+        keep_id_list = [x for x in word_item_id_list if quiz_item_bits >> x & 1]
+        delete_id_list = [x for x in word_item_id_list if not quiz_item_bits >> x & 1]
+        if len(keep_id_list) > 0:
+            self._set_word_items_active(keep_id_list, False)
+        for i in range(0, len(delete_id_list), DEFAULT_IMPORT_BATCH_SIZE):
+            self._delete_word_item_batch(delete_id_list[i:i + DEFAULT_IMPORT_BATCH_SIZE])
+        self.session.commit()
+        word_item_pool_cache.invalidate(word_book.id)
+        quiz_item_list_cache.invalidate(word_book.id)
+
+        result.cancelled = True
+
+    def _delete_word_item_batch(self, word_item_id_list: list):
+        self.session.exec(delete(WordMeaning).where(WordMeaning.word_item_id.in_(word_item_id_list)))
+        self.session.exec(delete(WordSentence).where(WordSentence.word_item_id.in_(word_item_id_list)))
+        self.session.exec(delete(WordItemHash).where(WordItemHash.word_item_id.in_(word_item_id_list)))
+        self.session.exec(delete(WordItemSummary).where(WordItemSummary.word_item_id.in_(word_item_id_list)))
+        self.session.exec(delete(WordItemStat).where(WordItemStat.word_item_id.in_(word_item_id_list)))
+        self.session.exec(delete(WordItem).where(WordItem.id.in_(word_item_id_list)))
+
+    def _get_appended_id_ranges(self, id_range_list: list, first_id: int, last_id: int) -> list:
+        # IDの範囲([最初のID, 最後のID]のlist)に追加する(直前の範囲と連続する場合は結合)
+        # Note: JSON列の変更を検知させるため、新しいlistを返す
+        id_range_list = [list(x) for x in id_range_list or []]
+        if len(id_range_list) > 0 and id_range_list[-1][1] + 1 == first_id:
+            id_range_list[-1][1] = last_id
+        else:
+            id_range_list.append([first_id, last_id])
+        return id_range_list
+
+    def _notify_import_progress(self, progress: WordImportProgress, progress_callback: Callable,
+                                parsed_count: int, result: WordImportResult, start_time: float):
+        elapsed_sec = time.perf_counter() - start_time
+
+        progress.parsed_count = parsed_count
+        progress.inserted_count = result.row_count
+        progress.elapsed_sec = elapsed_sec
+        if elapsed_sec > 0:
+            progress.rows_per_sec = parsed_count / elapsed_sec
+        if progress.rows_per_sec > 0:
+            progress.eta_sec = max(progress.total_count - parsed_count, 0) / progress.rows_per_sec
+
+        progress_callback(progress)
+
+    def _insert_word_item_batch(self, word_book: WordBook, batch: list, next_word_item_id: int,
+                                result: WordImportResult) -> int:
+        now = datetime.now()
+        item_rows = []
+        meaning_rows = []
+        sentence_rows = []
+        hash_rows = []
+        summary_rows = []
+
+        # 事前確保したIDを割り当てつつ、各テーブルの行データを作成
+        for parsed_row in batch:
+            word_item_id = next_word_item_id
+            next_word_item_id += 1
+
+            item_rows.append(dict(parsed_row["item"], id=word_item_id, word_book_id=word_book.id,
+                                  is_active=True, created_at=now, updated_at=now))
+            for meaning in parsed_row["meanings"]:
+                meaning_rows.append(dict(meaning, word_item_id=word_item_id, created_at=now, updated_at=now))
+            for sentence in parsed_row["sentences"]:
+                sentence_rows.append(dict(sentence, word_item_id=word_item_id, created_at=now, updated_at=now))
+            hash_rows.append({"word_item_id": word_item_id, "content_hash": parsed_row["content_hash"]})
+            summary_rows.append(self._get_summary_row(word_book.id, word_item_id, parsed_row))
+
+        # executemany形式での一括登録
+        self.session.exec(insert(WordItem), params=item_rows)
+        self.session.exec(insert(WordItemHash), params=hash_rows)
+        self.session.exec(insert(WordItemSummary), params=summary_rows)
+        if len(meaning_rows) > 0:
+            self.session.exec(insert(WordMeaning), params=meaning_rows)
+        if len(sentence_rows) > 0:
+            self.session.exec(insert(WordSentence), params=sentence_rows)
+
+        result.row_count += len(item_rows)
+        result.meaning_count += len(meaning_rows)
+        result.sentence_count += len(sentence_rows)
+
+        return next_word_item_id
 
-                # WordItemのID確定のためコミット処理
-                self.session.add(word_item)
-                self.session.commit()
-                self.session.refresh(word_item)
-
-                # 意味情報の追加
-                for i in range(1, 4):
-                    col_name1 = f"word_type{i}"
-                    col_name2 = f"word_meaning{i}"
-                    col_name3 = f"note{i}"
-
-                    word_type_list = [x.strip() for x in row[col_name1].split(",")]
-                    word_type = word_type_list[0]
-                    sub_word_type = word_type_list[1] if len(word_type_list) > 1 else ""
-                    meaning = row[col_name2].strip()
-                    note = row[col_name3].strip()
-
-                    if meaning != "" and word_type != "":
-                        word_meaning = WordMeaning(
-                            seq_no=i,
-                            word_item_id=word_item.id,
-                            word_type=self.get_jp_word_type_id(word_type),
-                            sub_word_type=self.get_jp_word_type_id(sub_word_type),
-                            meaning=meaning,
-                            note=note,
-                        )
-                        self.session.add(word_meaning)
-
-                # 例文情報の追加
-                for i in range(1, 3):
-                    col_name1 = f"sentence{i}"
-                    col_name2 = f"sentence_translation{i}"
-
-                    sentence = row[col_name1].strip()
-                    translation = row[col_name2].strip()
-
-                    if sentence != "" and translation != "":
-                        word_sentence = WordSentence(
-                            word_item_id=word_item.id,
-                            seq_no=i,
-                            sentence=sentence,
-                            translation=translation
-                        )
-                        self.session.add(word_sentence)
-
-                # コミット処理
-                self.session.commit()
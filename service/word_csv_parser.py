@@ -0,0 +1,259 @@
+import io
+import os
+import csv
+import json
+import hashlib
+from pathlib import Path
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# 日本語品詞名からword_types.idへの変換用dict
+JP_WORD_TYPE_ID_DICT = {
+    "名詞": 1,
+    "代名詞": 2,
+    "動詞": 3,
+    "形容詞": 4,
+    "副詞": 5,
+    "助動詞": 6,
+    "前置詞": 7,
+    "冠詞": 8,
+    "間投詞": 9,
+    "接続詞": 10,
+    "句動詞": 20,
+    "熟語": 30,
+    "その他": 99,
+}
+
+# 1チャンクあたりのバイト数の既定値
+DEFAULT_CHUNK_BYTES = 256 * 1024
+
+# プロセスプールで並列解析を行うファイルサイズの下限(これ未満はプロセス内で解析)
+PARALLEL_PARSE_MIN_BYTES = 4 * 1024 * 1024
+
+# エラー内容を保持する最大件数
+MAX_ERROR_LIST_SIZE = 100
+
+
+#
+# 行単位の解析
+#
+
+def parse_word_item_row(row: dict) -> dict | None:
+    if row["word"].strip() == "":
+        return None
+
+    # 単語アイテム情報
+    item = {
+        "word": row["word"].strip(),
+        "seq_no": int(row["seq_no"]),
+        "section_no": row["section_no"].strip(),
+        "section_title": row["section_title"].strip(),
+        "pronunciation": row["pronunciation"].strip(),
+        "pronunciation_kana": row["pronunciation_kana"].strip(),
+    }
+
+    # 意味情報
+    meanings = []
+    for i in range(1, 4):
+        col_name1 = f"word_type{i}"
+        col_name2 = f"word_meaning{i}"
+        col_name3 = f"note{i}"
+
+        word_type_list = [x.strip() for x in row[col_name1].split(",")]
+        word_type = word_type_list[0]
+        sub_word_type = word_type_list[1] if len(word_type_list) > 1 else ""
+        meaning = row[col_name2].strip()
+        note = row[col_name3].strip()
+
+        if meaning != "" and word_type != "":
+            meanings.append({
+                "seq_no": i,
+                "word_type": get_jp_word_type_id(word_type),
+                "sub_word_type": get_jp_word_type_id(sub_word_type),
+                "meaning": meaning,
+                "note": note,
+            })
+
+    # 例文情報
+    # Note: 訳文(sentence_translation)の保存先カラムは未定義のため保存しない
+    sentences = []
+    for i in range(1, 3):
+        col_name1 = f"sentence{i}"
+        col_name2 = f"sentence_translation{i}"
+
+        sentence = row[col_name1].strip()
+        translation = row[col_name2].strip()
+
+        if sentence != "" and translation != "":
+            sentences.append({
+                "seq_no": i,
+                "sentence": sentence,
+                "note": None,
+            })
+
+    parsed_row = {"item": item, "meanings": meanings, "sentences": sentences}
+    parsed_row["content_hash"] = get_content_hash(parsed_row)
+
+    return parsed_row
+
+
+def get_content_hash(parsed_row: dict) -> str:
+    # 正規化済みの行内容からハッシュ値を作成(差分取込時の変更検知用)
+    content = [parsed_row["item"], parsed_row["meanings"], parsed_row["sentences"]]
+    content_str = json.dumps(content, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(content_str.encode("utf-8")).hexdigest()
+
+
+def get_jp_word_type_id(word_type: str):
+    if word_type == "":
+        return None
+    return JP_WORD_TYPE_ID_DICT[word_type]
+
+
+def get_error_seq_no(row: dict) -> int | None:
+    # エラー行のseq_no(差分取込時に既存の単語アイテムを無効化しないため、取得できない場合はNone)
+    try:
+        return int(row["seq_no"])
+    except (KeyError, ValueError, TypeError):
+        return None
+
+
+#
+# チャンク分割
+#
+
+def get_file_hash(file_path: Path) -> str:
+    # ファイル内容のハッシュ値(取込再開時の同一ファイル判定用)
+    file_hash = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def read_csv_header(csv_file_path: Path) -> tuple[list, int]:
+    # ヘッダ行の列名と、データ行の開始位置(バイト)を取得
+    with open(csv_file_path, "rb") as f:
+        header_line = f.readline()
+        data_start = f.tell()
+
+    header_str = header_line.decode("utf-8-sig")
+    fieldnames = next(csv.reader([header_str]))
+    return [x.strip() for x in fieldnames], data_start
+
+
+def split_csv_byte_ranges(csv_file_path: Path, start: int, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> list:
+    # レコードの区切り位置(引用符の外の改行)に揃えたバイト範囲(start, end)のlistを作成する
+    # Note: 各範囲の先頭は引用符の外のため、範囲内の引用符の数が偶数になる改行位置まで範囲を延ばす
+    # Note: UTF-8のマルチバイト文字には引用符・改行のバイトは含まれないため、バイト単位で判定できる
+    byte_range_list = []
+    file_size = os.path.getsize(csv_file_path)
+
+    with open(csv_file_path, "rb") as f:
+        chunk_start = start
+        while chunk_start < file_size:
+            f.seek(chunk_start)
+            in_quote = f.read(chunk_bytes).count(b'"') % 2 == 1
+            while line := f.readline():
+                in_quote ^= line.count(b'"') % 2 == 1
+                if not in_quote:
+                    break
+            chunk_end = min(f.tell(), file_size)
+            byte_range_list.append((chunk_start, chunk_end))
+            chunk_start = chunk_end
+
+    return byte_range_list
+
+
+def count_csv_rows(csv_file_path: Path) -> int:
+    # 改行数からヘッダ行を除いた行数を概算する
+    line_count = 0
+    with open(csv_file_path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            line_count += chunk.count(b"\n")
+    return max(line_count - 1, 0)
+
+
+#
+# チャンク単位の解析・検証
+#
+
+def parse_csv_chunk(csv_file_path: Path, fieldnames: list, start: int, end: int) -> dict:
+    # 指定範囲のバイト列を読込み
+    with open(csv_file_path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    rows = []
+    error_list = []
+    error_seq_no_list = []
+    parsed_count = 0
+    csv_text = io.StringIO(data.decode("utf-8"), newline="")
+
+    # 各行の解析および検証
+    for row in csv.DictReader(csv_text, fieldnames=fieldnames, delimiter=","):
+        parsed_count += 1
+        try:
+            parsed_row = parse_word_item_row(row)
+        except (KeyError, ValueError, AttributeError) as e:
+            error_list.append("{0}: seq_no={1}: {2!r}".format(Path(csv_file_path).name, row.get("seq_no"), e))
+            error_seq_no_list.append(get_error_seq_no(row))
+            continue
+
+        if parsed_row is not None:
+            rows.append(parsed_row)
+
+    return {
+        "file_path": str(csv_file_path),
+        "start": start,
+        "end": end,
+        "parsed_count": parsed_count,
+        "rows": rows,
+        "error_list": error_list,
+        "error_seq_no_list": error_seq_no_list,
+    }
+
+
+def iter_parsed_csv_chunks(csv_file_path_list: list, workers: int | None = None,
+                           chunk_bytes: int = DEFAULT_CHUNK_BYTES, start_offset_dict: dict | None = None):
+    # 全ファイルのチャンク一覧を作成(再開時はファイル毎の指定位置から)
+    task_list = []
+    total_bytes = 0
+    for csv_file_path in csv_file_path_list:
+        fieldnames, data_start = read_csv_header(csv_file_path)
+        if start_offset_dict is not None:
+            data_start = max(data_start, start_offset_dict.get(str(csv_file_path), 0))
+        for start, end in split_csv_byte_ranges(csv_file_path, data_start, chunk_bytes):
+            task_list.append((csv_file_path, fieldnames, start, end))
+            total_bytes += end - start
+
+    # 小さいファイルはプロセス起動コストの方が大きいため逐次解析する
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(task_list) <= 1 or total_bytes < PARALLEL_PARSE_MIN_BYTES:
+        for task in task_list:
+            yield parse_csv_chunk(*task)
+        return
+
+    # プロセスプールによる並列解析
+    # Note: 結果はファイル・チャンク順に返し、先行投入数を制限してメモリ使用量を抑える
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        task_iter = iter(task_list)
+
+        for task in task_iter:
+            pending.append(executor.submit(parse_csv_chunk, *task))
+            if len(pending) >= workers * 2:
+                break
+
+        try:
+            while len(pending) > 0:
+                chunk_result = pending.popleft().result()
+                next_task = next(task_iter, None)
+                if next_task is not None:
+                    pending.append(executor.submit(parse_csv_chunk, *next_task))
+                yield chunk_result
+        finally:
+            # 途中終了(キャンセル)時は未着手のチャンクを破棄
+            for future in pending:
+                future.cancel()
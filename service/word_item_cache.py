@@ -0,0 +1,182 @@
+import sys
+import threading
+from collections import OrderedDict
+
+from service.quiz_area import merge_area_list
+
+# 出題候補の単語アイテムIDのキャッシュ全体の上限サイズ(バイト)の既定値
+DEFAULT_WORD_ITEM_POOL_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# 単語アイテムID 1件あたりの概算サイズ(int本体・listの参照)
+WORD_ITEM_ID_BYTES = 36
+
+# 単語・意味を解決済みの出題単語のキャッシュの上限件数(テスト数)の既定値
+DEFAULT_QUIZ_ITEM_LIST_CACHE_MAX_ENTRIES = 256
+
+
+def normalize_area_list(area_list: list | None) -> tuple:
+    # 出題範囲を結合済みの(lower, upper)のタプルに揃える(同じ範囲の異なる指定を同じキーとする)
+    return tuple((int(x[0]), int(x[1])) for x in merge_area_list(area_list))
+
+
+def estimate_word_item_id_list_bytes(word_item_id_list: list) -> int:
+    return sys.getsizeof(word_item_id_list) + WORD_ITEM_ID_BYTES * len(word_item_id_list)
+
+
+class WordItemPoolCache:
+    # (単語帳ID, 出題範囲)毎の出題候補の単語アイテムID(seq_no順)のキャッシュ
+    # Note: 重み付き抽選・出題済み単語の除外時に、候補全体をテスト作成毎に再取得しない
+    def __init__(self, max_bytes: int = DEFAULT_WORD_ITEM_POOL_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+
+        # 統計情報
+        self.hit_count = 0
+        self.miss_count = 0
+        self.eviction_count = 0
+        self.invalidation_count = 0
+
+        # (単語帳ID, 出題範囲) -> (単語アイテムIDのlist, 概算サイズ)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    #
+    # 各種メソッド
+    #
+
+    def get(self, word_book_id: int, area_list: list | None) -> list | None:
+        key = (int(word_book_id), normalize_area_list(area_list))
+
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.miss_count += 1
+                return None
+
+            # 最近使用した要素として末尾に移動
+            self._data.move_to_end(key)
+            self.hit_count += 1
+            return list(entry[0])
+
+    def put(self, word_book_id: int, area_list: list | None, word_item_id_list: list):
+        key = (int(word_book_id), normalize_area_list(area_list))
+        size = estimate_word_item_id_list_bytes(word_item_id_list)
+
+        # 上限を超える単独の要素はキャッシュしない
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old_entry = self._data.pop(key, None)
+            if old_entry is not None:
+                self.current_bytes -= old_entry[1]
+
+            self._data[key] = (list(word_item_id_list), size)
+            self.current_bytes += size
+
+            # 上限サイズに収まるまで古い要素から破棄
+            while self.current_bytes > self.max_bytes:
+                _, evicted_entry = self._data.popitem(last=False)
+                self.current_bytes -= evicted_entry[1]
+                self.eviction_count += 1
+
+    def invalidate(self, word_book_id: int):
+        # 指定した単語帳のキャッシュのみ破棄
+        with self._lock:
+            key_list = [x for x in self._data.keys() if x[0] == int(word_book_id)]
+            for key in key_list:
+                _, size = self._data.pop(key)
+                self.current_bytes -= size
+            self.invalidation_count += len(key_list)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.current_bytes = 0
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            total_count = self.hit_count + self.miss_count
+            return {
+                "entry_count": len(self._data),
+                "current_bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hit_count": self.hit_count,
+                "miss_count": self.miss_count,
+                "hit_ratio": self.hit_count / total_count if total_count > 0 else 0.0,
+                "eviction_count": self.eviction_count,
+                "invalidation_count": self.invalidation_count,
+            }
+
+
+class QuizItemListCache:
+    # テスト毎の出題単語(単語・意味を解決済み)のキャッシュ
+    # Note: キーの先頭は単語帳IDとし、単語帳の更新時に単語帳単位で破棄する
+    def __init__(self, max_entries: int = DEFAULT_QUIZ_ITEM_LIST_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+
+        # 統計情報
+        self.hit_count = 0
+        self.miss_count = 0
+        self.eviction_count = 0
+        self.invalidation_count = 0
+
+        # (単語帳ID, テストのUUID, 作成時のハッシュ値) -> (出題単語のlist, 作成後の更新有無, 解決できない単語アイテムID)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    #
+    # 各種メソッド
+    #
+
+    def get(self, key: tuple) -> tuple | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.miss_count += 1
+                return None
+
+            # 最近使用した要素として末尾に移動
+            self._data.move_to_end(key)
+            self.hit_count += 1
+            return entry
+
+    def put(self, key: tuple, item_list: list, snapshot_changed: bool, missing_item_id_list: list):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (item_list, snapshot_changed, missing_item_id_list)
+
+            # 上限件数に収まるまで古い要素から破棄
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.eviction_count += 1
+
+    def invalidate(self, word_book_id: int):
+        # 指定した単語帳のキャッシュのみ破棄
+        with self._lock:
+            key_list = [x for x in self._data.keys() if x[0] == int(word_book_id)]
+            for key in key_list:
+                del self._data[key]
+            self.invalidation_count += len(key_list)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            total_count = self.hit_count + self.miss_count
+            return {
+                "entry_count": len(self._data),
+                "max_entries": self.max_entries,
+                "hit_count": self.hit_count,
+                "miss_count": self.miss_count,
+                "hit_ratio": self.hit_count / total_count if total_count > 0 else 0.0,
+                "eviction_count": self.eviction_count,
+                "invalidation_count": self.invalidation_count,
+            }
+
+
+# プロセス全体で共有するキャッシュ
+word_item_pool_cache = WordItemPoolCache()
+quiz_item_list_cache = QuizItemListCache()
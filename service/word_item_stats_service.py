@@ -0,0 +1,127 @@
+from collections import Counter
+from datetime import datetime
+from sqlmodel import Session, select, insert, update, delete
+
+from model.models import WordBook, WordItemStat, VocabQuiz
+from service.weighted_sampler import get_word_item_weight
+from service.quiz_data import get_quiz_word_item_id_list
+
+# 集計データをまとめて登録・更新する行数
+STATS_BATCH_SIZE = 1000
+
+
+class WordItemStatsService:
+    def __init__(self, session: Session):
+        self.session = session
+
+    #
+    # 各種メソッド
+    #
+
+    def add_vocab_quiz_list(self, vocab_quiz_list: list):
+        # テスト登録時の出題回数・最終出題日時の加算(コミットは呼出し元で行う)
+        count_dict, last_dt_dict, word_book_id_dict = self._get_quiz_stats_dict(vocab_quiz_list)
+        if len(count_dict) == 0:
+            return
+
+        word_item_id_list = list(count_dict.keys())
+        existing_dict = {}
+        for i in range(0, len(word_item_id_list), STATS_BATCH_SIZE):
+            statement = select(WordItemStat).where(
+                WordItemStat.word_item_id.in_(word_item_id_list[i:i + STATS_BATCH_SIZE]))
+            existing_dict.update({x.word_item_id: x for x in self.session.exec(statement)})
+
+        insert_rows = []
+        update_rows = []
+        for word_item_id, quiz_count in count_dict.items():
+            stat = existing_dict.get(word_item_id)
+            if stat is None:
+                insert_rows.append({
+                    "word_item_id": word_item_id,
+                    "word_book_id": word_book_id_dict[word_item_id],
+                    "quiz_count": quiz_count,
+                    "last_quiz_dt": last_dt_dict[word_item_id],
+                })
+            else:
+                last_quiz_dt = last_dt_dict[word_item_id]
+                if stat.last_quiz_dt is not None and stat.last_quiz_dt > last_quiz_dt:
+                    last_quiz_dt = stat.last_quiz_dt
+                update_rows.append({
+                    "word_item_id": word_item_id,
+                    "quiz_count": stat.quiz_count + quiz_count,
+                    "last_quiz_dt": last_quiz_dt,
+                })
+
+        self._write_stats_rows(insert_rows, update_rows)
+
+    def remove_vocab_quiz(self, vocab_quiz: VocabQuiz):
+        # テスト削除時の出題回数の減算(コミットは呼出し元で行う)
+        # Note: 最終出題日時は他のテストの出題日時を再集計しないため、そのまま残す
+        count_dict, _, _ = self._get_quiz_stats_dict([vocab_quiz])
+        if len(count_dict) == 0:
+            return
+
+        statement = select(WordItemStat).where(WordItemStat.word_item_id.in_(list(count_dict.keys())))
+        update_rows = [
+            {
+                "word_item_id": x.word_item_id,
+                "quiz_count": max(x.quiz_count - count_dict[x.word_item_id], 0),
+            }
+            for x in self.session.exec(statement)
+        ]
+        self._write_stats_rows([], update_rows)
+
+    def rebuild_word_item_stats(self, word_book: WordBook | None = None):
+        # 対象の単語帳(指定がない場合は全件)の集計データを作成済みのテストから再作成する
+        delete_statement = delete(WordItemStat)
+        statement = select(VocabQuiz)
+        if word_book is not None:
+            delete_statement = delete_statement.where(WordItemStat.word_book_id == word_book.id)
+            statement = statement.where(VocabQuiz.word_book_id == word_book.id)
+        self.session.exec(delete_statement)
+
+        self.add_vocab_quiz_list(list(self.session.exec(statement)))
+        self.session.commit()
+
+    def get_weight_list(self, word_item_id_list: list, now: datetime | None = None) -> list:
+        # 単語アイテムID毎の重み(word_item_id_listと同じ順序)
+        if now is None:
+            now = datetime.now()
+
+        stat_dict = {}
+        for i in range(0, len(word_item_id_list), STATS_BATCH_SIZE):
+            statement = (select(WordItemStat.word_item_id, WordItemStat.quiz_count, WordItemStat.last_quiz_dt)
+                         .where(WordItemStat.word_item_id.in_(word_item_id_list[i:i + STATS_BATCH_SIZE])))
+            stat_dict.update({x[0]: (x[1], x[2]) for x in self.session.exec(statement)})
+
+        return [get_word_item_weight(*stat_dict.get(x, (0, None)), now) for x in word_item_id_list]
+
+    #
+    # privateメソッド
+    #
+
+    def _get_quiz_stats_dict(self, vocab_quiz_list: list) -> tuple[Counter, dict, dict]:
+        count_dict = Counter()
+        last_dt_dict = {}
+        word_book_id_dict = {}
+
+        for vocab_quiz in vocab_quiz_list:
+            # 登録前(flush前)のテストは単語帳IDが未設定のためリレーションから取得
+            word_book_id = vocab_quiz.word_book_id
+            if word_book_id is None:
+                word_book_id = vocab_quiz.word_book.id
+            quiz_dt = vocab_quiz.quiz_dt or vocab_quiz.created_at or datetime.now()
+
+            for word_item_id in get_quiz_word_item_id_list(vocab_quiz.quiz_data):
+                count_dict[word_item_id] += 1
+                word_book_id_dict[word_item_id] = word_book_id
+                if word_item_id not in last_dt_dict or last_dt_dict[word_item_id] < quiz_dt:
+                    last_dt_dict[word_item_id] = quiz_dt
+
+        return count_dict, last_dt_dict, word_book_id_dict
+
+    def _write_stats_rows(self, insert_rows: list, update_rows: list):
+        for i in range(0, len(insert_rows), STATS_BATCH_SIZE):
+            self.session.exec(insert(WordItemStat), params=insert_rows[i:i + STATS_BATCH_SIZE])
+        for i in range(0, len(update_rows), STATS_BATCH_SIZE):
+            self.session.exec(update(WordItemStat), params=update_rows[i:i + STATS_BATCH_SIZE])
@@ -3,6 +3,13 @@ from pathlib import Path
 from configparser import ConfigParser
 from sqlmodel import Session, create_engine
 
+from service.migration_service import MigrationService
+from service.font_registry import font_registry
+from service.pdf_cache import pdf_file_cache
+from service.domain_event import (
+    DomainEventBus, DOMAIN_EVENT_BUS_KEY, get_domain_event_bus, WORD_BOOK_UPDATED, WORD_BOOK_DELETED, WORD_ITEMS_IMPORTED,
+    VOCAB_QUIZ_UPDATED, VOCAB_QUIZ_DELETED
+)
 from view.top_quiz_generator import TopQuizGenerator
 from view.top_quiz_history import TopQuizHistory
 from view.top_word_book import TopWordBook
@@ -11,6 +18,7 @@ from view.view_word_book_edit import ViewWordBookEdit
 from view.view_word_book_file_importer import ViewWordBookFileImporter
 from view.view_word_quiz_checker import ViewWordQuizChecker
 from view.view_word_quiz_edit import ViewWordQuizEdit
+from view.view_cache import ViewCache, get_word_book_tag, get_word_items_tag, get_vocab_quiz_tag
 
 
 class TopPage:
@@ -19,6 +27,23 @@ class TopPage:
         self.config = config
         self.root_path = root_path
 
+    #
+    # イベント定義
+    #
+
+    def event_disconnect(self, e):
+        # セッション終了(ブラウザを閉じた場合など)時に、このページの画面への通知先を破棄する
+        get_domain_event_bus(self.session).clear()
+
+    def event_domain_event(self, event_name: str, payload: dict):
+        # 更新されたデータに依存する画面のみキャッシュから破棄する
+        if event_name in [WORD_BOOK_UPDATED, WORD_BOOK_DELETED]:
+            self.view_cache.invalidate_tag(get_word_book_tag(payload["word_book_id"]))
+        if event_name in [WORD_ITEMS_IMPORTED, WORD_BOOK_DELETED]:
+            self.view_cache.invalidate_tag(get_word_items_tag(payload["word_book_id"]))
+        if event_name in [VOCAB_QUIZ_UPDATED, VOCAB_QUIZ_DELETED]:
+            self.view_cache.invalidate_tag(get_vocab_quiz_tag(payload["vocab_quiz_id"]))
+
     #
     # メソッド定義
     #
@@ -38,9 +63,19 @@ class TopPage:
         self.app_route_stack = []
         self.session = self.get_sqlite_session()
 
+        # 作成済み画面のキャッシュ(データ更新の通知で対象の画面のみ破棄)
+        self.view_cache = ViewCache()
+        for event_name in [WORD_BOOK_UPDATED, WORD_BOOK_DELETED, WORD_ITEMS_IMPORTED,
+                           VOCAB_QUIZ_UPDATED, VOCAB_QUIZ_DELETED]:
+            get_domain_event_bus(self.session).subscribe(event_name, self.event_domain_event)
+
+        # 作成済みPDFのキャッシュ保存先の設定
+        self.configure_pdf_cache()
+
         # ページ用Viewイベントの設定
         self.page.on_route_change = self.route_change
         self.page.on_view_pop = self.view_pop
+        self.page.on_disconnect = self.event_disconnect
         self.page.go(self.page.route)
 
         # タブ内部のトップ表示用レイアウト定義
@@ -60,14 +95,35 @@ class TopPage:
         # 更新
         self.page.update()
 
+        # PDF出力用フォントの事前読込み(初回のPDF作成を待たせないようバックグラウンドで実行)
+        self.page.run_thread(font_registry.register_font)
+
+    def configure_pdf_cache(self):
+        # 保存先フォルダの指定がない場合はキャッシュを使用しない
+        folder_path = self.config.get("pdf_cache", "folder_path", fallback="")
+        if folder_path == "":
+            pdf_file_cache.configure(None)
+            return
+
+        max_bytes = self.config.getint("pdf_cache", "max_size_mb", fallback=256) * 1024 * 1024
+        pdf_file_cache.configure(self.root_path / folder_path, max_bytes)
+
     def get_sqlite_session(self):
         # sqlite path
         sqlite_path = self.root_path / self.config["sqlite"]["file_path"]
         sqlite_url = f"sqlite:///{sqlite_path}"
 
         # get engine & session
-        engine = create_engine(sqlite_url, echo=True)
-        session = Session(engine)
+        echo = self.config.getboolean("sqlite", "echo", fallback=False)
+        engine = create_engine(sqlite_url, echo=echo)
+
+        # DBスキーマの作成・更新(既存DBファイルはそのまま最新版へ移行)
+        sqlite_path.parent.mkdir(parents=True, exist_ok=True)
+        for version, description in MigrationService(engine).migrate():
+            print("migrated database to version {0}: {1}".format(version, description))
+
+        # データ更新の通知はページ毎に行う(Webモードで他のセッションの画面を更新しない)
+        session = Session(engine, info={DOMAIN_EVENT_BUS_KEY: DomainEventBus()})
         return session
 
     #
@@ -83,17 +139,42 @@ class TopPage:
             self.page.views.append(view_word_quiz_checker)
         elif self.page.route == "/quiz/edit":
             vocab_quiz = self.top_quiz_history.selected_vocab_quiz
-            view_word_quiz_edit = ViewWordQuizEdit(self.page, self.session, self.top_quiz_history, vocab_quiz)
+            view_word_quiz_edit = self.view_cache.get(self.page.route, vocab_quiz.id)
+            if view_word_quiz_edit is None:
+                view_word_quiz_edit = ViewWordQuizEdit(self.page, self.session, self.top_quiz_history, vocab_quiz)
+                self.view_cache.put(self.page.route, vocab_quiz.id, view_word_quiz_edit, {
+                    get_vocab_quiz_tag(vocab_quiz.id),
+                    get_word_book_tag(vocab_quiz.word_book_id),
+                    get_word_items_tag(vocab_quiz.word_book_id),
+                })
+            else:
+                view_word_quiz_edit.reset_input_values()
             self.page.views.append(view_word_quiz_edit)
         elif self.page.route == "/wordbook/create":
             view_word_book_create = ViewWordBookCreate(self.page, self.session, self.top_word_book)
             self.page.views.append(view_word_book_create)
         elif self.page.route == "/wordbook/edit":
             word_book = self.top_word_book.selected_word_book
-            view_word_book_edit = ViewWordBookEdit(self.page, self.session, self.top_word_book, word_book)
+            view_word_book_edit = self.view_cache.get(self.page.route, word_book.id)
+            if view_word_book_edit is None:
+                view_word_book_edit = ViewWordBookEdit(self.page, self.session, self.top_word_book, word_book)
+                self.view_cache.put(self.page.route, word_book.id, view_word_book_edit, {
+                    get_word_book_tag(word_book.id),
+                })
+            else:
+                view_word_book_edit.reset_input_values()
             self.page.views.append(view_word_book_edit)
         elif self.page.route == "/wordbook/importer":
-            view_word_book_file_importer = ViewWordBookFileImporter(self.page, self.session, self.top_word_book)
+            # 取込後の単語一覧は画面側で再表示するため、単語帳の情報のみに依存
+            word_book = self.top_word_book.selected_word_book
+            view_word_book_file_importer = self.view_cache.get(self.page.route, word_book.id)
+            if view_word_book_file_importer is None:
+                view_word_book_file_importer = ViewWordBookFileImporter(self.page, self.session, self.top_word_book)
+                self.view_cache.put(self.page.route, word_book.id, view_word_book_file_importer, {
+                    get_word_book_tag(word_book.id),
+                })
+            else:
+                view_word_book_file_importer.reset_input_values()
             self.page.views.append(view_word_book_file_importer)
 
         self.page.update()
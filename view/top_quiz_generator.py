@@ -6,6 +6,8 @@ import datetime
 from model.models import WordBook, VocabQuizInputParam
 from service.quiz_service import QuizService
 from service.word_book_service import WordBookService
+from service.quiz_area import parse_area_str
+from service.domain_event import get_domain_event_bus, WORD_BOOK_CREATED, WORD_BOOK_UPDATED, WORD_BOOK_DELETED
 
 
 class TopQuizGenerator(ft.Column):
@@ -42,18 +44,9 @@ class TopQuizGenerator(ft.Column):
             label="テスト説明文設定",
             width=600
         )
-        self.text_field_quiz_area_from = ft.TextField(
-            label="出題範囲(from)",
-            width=180,
-            keyboard_type=KeyboardType.NUMBER,
-            input_filter=NumbersOnlyInputFilter(),
-            on_change=lambda _: self._check_all_input_values()
-        )
-        self.text_field_quiz_area_to = ft.TextField(
-            label="出題範囲(to)",
-            width=180,
-            keyboard_type=KeyboardType.NUMBER,
-            input_filter=NumbersOnlyInputFilter(),
+        self.text_field_quiz_area = ft.TextField(
+            label="出題範囲(例: 1-200, 450-600)",
+            width=400,
             on_change=lambda _: self._check_all_input_values()
         )
         self.text_field_quiz_area_limit = ft.TextField(
@@ -68,6 +61,28 @@ class TopQuizGenerator(ft.Column):
             on_change=lambda _: self._check_all_input_values()
         )
 
+        self.text_field_quiz_seed = ft.TextField(
+            label="乱数シード(空欄時は自動採番)",
+            width=260,
+            keyboard_type=KeyboardType.NUMBER,
+            input_filter=NumbersOnlyInputFilter()
+        )
+        self.text_field_exclude_recent_count = ft.TextField(
+            label="直近テストの除外件数",
+            width=200,
+            value="0",
+            keyboard_type=KeyboardType.NUMBER,
+            input_filter=NumbersOnlyInputFilter()
+        )
+        self.text_field_variant_count = ft.TextField(
+            label="生成数",
+            width=120,
+            value="10",
+            keyboard_type=KeyboardType.NUMBER,
+            input_filter=NumbersOnlyInputFilter(),
+            on_change=lambda _: self._check_all_input_values()
+        )
+
         # ドロップダウンメニューの設定
         self.dropdown_word_book = ft.Dropdown(
             border=ft.InputBorder.UNDERLINE,
@@ -84,6 +99,12 @@ class TopQuizGenerator(ft.Column):
             on_change=lambda _: self._check_all_input_values()
         )
 
+        # チェックボックスの設定
+        self.checkbox_weighted = ft.Checkbox(
+            label="出題履歴で重み付け(出題回数が少ない・最近出題していない単語を優先)",
+            value=False
+        )
+
         # ボタンの設定
         self.button_quiz_dt_picker = ft.ElevatedButton(
             "実施日の選択",
@@ -101,6 +122,12 @@ class TopQuizGenerator(ft.Column):
             disabled=True,
             on_click=lambda e: self.event_click_generate_quiz(e)
         )
+        self.button_generate_quiz_batch = ft.ElevatedButton(
+            text="テスト一括生成・保存の実行",
+            width=580,
+            disabled=True,
+            on_click=lambda e: self.event_click_generate_quiz_batch(e)
+        )
 
         # 行データの設定
         self.row_header = ft.Row(
@@ -126,12 +153,10 @@ class TopQuizGenerator(ft.Column):
             ],
             spacing=20,
         )
-        self.row_text_field_area_from_to = ft.Row(
+        self.row_text_field_area = ft.Row(
             controls=[
                 ft.Text("出題範囲:", width=100),
-                self.text_field_quiz_area_from,
-                ft.Text("～"),
-                self.text_field_quiz_area_to,
+                self.text_field_quiz_area,
                 self.text_field_quiz_area_limit
             ],
         )
@@ -141,6 +166,20 @@ class TopQuizGenerator(ft.Column):
                 self.dropdown_quiz_count
             ],
         )
+        self.row_checkbox_weighted = ft.Row(
+            controls=[
+                ft.Text("出題方法:", width=100),
+                self.checkbox_weighted
+            ],
+        )
+        self.row_text_field_quiz_seed = ft.Row(
+            controls=[
+                ft.Text("再現・除外:", width=100),
+                self.text_field_quiz_seed,
+                self.text_field_exclude_recent_count
+            ],
+            spacing=20,
+        )
         self.row_date_picker_quiz_dt = ft.Row(
             controls=[
                 ft.Text("テスト実施日:", width=100),
@@ -151,6 +190,13 @@ class TopQuizGenerator(ft.Column):
         self.row_button_generate_quiz = ft.Row(
             controls=[self.button_generate_quiz],
         )
+        self.row_button_generate_quiz_batch = ft.Row(
+            controls=[
+                self.text_field_variant_count,
+                self.button_generate_quiz_batch
+            ],
+            spacing=20,
+        )
 
         # controls設定
         self.controls = [
@@ -160,17 +206,30 @@ class TopQuizGenerator(ft.Column):
             self.row_dropdown_word_book,
             self.row_text_field_quiz_title,
             self.row_text_field_quiz_description,
-            self.row_text_field_area_from_to,
+            self.row_text_field_area,
             self.row_dropdown_quiz_count,
+            self.row_checkbox_weighted,
+            self.row_text_field_quiz_seed,
             self.row_date_picker_quiz_dt,
             ft.Divider(height=30),
-            self.row_button_generate_quiz
+            self.row_button_generate_quiz,
+            self.row_button_generate_quiz_batch
         ]
 
+        # 単語帳の追加・更新・削除時に選択肢を再設定
+        for event_name in [WORD_BOOK_CREATED, WORD_BOOK_UPDATED, WORD_BOOK_DELETED]:
+            get_domain_event_bus(self.session).subscribe(event_name, self.event_word_book_changed)
+
     #
     # イベント定義
     #
 
+    def event_word_book_changed(self, event_name: str, payload: dict):
+        if event_name == WORD_BOOK_DELETED and str(self.dropdown_word_book.value) == str(payload["word_book_id"]):
+            self.dropdown_word_book.value = ""
+        self.dropdown_word_book.options = self._get_dropdown_word_book_options()
+        self.dropdown_word_book.update()
+
     def event_select_word_book(self, e):
         word_book_id = e.control.value
         max_word_seq_no = self.word_book_service.get_max_word_seq_no(word_book_id)
@@ -188,9 +247,27 @@ class TopQuizGenerator(ft.Column):
         self.dropdown_word_book.update()
 
     def event_click_generate_quiz(self, e):
-        self._generate_new_quiz()
+        try:
+            self._generate_new_quiz()
+        except ValueError as ex:
+            # 出題範囲の単語数不足などのエラー表示
+            self._open_message_dialog(str(ex))
+            return
+
         self.lambda_quiz_check(e)
 
+    def event_click_generate_quiz_batch(self, e):
+        variant_count = int(self.text_field_variant_count.value)
+
+        try:
+            vocab_quiz_list = self.quiz_service.generate_quiz_data_batch(
+                self._get_selected_word_book(), self._get_input_param(), variant_count)
+        except ValueError as ex:
+            self._open_message_dialog(str(ex))
+            return
+
+        self._open_message_dialog(f"{len(vocab_quiz_list)}件のテストを作成しました")
+
     #
     # 各種メソッド
     #
@@ -208,8 +285,7 @@ class TopQuizGenerator(ft.Column):
     def _clear_all_input_values(self):
         self.text_field_quiz_title.value = ""
         self.text_field_quiz_description.value = ""
-        self.text_field_quiz_area_from.value = ""
-        self.text_field_quiz_area_to.value = ""
+        self.text_field_quiz_area.value = ""
         self.dropdown_word_book.value = ""
         self.dropdown_quiz_count.value = ""
 
@@ -229,7 +305,7 @@ class TopQuizGenerator(ft.Column):
 
     def _get_dropdown_quiz_count(self):
         options = []
-        count_list = [10, 20, 30, 40]
+        count_list = [10, 20, 30, 40, 50, 100, 200, 300, 500]
 
         # 単語テスト作成時選択可能な単語数オプションの設定
         for count in count_list:
@@ -243,40 +319,68 @@ class TopQuizGenerator(ft.Column):
         flag_not_empty_1 = self.text_field_quiz_title.value != ""
         flag_not_empty_2 = self.dropdown_quiz_count.value != ""
         flag_not_empty_3 = self.date_picker_quiz_dt.value != ""
-        flag_not_empty_4 = self.text_field_quiz_area_from.value != ""
-        flag_not_empty_5 = self.text_field_quiz_area_to.value != ""
-        flag_not_empty_6 = self.dropdown_quiz_count.value != ""
+        flag_not_empty_4 = self.text_field_quiz_area.value != ""
+        flag_not_empty_5 = self.dropdown_quiz_count.value != ""
 
+        # 出題範囲の書式チェック(複数範囲の指定が可能)
         flag_area_valid = False
-        if flag_not_empty_4 and flag_not_empty_5:
-            flag_area_valid = int(self.text_field_quiz_area_to.value) > int(self.text_field_quiz_area_from.value)
+        if flag_not_empty_4:
+            try:
+                flag_area_valid = len(parse_area_str(self.text_field_quiz_area.value)) > 0
+                self.text_field_quiz_area.error_text = None
+            except ValueError as e:
+                self.text_field_quiz_area.error_text = str(e)
+            self.text_field_quiz_area.update()
 
         # ボタン有効化できるかの判定
         if flag_not_empty_1 and flag_not_empty_2 and flag_not_empty_3 \
-                and flag_not_empty_4 and flag_not_empty_5 and flag_not_empty_6 \
+                and flag_not_empty_4 and flag_not_empty_5 \
                 and flag_area_valid:
             self.button_generate_quiz.disabled = False
         else:
             self.button_generate_quiz.disabled = True
 
+        # 一括生成は生成数の指定も必要
+        flag_variant_count_valid = self.text_field_variant_count.value not in ("", None) \
+            and int(self.text_field_variant_count.value) > 0
+        self.button_generate_quiz_batch.disabled = self.button_generate_quiz.disabled or not flag_variant_count_valid
+
         self.row_button_generate_quiz.update()
+        self.row_button_generate_quiz_batch.update()
 
-    def _generate_new_quiz(self):
+    def _get_selected_word_book(self):
         # WordBookの取得
         statement = select(WordBook).where(WordBook.id == self.dropdown_word_book.value)
-        word_book = self.session.exec(statement).first()
+        return self.session.exec(statement).first()
 
+    def _get_input_param(self):
         # テスト生成用のdictの作成
         vocab_quiz_input_param = VocabQuizInputParam(
             title=self.text_field_quiz_title.value,
             description=self.text_field_quiz_description.value,
             count=int(self.dropdown_quiz_count.value),
             quiz_dt=self.date_picker_quiz_dt.value,
-            area=[(int(self.text_field_quiz_area_from.value), int(self.text_field_quiz_area_to.value))],
+            area=parse_area_str(self.text_field_quiz_area.value),
+            weighted=self.checkbox_weighted.value,
+            seed=int(self.text_field_quiz_seed.value) if self.text_field_quiz_seed.value else None,
+            exclude_recent_count=int(self.text_field_exclude_recent_count.value or 0),
+        )
+        return vocab_quiz_input_param
+
+    def _open_message_dialog(self, message: str):
+        dialog = ft.AlertDialog(
+            content=ft.Text(message),
+            actions=[
+                ft.TextButton("OK", on_click=lambda _: self.page.close(dialog)),
+            ],
+            actions_alignment=ft.MainAxisAlignment.CENTER,
         )
+        self.page.open(dialog)
 
+    def _generate_new_quiz(self):
         # 単語テスト内部データの作成
-        vocab_quiz = self.quiz_service.generate_new_quiz_data(word_book, vocab_quiz_input_param, dry_run=True)
+        vocab_quiz = self.quiz_service.generate_new_quiz_data(
+            self._get_selected_word_book(), self._get_input_param(), dry_run=True)
 
         # 作成済みテストデータの設定
         self.generated_vocab_quiz = vocab_quiz
@@ -1,10 +1,38 @@
+import time
+import threading
+import traceback
 from pathlib import Path
 
 import flet as ft
-from sqlmodel import Session, select
+from sqlmodel import Session
 
-from model.models import VocabQuiz
+from model.models import VocabQuiz, WordBook
 from service.quiz_service import QuizService
+from service.domain_event import (
+    get_domain_event_bus, WORD_BOOK_UPDATED, WORD_BOOK_DELETED,
+    VOCAB_QUIZ_CREATED, VOCAB_QUIZ_UPDATED, VOCAB_QUIZ_DELETED
+)
+from service.pdf_service import PDF_MODE_WORD_TO_MEANING, PDF_MODE_MEANING_TO_WORD, PDF_MODE_MIXED
+
+# 一括保存の進捗の画面反映間隔(秒)
+EXPORT_PROGRESS_UPDATE_INTERVAL_SEC = 0.2
+
+# 作成済みテスト一覧の1回あたりの読込件数
+HISTORY_PAGE_SIZE = 100
+
+# 一覧の末尾からこの距離(ピクセル)までスクロールした時点で次のページを読み込む
+HISTORY_LOAD_MORE_THRESHOLD_PX = 300
+
+# 保存時の出題形式の選択肢(表示名, 作成する問題PDFの出力モード)
+EXPORT_MODE_OPTION_DICT = {
+    "英→日": [PDF_MODE_WORD_TO_MEANING],
+    "日→英": [PDF_MODE_MEANING_TO_WORD],
+    "混合": [PDF_MODE_MIXED],
+    "全て": [PDF_MODE_WORD_TO_MEANING, PDF_MODE_MEANING_TO_WORD, PDF_MODE_MIXED],
+}
+
+# 保存時のバリエーション数(並び順違いの問題)の上限
+EXPORT_MAX_VARIANT_COUNT = 5
 
 
 class TopQuizHistory(ft.Column):
@@ -21,6 +49,16 @@ class TopQuizHistory(ft.Column):
         # 選択済みwordbook
         self.selected_vocab_quiz = None
 
+        # 一括保存用に選択済みのテストID
+        self.selected_vocab_quiz_id_set = set()
+        self.last_progress_update_time = 0.0
+
+        # 一覧の読込状態(テストID毎の行、読込済みの末尾の(作成日時, ID)、未読込の行の有無)
+        self.data_row_dict = {}
+        self.last_history_key = None
+        self.has_more_history = True
+        self.history_load_lock = threading.Lock()
+
         # パス処理用のラムダ式
         self.lambda_quiz_edit = lambda _: self.page.go("/quiz/edit")
 
@@ -28,10 +66,55 @@ class TopQuizHistory(ft.Column):
         # Note: appendによるpage追加がないとエラー発生
         self.get_save_folder_dialog = ft.FilePicker(on_result=self.event_select_save_folder_dialog)
         self.page.overlay.append(self.get_save_folder_dialog)
+        self.get_bulk_save_folder_dialog = ft.FilePicker(on_result=self.event_select_bulk_save_folder_dialog)
+        self.page.overlay.append(self.get_bulk_save_folder_dialog)
+
+        # ボタンの設定
+        self.button_bulk_export = ft.ElevatedButton(
+            text="選択したテストを一括保存",
+            icon=ft.Icons.FOLDER_ZIP,
+            disabled=True,
+            on_click=lambda _: self.get_bulk_save_folder_dialog.get_directory_path()
+        )
+
+        # チェックボックスの設定
+        self.checkbox_combined_export = ft.Checkbox(
+            label="1つのPDFにまとめる",
+            value=False
+        )
+
+        # ドロップダウンの設定(保存時の出題形式・バリエーション数)
+        self.dropdown_export_mode = ft.Dropdown(
+            border=ft.InputBorder.UNDERLINE,
+            label="出題形式",
+            width=150,
+            value="英→日",
+            options=[ft.DropdownOption(key=x) for x in EXPORT_MODE_OPTION_DICT]
+        )
+        self.dropdown_variant_count = ft.Dropdown(
+            border=ft.InputBorder.UNDERLINE,
+            label="パターン数",
+            width=150,
+            value="1",
+            options=[ft.DropdownOption(key=str(x)) for x in range(1, EXPORT_MAX_VARIANT_COUNT + 1)]
+        )
+
+        # プログレスバー・テキストの設定
+        self.progress_bar_export = ft.ProgressBar(
+            width=300,
+            value=0,
+            visible=False
+        )
+        self.text_export_progress = ft.Text(
+            "",
+            visible=False
+        )
 
         # datatable/listviewの設定
         self.data_table_quiz_history = ft.DataTable(
             width=1000,
+            show_checkbox_column=True,
+            on_select_all=lambda e: self.event_select_all_vocab_quiz(e),
             columns=[
                 ft.DataColumn(ft.Text("単語帳", width=120)),
                 ft.DataColumn(ft.Text("テスト名", width=120)),
@@ -48,7 +131,9 @@ class TopQuizHistory(ft.Column):
             ],
             expand=1,
             spacing=10,
-            padding=10
+            padding=10,
+            on_scroll_interval=100,
+            on_scroll=lambda e: self.event_scroll_quiz_history(e)
         )
 
         # 行データの設定
@@ -56,6 +141,23 @@ class TopQuizHistory(ft.Column):
             controls=[ft.Text("作成済テスト一覧", size=20)],
             spacing=20
         )
+        self.row_export_option = ft.Row(
+            controls=[
+                ft.Text("保存形式:", width=100),
+                self.dropdown_export_mode,
+                self.dropdown_variant_count
+            ],
+            spacing=20
+        )
+        self.row_bulk_export = ft.Row(
+            controls=[
+                self.button_bulk_export,
+                self.checkbox_combined_export,
+                self.progress_bar_export,
+                self.text_export_progress
+            ],
+            spacing=20
+        )
         self.row_quiz_list_view = ft.Row(
             controls=[
                 ft.Container(
@@ -72,14 +174,42 @@ class TopQuizHistory(ft.Column):
             ft.Divider(height=30),
             self.row_header,
             ft.Divider(height=30),
+            self.row_export_option,
+            self.row_bulk_export,
             self.row_quiz_list_view
         ]
         self._set_data_table_rows()
 
+        # テスト・単語帳の更新時に影響する行のみ再描画
+        for event_name in [WORD_BOOK_UPDATED, WORD_BOOK_DELETED,
+                           VOCAB_QUIZ_CREATED, VOCAB_QUIZ_UPDATED, VOCAB_QUIZ_DELETED]:
+            get_domain_event_bus(self.session).subscribe(event_name, self.event_domain_event)
+
     #
     # イベント定義
     #
 
+    def event_domain_event(self, event_name: str, payload: dict):
+        if event_name in [VOCAB_QUIZ_CREATED, WORD_BOOK_DELETED]:
+            # 新規作成分は一覧の先頭に並ぶため、先頭ページから読み込み直す
+            self._set_data_table_rows()
+        elif event_name == VOCAB_QUIZ_UPDATED:
+            row = self.data_row_dict.get(payload["vocab_quiz_id"])
+            if row is None:
+                return
+            row.cells[1].content.value = row.data.title
+            row.cells[2].content.value = row.data.description
+        elif event_name == VOCAB_QUIZ_DELETED:
+            self._remove_data_table_row(payload["vocab_quiz_id"])
+            self._update_bulk_export_button()
+        elif event_name == WORD_BOOK_UPDATED:
+            word_book = self.session.get(WordBook, payload["word_book_id"])
+            for row in self.data_row_dict.values():
+                if row.data.word_book_id == word_book.id:
+                    row.cells[0].content.value = word_book.title
+
+        self.data_table_quiz_history.update()
+
     def event_click_vocab_quiz_edit(self, e):
         self.selected_vocab_quiz = e.control.data
         self.lambda_quiz_edit(e)
@@ -89,15 +219,9 @@ class TopQuizHistory(ft.Column):
         self.get_save_folder_dialog.get_directory_path()
 
     def event_delete_quiz_and_close_modal(self, vocab_quiz: VocabQuiz, dialog):
-        # レコードの削除
-        self.session.delete(vocab_quiz)
-        self.session.commit()
-
-        # テーブル行の再設定および再描画
-        self.data_table_quiz_history.rows = []
-        self._set_data_table_rows()
-        self.data_table_quiz_history.update()
-
+        # レコードの削除(出題履歴の集計を含む)
+        # 一覧からの行の削除は削除の通知(event_domain_event)で行う
+        self.quiz_service.delete_vocab_quiz(vocab_quiz)
         self.page.close(dialog)
 
     def event_click_delete_vocab_quiz(self, e):
@@ -119,11 +243,21 @@ class TopQuizHistory(ft.Column):
         if e.path:
             # 指定パスへのファイル保存処理
             save_folder_path = Path(e.path)
-            self.quiz_service.generate_quiz_zip_file(save_folder_path, self.selected_vocab_quiz)
+            mode_list, variant_count = self._get_export_options()
+            try:
+                self.quiz_service.generate_quiz_zip_file(save_folder_path, self.selected_vocab_quiz,
+                                                         mode_list=mode_list, variant_count=variant_count)
+                message = "単語テストのzipファイル保存が完了しました"
+                snapshot_notice = self.quiz_service.quiz_data_service.get_snapshot_notice(self.selected_vocab_quiz)
+                if snapshot_notice != "":
+                    message += "\n" + snapshot_notice
+            except ValueError as ex:
+                # 出題単語が単語帳から削除されている場合は保存しない
+                message = str(ex)
 
             # 保存完了のダイアログ表示
             dialog = ft.AlertDialog(
-                content=ft.Text("単語テストのzipファイル保存が完了しました"),
+                content=ft.Text(message),
                 actions=[
                     ft.TextButton("OK", on_click=lambda _: self.page.close(dialog)),
                 ],
@@ -135,49 +269,199 @@ class TopQuizHistory(ft.Column):
         else:
             print("get files canceled!")
 
+    def event_scroll_quiz_history(self, e: ft.OnScrollEvent):
+        # 末尾付近までスクロールした場合に次のページを読み込む
+        if e.max_scroll_extent is None or e.pixels is None:
+            return
+        if e.pixels < e.max_scroll_extent - HISTORY_LOAD_MORE_THRESHOLD_PX:
+            return
+
+        # スクロールイベントが連続して発生しても同じページを重複して読み込まない
+        if not self.history_load_lock.acquire(blocking=False):
+            return
+        try:
+            if self._append_data_table_rows():
+                self.data_table_quiz_history.update()
+        finally:
+            self.history_load_lock.release()
+
+    def event_select_vocab_quiz_row(self, e):
+        # 一括保存対象の選択・選択解除
+        row = e.control
+        row.selected = e.data == "true"
+        if row.selected:
+            self.selected_vocab_quiz_id_set.add(row.data.id)
+        else:
+            self.selected_vocab_quiz_id_set.discard(row.data.id)
+        row.update()
+        self._update_bulk_export_button()
+
+    def event_select_all_vocab_quiz(self, e):
+        selected = e.data == "true"
+        for row in self.data_table_quiz_history.rows:
+            row.selected = selected
+        if selected:
+            self.selected_vocab_quiz_id_set = {x.data.id for x in self.data_table_quiz_history.rows}
+        else:
+            self.selected_vocab_quiz_id_set = set()
+        self.data_table_quiz_history.update()
+        self._update_bulk_export_button()
+
+    def event_select_bulk_save_folder_dialog(self, e: ft.FilePickerResultEvent):
+        if not e.path:
+            print("get files canceled!")
+            return
+
+        # ワーカープロセスへ渡すため、選択済みのテストを画面側のスレッドで単語・意味を解決済みのdictに変換
+        # Note: 出題単語が単語帳から削除されたテストを含む場合は保存しない
+        vocab_quiz_list = [x.data for x in self.data_table_quiz_history.rows
+                           if x.data.id in self.selected_vocab_quiz_id_set]
+        try:
+            quiz_export_dict_list = self.quiz_service.get_quiz_export_dict_list(vocab_quiz_list)
+        except ValueError as ex:
+            self.text_export_progress.value = str(ex)
+            self.text_export_progress.visible = True
+            self.row_bulk_export.update()
+            return
+        snapshot_changed_count = sum(1 for x in vocab_quiz_list
+                                     if self.quiz_service.quiz_data_service.is_snapshot_changed(x))
+
+        self.button_bulk_export.disabled = True
+        self.progress_bar_export.value = 0
+        self.progress_bar_export.visible = True
+        self.text_export_progress.value = "PDF作成中... 0/{0}件".format(len(quiz_export_dict_list))
+        self.text_export_progress.visible = True
+        self.last_progress_update_time = 0.0
+        self.row_bulk_export.update()
+
+        # 一括保存はワーカースレッドで実行する(PDF作成はプロセスプールで並列実行)
+        mode_list, variant_count = self._get_export_options()
+        self.page.run_thread(self._run_bulk_export_worker, Path(e.path), quiz_export_dict_list,
+                             self.checkbox_combined_export.value, mode_list, variant_count, snapshot_changed_count)
+
+    def event_export_progress(self, done_count: int, total_count: int):
+        # 画面更新の間引き処理(最後の1件は必ず反映)
+        now = time.perf_counter()
+        if now - self.last_progress_update_time < EXPORT_PROGRESS_UPDATE_INTERVAL_SEC and done_count < total_count:
+            return
+        self.last_progress_update_time = now
+
+        self.progress_bar_export.value = done_count / total_count
+        self.text_export_progress.value = "PDF作成中... {0}/{1}件".format(done_count, total_count)
+        self.row_bulk_export.update()
+
     #
     # 各種メソッド
     #
 
-    def back_from_other_view(self):
+    def reload_data_table_rows(self):
         self._set_data_table_rows()
+        self.data_table_quiz_history.update()
+
+    def back_from_other_view(self):
+        # 一覧への反映は更新の通知で行うため、ここでは読み込み直さない
         self.page.go("/")
         self.page.views.pop()
         self.page.update()
 
+    def _run_bulk_export_worker(self, save_folder_path: Path, quiz_export_dict_list: list, combined: bool,
+                                mode_list: list, variant_count: int, snapshot_changed_count: int = 0):
+        # Note: PDF作成・保存中のエラーでスレッドが終了しても、一括保存を再実行できるようにする
+        try:
+            zip_file_path = self.quiz_service.generate_quiz_zip_file_bulk(
+                save_folder_path, quiz_export_dict_list,
+                progress_callback=self.event_export_progress,
+                combined=combined,
+                mode_list=mode_list,
+                variant_count=variant_count
+            )
+            self.text_export_progress.value = "{0}件のテストを保存しました: {1}".format(
+                len(quiz_export_dict_list), zip_file_path.name)
+            if snapshot_changed_count > 0:
+                # 作成後に単語帳が更新されたテストの件数を併せて表示する
+                self.text_export_progress.value += " (うち{0}件は作成後に単語帳が更新されています)".format(
+                    snapshot_changed_count)
+        except Exception as e:
+            traceback.print_exc()
+            self.text_export_progress.value = "一括保存でエラーが発生しました: {0!r}".format(e)
+        finally:
+            self.progress_bar_export.visible = False
+            self._update_bulk_export_button()
+
+    def _get_export_options(self) -> tuple[list, int]:
+        # 選択中の出題形式(問題PDFの出力モードのlist)とバリエーション数
+        mode_list = EXPORT_MODE_OPTION_DICT.get(self.dropdown_export_mode.value, [PDF_MODE_WORD_TO_MEANING])
+        variant_count = int(self.dropdown_variant_count.value or 1)
+        return mode_list, variant_count
+
+    def _update_bulk_export_button(self):
+        self.button_bulk_export.disabled = self.page.web or len(self.selected_vocab_quiz_id_set) == 0
+        self.row_bulk_export.update()
+
     def _set_data_table_rows(self):
-        rows_list = []
+        # 先頭ページから読み込み直す
+        self.data_table_quiz_history.rows = []
+        self.data_row_dict = {}
+        self.last_history_key = None
+        self.has_more_history = True
+        self._append_data_table_rows()
+
+        # 未読込・削除済みのテストは選択対象から除外
+        self.selected_vocab_quiz_id_set &= set(self.data_row_dict.keys())
 
-        # WordBookレコードの読み込み
-        statement = select(VocabQuiz)
-        vocab_quizzes_list = self.session.exec(statement)
+    def _append_data_table_rows(self) -> bool:
+        # 次のページのテストを一覧の末尾に追加する(追加した場合のみTrue)
+        if not self.has_more_history:
+            return False
+
+        # VocabQuizレコードの読み込み(内部データは読み込まず、単語帳名は同じクエリで取得)
+        vocab_quiz_page = self.quiz_service.get_vocab_quiz_history_page(self.last_history_key, HISTORY_PAGE_SIZE)
+        self.has_more_history = len(vocab_quiz_page) == HISTORY_PAGE_SIZE
+        if len(vocab_quiz_page) == 0:
+            return False
 
         # 行データの設定
-        for vocab_quiz in vocab_quizzes_list:
-            row = ft.DataRow(
-                cells=[
-                    ft.DataCell(ft.Text(vocab_quiz.word_book.title)),
-                    ft.DataCell(ft.Text(vocab_quiz.title)),
-                    ft.DataCell(ft.Text(vocab_quiz.description)),
-                    ft.DataCell(ft.Text(vocab_quiz.created_at.strftime('%Y-%m-%d %H:%M'))),
-                    ft.DataCell(ft.OutlinedButton(
-                        text="編集",
-                        data=vocab_quiz,
-                        on_click=lambda e: self.event_click_vocab_quiz_edit(e),
-                    )),
-                    ft.DataCell(ft.OutlinedButton(
-                        text="保存",
-                        data=vocab_quiz,
-                        on_click=lambda e: self.event_click_file_generate(e),
-                        disabled=self.page.web
-                    )),
-                    ft.DataCell(ft.IconButton(
-                        icon=ft.Icons.DELETE,
-                        data=vocab_quiz,
-                        on_click=lambda e: self.event_click_delete_vocab_quiz(e)
-                    )),
-                ]
-            )
-            rows_list.append(row)
+        for vocab_quiz, word_book_title in vocab_quiz_page:
+            row = self._create_data_table_row(vocab_quiz, word_book_title)
+            self.data_row_dict[vocab_quiz.id] = row
+            self.data_table_quiz_history.rows.append(row)
 
-        self.data_table_quiz_history.rows = rows_list
+        last_vocab_quiz = vocab_quiz_page[-1][0]
+        self.last_history_key = (last_vocab_quiz.created_at, last_vocab_quiz.id)
+        return True
+
+    def _remove_data_table_row(self, vocab_quiz_id: int):
+        # 削除したテストの行のみ一覧から除く(他の行は再作成しない)
+        row = self.data_row_dict.pop(vocab_quiz_id, None)
+        if row is not None:
+            self.data_table_quiz_history.rows.remove(row)
+        self.selected_vocab_quiz_id_set.discard(vocab_quiz_id)
+
+    def _create_data_table_row(self, vocab_quiz: VocabQuiz, word_book_title: str) -> ft.DataRow:
+        return ft.DataRow(
+            data=vocab_quiz,
+            selected=vocab_quiz.id in self.selected_vocab_quiz_id_set,
+            on_select_changed=lambda e: self.event_select_vocab_quiz_row(e),
+            cells=[
+                ft.DataCell(ft.Text(word_book_title)),
+                ft.DataCell(ft.Text(vocab_quiz.title)),
+                ft.DataCell(ft.Text(vocab_quiz.description)),
+                ft.DataCell(ft.Text(vocab_quiz.created_at.strftime('%Y-%m-%d %H:%M'))),
+                ft.DataCell(ft.OutlinedButton(
+                    text="編集",
+                    data=vocab_quiz,
+                    on_click=lambda e: self.event_click_vocab_quiz_edit(e),
+                )),
+                ft.DataCell(ft.OutlinedButton(
+                    text="保存",
+                    data=vocab_quiz,
+                    on_click=lambda e: self.event_click_file_generate(e),
+                    disabled=self.page.web
+                )),
+                ft.DataCell(ft.IconButton(
+                    icon=ft.Icons.DELETE,
+                    data=vocab_quiz,
+                    on_click=lambda e: self.event_click_delete_vocab_quiz(e)
+                )),
+            ]
+        )
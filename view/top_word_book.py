@@ -2,6 +2,8 @@ import flet as ft
 from sqlmodel import Session, select
 
 from model.models import WordBook
+from service.word_book_service import WordBookService
+from service.domain_event import get_domain_event_bus, WORD_BOOK_CREATED, WORD_BOOK_UPDATED, WORD_BOOK_DELETED
 
 
 class TopWordBook(ft.Column):
@@ -12,6 +14,9 @@ class TopWordBook(ft.Column):
         self.page = page
         self.session = session
 
+        # サービスの初期化
+        self.word_book_service = WordBookService(self.session)
+
         # パス処理用のラムダ式
         self.lambda_word_book_create = lambda _: self.page.go("/wordbook/create")
         self.lambda_word_book_edit = lambda _: self.page.go("/wordbook/edit")
@@ -20,6 +25,9 @@ class TopWordBook(ft.Column):
         # 選択済みwordbook
         self.selected_word_book = None
 
+        # 単語帳ID -> 一覧の行
+        self.data_row_dict = {}
+
         # ボタンの設定
         self.button_create_word_book = ft.ElevatedButton(
             text="単語帳の新規作成",
@@ -79,10 +87,24 @@ class TopWordBook(ft.Column):
         # datatableへの行の設定
         self._set_data_table_rows()
 
+        # 単語帳の追加・更新・削除時に一覧へ反映
+        for event_name in [WORD_BOOK_CREATED, WORD_BOOK_UPDATED, WORD_BOOK_DELETED]:
+            get_domain_event_bus(self.session).subscribe(event_name, self.event_domain_event)
+
     #
     # イベント定義
     #
 
+    def event_domain_event(self, event_name: str, payload: dict):
+        row = self.data_row_dict.get(payload["word_book_id"])
+        if event_name == WORD_BOOK_UPDATED and row is not None:
+            # 更新した単語帳の行のみ再描画
+            row.cells[1].content.value = row.data.title
+            row.cells[2].content.value = row.data.short_name
+        else:
+            self._set_data_table_rows()
+        self.data_table_word_book.update()
+
     def event_click_word_book_edit(self, e):
         self.selected_word_book = e.control.data
         self.lambda_word_book_edit(e)
@@ -92,14 +114,9 @@ class TopWordBook(ft.Column):
         self.lambda_word_book_file_importer(e)
 
     def event_delete_word_book_and_close_modal(self, word_book: WordBook, dialog):
-        # レコードの削除
-        self.session.delete(word_book)
-        self.session.commit()
-
-        # テーブル行の再設定および再描画
-        self._set_data_table_rows()
-        self.data_table_word_book.update()
-
+        # レコードの削除(紐づく単語・テストデータを含む)
+        # 一覧への反映は削除の通知(event_domain_event)で行う
+        self.word_book_service.delete_wordbook(word_book)
         self.page.close(dialog)
 
     def event_click_delete_word_book(self, e):
@@ -122,13 +139,14 @@ class TopWordBook(ft.Column):
     #
 
     def back_from_other_view(self):
-        self._set_data_table_rows()
+        # 一覧への反映は更新の通知で行うため、ここでは読み込み直さない
         self.page.go("/")
         self.page.views.pop()
         self.page.update()
 
     def _set_data_table_rows(self):
         rows_list = []
+        self.data_row_dict = {}
 
         # WordBookレコードの読み込み
         statement = select(WordBook)
@@ -137,6 +155,7 @@ class TopWordBook(ft.Column):
         # 行データの設定
         for word_book in word_book_list:
             row = ft.DataRow(
+                data=word_book,
                 cells=[
                     ft.DataCell(ft.Text(word_book.id)),
                     ft.DataCell(ft.Text(word_book.title)),
@@ -159,5 +178,6 @@ class TopWordBook(ft.Column):
                 ]
             )
             rows_list.append(row)
+            self.data_row_dict[word_book.id] = row
 
         self.data_table_word_book.rows = rows_list
@@ -0,0 +1,92 @@
+import threading
+from collections import OrderedDict
+
+import flet as ft
+
+# 保持する画面数の上限の既定値
+DEFAULT_VIEW_CACHE_MAX_ENTRIES = 16
+
+
+def get_word_book_tag(word_book_id: int) -> str:
+    # 単語帳の情報(名称等)に依存する画面のタグ
+    return f"word_book:{int(word_book_id)}"
+
+
+def get_word_items_tag(word_book_id: int) -> str:
+    # 単語帳の単語データに依存する画面のタグ
+    return f"word_items:{int(word_book_id)}"
+
+
+def get_vocab_quiz_tag(vocab_quiz_id: int) -> str:
+    # テストの情報に依存する画面のタグ
+    return f"vocab_quiz:{int(vocab_quiz_id)}"
+
+
+class ViewCache:
+    # ルート・対象データのID毎に作成済みの画面を保持し、画面遷移時に再利用する
+    # Note: 画面毎に依存するデータのタグを登録し、データ更新の通知時にタグ単位で破棄する
+    def __init__(self, max_entries: int = DEFAULT_VIEW_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+
+        # 統計情報
+        self.hit_count = 0
+        self.miss_count = 0
+        self.eviction_count = 0
+        self.invalidation_count = 0
+
+        # (ルート, 対象データID) -> (画面, タグのset)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    #
+    # 各種メソッド
+    #
+
+    def get(self, route: str, entity_id: int) -> ft.View | None:
+        key = (route, entity_id)
+
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.miss_count += 1
+                return None
+
+            # 最近使用した要素として末尾に移動
+            self._data.move_to_end(key)
+            self.hit_count += 1
+            return entry[0]
+
+    def put(self, route: str, entity_id: int, view: ft.View, tag_set: set):
+        with self._lock:
+            self._data.pop((route, entity_id), None)
+            self._data[(route, entity_id)] = (view, set(tag_set))
+
+            # 上限件数に収まるまで古い要素から破棄
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.eviction_count += 1
+
+    def invalidate_tag(self, tag: str):
+        # 指定したタグの画面のみ破棄(次回の画面遷移時に再作成)
+        with self._lock:
+            key_list = [x for x, (_, tag_set) in self._data.items() if tag in tag_set]
+            for key in key_list:
+                del self._data[key]
+            self.invalidation_count += len(key_list)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            total_count = self.hit_count + self.miss_count
+            return {
+                "entry_count": len(self._data),
+                "max_entries": self.max_entries,
+                "hit_count": self.hit_count,
+                "miss_count": self.miss_count,
+                "hit_ratio": self.hit_count / total_count if total_count > 0 else 0.0,
+                "eviction_count": self.eviction_count,
+                "invalidation_count": self.invalidation_count,
+            }
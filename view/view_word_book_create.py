@@ -4,6 +4,7 @@ from sqlmodel import Session
 
 from model.models import WordBook
 from view.top_word_book import TopWordBook
+from service.domain_event import get_domain_event_bus, WORD_BOOK_CREATED
 
 
 class ViewWordBookCreate(ft.View):
@@ -131,6 +132,7 @@ class ViewWordBookCreate(ft.View):
         )
         self.session.add(word_book)
         self.session.commit()
+        get_domain_event_bus(self.session).publish(WORD_BOOK_CREATED, word_book_id=word_book.id)
 
         # トップへと戻る
         self.top_word_book.back_from_other_view()
@@ -4,6 +4,7 @@ from sqlmodel import Session, select
 
 from model.models import WordBook
 from view.top_word_book import TopWordBook
+from service.domain_event import get_domain_event_bus, WORD_BOOK_UPDATED
 
 
 class ViewWordBookEdit(ft.View):
@@ -150,6 +151,7 @@ class ViewWordBookEdit(ft.View):
         # 既存レコードの更新
         self.session.add(self.word_book)
         self.session.commit()
+        get_domain_event_bus(self.session).publish(WORD_BOOK_UPDATED, word_book_id=self.word_book.id)
 
         # 新規レコードを反映の上、トップに戻る
         self.top_word_book.back_from_other_view()
@@ -161,3 +163,18 @@ class ViewWordBookEdit(ft.View):
             self.button_submit.disabled = False
         self.button_submit.update()
 
+    #
+    # 各種メソッド
+    #
+
+    def reset_input_values(self):
+        # 再表示時に未保存の入力内容を破棄する
+        self.text_field_title.value = self.word_book.title
+        self.text_field_short_name.value = self.word_book.short_name
+        self.text_field_author.value = self.word_book.author
+        self.text_field_publisher.value = self.word_book.publisher
+        self.text_field_year.value = self.word_book.year
+        self.text_field_version.value = self.word_book.version
+        self.text_field_isbn.value = self.word_book.isbn
+        self.text_field_note.value = self.word_book.note
+        self.button_submit.disabled = False
@@ -1,3 +1,6 @@
+import time
+import threading
+import traceback
 from pathlib import Path
 
 import flet as ft
@@ -5,9 +8,14 @@ from flet.core.file_picker import FilePickerFileType
 from flet.core.page import Page
 from sqlmodel import Session, select
 
-from model.models import WordItem, WordMeaning
+from model.models import WordBook, WordItem, WordMeaning, WordImportProgress
 from view.top_word_book import TopWordBook
+from view.virtual_word_list import VirtualWordList
 from service.word_book_service import WordBookService
+from service.domain_event import DOMAIN_EVENT_BUS_KEY, get_domain_event_bus
+
+# 取込進捗の画面反映間隔(秒)
+IMPORT_PROGRESS_UPDATE_INTERVAL_SEC = 0.2
 
 
 class ViewWordBookFileImporter(ft.View):
@@ -19,6 +27,7 @@ class ViewWordBookFileImporter(ft.View):
 
         # 各種情報の設定
         self.page = page
+        self.session = session
         self.word_book = top_word_book.selected_word_book
 
         # サービスの初期化
@@ -27,6 +36,10 @@ class ViewWordBookFileImporter(ft.View):
         # 画像形式
         self.allowed_extensions_list = ["csv"]
 
+        # バックグラウンド取込処理の制御用
+        self.import_cancel_event = None
+        self.last_progress_update_time = 0.0
+
 
         #
         # 各種UIの定義
@@ -36,6 +49,8 @@ class ViewWordBookFileImporter(ft.View):
         # Note: appendによるpage追加がないとエラー発生
         get_input_file_dialog = ft.FilePicker(on_result=self.event_get_input_file_result)
         self.page.overlay.append(get_input_file_dialog)
+        get_input_folder_dialog = ft.FilePicker(on_result=self.event_get_input_folder_result)
+        self.page.overlay.append(get_input_folder_dialog)
 
         # テキストの設定
         self.text_input_file_load_finished = ft.Text(
@@ -43,6 +58,24 @@ class ViewWordBookFileImporter(ft.View):
             visible=False
         )
 
+        self.text_import_progress = ft.Text(
+            "",
+            visible=False
+        )
+
+        # チェックボックスの設定
+        self.checkbox_incremental = ft.Checkbox(
+            label="差分更新(変更のあった単語のみ反映)",
+            value=False
+        )
+
+        # プログレスバーの設定
+        self.progress_bar_import = ft.ProgressBar(
+            width=600,
+            value=0,
+            visible=False
+        )
+
         # テキストフィールドの設定
         self.text_field_word_book_title = ft.TextField(
             label="タイトル",
@@ -51,26 +84,16 @@ class ViewWordBookFileImporter(ft.View):
             read_only=True
         )
         self.text_field_input_file_path = ft.TextField(
-            label="読込ファイルパス(CSV形式)",
+            label="読込ファイル/フォルダパス(CSV形式)",
             width=500,
             read_only=True
         )
 
-        # datatableの設定
-        self.data_table_word_item_data = ft.DataTable(
-            columns=[
-                ft.DataColumn(ft.Text("No")),
-                ft.DataColumn(ft.Text("単語")),
-                ft.DataColumn(ft.Text("意味")),
-            ]
-        )
-        self.list_view_word_item_data = ft.ListView(
-            controls=[
-                self.data_table_word_item_data
-            ],
-            expand=1,
-            spacing=10,
-            padding=20
+        # 単語一覧の設定(表示範囲の行のみ作成)
+        self.virtual_word_list_item_data = VirtualWordList(
+            column_list=[("No", 80), ("単語", 250), ("意味", 600)],
+            width=960,
+            height=460
         )
 
         # ボタンの設定
@@ -83,12 +106,25 @@ class ViewWordBookFileImporter(ft.View):
                 allowed_extensions=self.allowed_extensions_list,
             ),
         )
+        self.button_select_input_folder_path = ft.FilledButton(
+            text="フォルダ指定",
+            width=150,
+            icon=ft.Icons.FOLDER_OPEN,
+            on_click=lambda _: get_input_folder_dialog.get_directory_path(),
+        )
         self.button_input_file_load = ft.FilledButton(
             text="単語データ登録・更新開始",
             width=600,
             disabled=True,
             on_click=lambda _: self.event_start_input_file_load()
         )
+        self.button_cancel_input_file_load = ft.OutlinedButton(
+            text="中止",
+            width=100,
+            icon=ft.Icons.CANCEL,
+            visible=False,
+            on_click=lambda _: self.event_cancel_input_file_load()
+        )
 
         # 行の設定
         self.row_word_book_title = ft.Row(
@@ -101,21 +137,31 @@ class ViewWordBookFileImporter(ft.View):
             controls=[
                 ft.Text("対象入力ファイル", width=100),
                 self.text_field_input_file_path,
-                self.button_select_input_file_path
+                self.button_select_input_file_path,
+                self.button_select_input_folder_path
             ]
         )
         self.row_start_input_file_load = ft.Row(
             controls=[
                 self.button_input_file_load,
+                self.checkbox_incremental,
+                self.button_cancel_input_file_load,
                 self.text_input_file_load_finished
             ]
         )
+        self.row_import_progress = ft.Row(
+            controls=[
+                self.progress_bar_import,
+                self.text_import_progress
+            ]
+        )
         self.row_word_book_item_data = ft.Row(
             controls=[
                 ft.Container(
-                    content=self.list_view_word_item_data,
+                    content=self.virtual_word_list_item_data,
                     height=480,
-                    width=1000
+                    width=1000,
+                    padding=10
                 ),
             ],
             scroll="auto",
@@ -126,10 +172,11 @@ class ViewWordBookFileImporter(ft.View):
             self.row_word_book_title,
             self.row_input_file_path,
             self.row_start_input_file_load,
+            self.row_import_progress,
             self.row_word_book_item_data
         ])
 
-        # datatableへの行の設定
+        # 単語一覧の行データの設定
         self._set_data_table_rows()
 
     #
@@ -149,34 +196,147 @@ class ViewWordBookFileImporter(ft.View):
         else:
             print("get files canceled!")
 
+    def event_get_input_folder_result(self, e: ft.FilePickerResultEvent):
+        if e.path:
+            # フォルダパスの取得(フォルダ内の全CSVファイルが対象)
+            self.text_field_input_file_path.value = e.path
+            self.text_field_input_file_path.update()
+            self.text_input_file_load_finished.visible = False
+            self.text_input_file_load_finished.update()
+            self.button_input_file_load.disabled = False
+            self.button_input_file_load.update()
+
     def event_start_input_file_load(self):
-        self.button_input_file_load.disabled = False
-        self.button_input_file_load.update()
+        self.button_input_file_load.disabled = True
+        self.button_select_input_file_path.disabled = True
+        self.button_select_input_folder_path.disabled = True
+        self.checkbox_incremental.disabled = True
+        self.button_cancel_input_file_load.visible = True
+        self.button_cancel_input_file_load.disabled = False
+        self.text_input_file_load_finished.visible = False
+        self.progress_bar_import.value = 0
+        self.progress_bar_import.visible = True
+        self.text_import_progress.value = "読込準備中..."
+        self.text_import_progress.visible = True
+        self.update()
 
+        # 取込処理はワーカースレッドで実行する
         file_path = Path(self.text_field_input_file_path.value)
-        self.wordbook_service.import_wordbook_contents(self.word_book, file_path)
+        self.import_cancel_event = threading.Event()
+        self.last_progress_update_time = 0.0
+        incremental = self.checkbox_incremental.value
+        self.page.run_thread(self._run_import_worker, self.word_book.id, file_path, incremental,
+                             self.import_cancel_event)
+
+    def event_cancel_input_file_load(self):
+        if self.import_cancel_event is not None:
+            self.import_cancel_event.set()
+
+        self.button_cancel_input_file_load.disabled = True
+        self.text_import_progress.value = "中止処理中..."
+        self.update()
 
-        self.text_input_file_load_finished.visible = True
-        self.text_input_file_load_finished.update()
+    def event_import_progress(self, progress: WordImportProgress):
+        # 画面更新の間引き処理
+        now = time.perf_counter()
+        if now - self.last_progress_update_time < IMPORT_PROGRESS_UPDATE_INTERVAL_SEC:
+            return
+        self.last_progress_update_time = now
+
+        if progress.total_count > 0:
+            self.progress_bar_import.value = min(progress.parsed_count / progress.total_count, 1.0)
+
+        eta_str = "-" if progress.eta_sec is None else "{0:.0f}秒".format(progress.eta_sec)
+        self.text_import_progress.value = "読込: {0}/{1}件, 登録: {2}件, {3:.0f}件/秒, 残り: {4}".format(
+            progress.parsed_count, progress.total_count, progress.inserted_count, progress.rows_per_sec, eta_str)
+        self.row_import_progress.update()
 
     #
     # 各種メソッド
     #
 
+    def reset_input_values(self):
+        # 再表示時に前回の取込結果・進捗の表示と指定済みのパスを破棄する
+        # Note: 取込中(ワーカースレッド実行中)の場合は進捗の表示を継続する
+        if self.import_cancel_event is not None:
+            return
+        self.text_field_input_file_path.value = ""
+        self.text_input_file_load_finished.visible = False
+        self.text_import_progress.value = ""
+        self.text_import_progress.visible = False
+        self.progress_bar_import.value = 0
+        self.progress_bar_import.visible = False
+        self.checkbox_incremental.value = False
+        self.button_input_file_load.disabled = True
+
+    def _run_import_worker(self, word_book_id: int, file_path: Path, incremental: bool,
+                           cancel_event: threading.Event):
+        # ワーカースレッド専用のセッションで取込処理を実行
+        # Note: 取込中のエラーでスレッドが終了しても、画面の操作を再開できるようにする
+        try:
+            # Note: データ更新の通知は画面側のセッションと同じ通知先(ページ)へ行う
+            worker_info = {DOMAIN_EVENT_BUS_KEY: get_domain_event_bus(self.session)}
+            with Session(self.session.get_bind(), info=worker_info) as worker_session:
+                worker_service = WordBookService(worker_session)
+                word_book = worker_session.get(WordBook, word_book_id)
+                if file_path.is_dir():
+                    import_result = worker_service.import_wordbook_folder(
+                        word_book, file_path,
+                        incremental=incremental,
+                        progress_callback=self.event_import_progress,
+                        cancel_event=cancel_event
+                    )
+                else:
+                    import_result = worker_service.import_wordbook_contents(
+                        word_book, file_path,
+                        incremental=incremental,
+                        progress_callback=self.event_import_progress,
+                        cancel_event=cancel_event
+                    )
+
+            # 結果の表示
+            if import_result.cancelled:
+                self.text_input_file_load_finished.value = "登録処理を中止しました"
+            elif incremental:
+                self.text_input_file_load_finished.value = "差分更新が完了しました(追加{0}件, 更新{1}件, 無効化{2}件)".format(
+                    import_result.inserted_count, import_result.updated_count, import_result.deactivated_count)
+                self.progress_bar_import.value = 1.0
+            else:
+                self.text_input_file_load_finished.value = "登録処理が完了しました({0}件, {1:.0f}件/秒, エラー{2}件)".format(
+                    import_result.row_count, import_result.rows_per_sec, import_result.error_count)
+                if import_result.resumed:
+                    self.text_input_file_load_finished.value += " ※前回中断位置から再開"
+                self.progress_bar_import.value = 1.0
+        except Exception as e:
+            traceback.print_exc()
+            self.text_input_file_load_finished.value = "登録処理でエラーが発生しました: {0!r}".format(e)
+            self.progress_bar_import.visible = False
+        finally:
+            self.import_cancel_event = None
+            self.text_input_file_load_finished.visible = True
+            self.text_import_progress.visible = False
+            self.button_cancel_input_file_load.visible = False
+            self.button_select_input_file_path.disabled = False
+            self.button_select_input_folder_path.disabled = False
+            self.checkbox_incremental.disabled = False
+            self.button_input_file_load.disabled = False
+
+            # 登録済み単語一覧の再表示
+            # Note: 画面側のセッションはワーカースレッドで使用せず、再表示用のセッションで取得する
+            with Session(self.session.get_bind()) as refresh_session:
+                refresh_service = WordBookService(refresh_session)
+                self.virtual_word_list_item_data.refresh(
+                    self._get_data_source(refresh_service, refresh_session.get(WordBook, word_book_id)))
+            self.update()
+
     def _set_data_table_rows(self):
-        rows_list = []
-
-        # 行データの設定
-        word_item_info_list = self.wordbook_service.get_word_item_info_list(self.word_book)
-
-        for info in word_item_info_list:
-            row = ft.DataRow(
-                cells=[
-                    ft.DataCell(ft.Text(info.seq_no)),
-                    ft.DataCell(ft.Text(info.word)),
-                    ft.DataCell(ft.Text(info.meaning)),
-                ]
-            )
-            rows_list.append(row)
-
-        self.data_table_word_item_data.rows = rows_list
+        # 行データはスクロール位置に応じてページ単位で取得する(ページ先頭の行のキーから取得)
+        self.virtual_word_list_item_data.set_data_source(*self._get_data_source(self.wordbook_service, self.word_book))
+
+    def _get_data_source(self, wordbook_service: WordBookService, word_book: WordBook) -> tuple:
+        # 一覧の(行数, 行データ, ページのキー)の取得処理
+        return (
+            lambda: wordbook_service.get_word_item_count(word_book),
+            lambda page_key, limit: wordbook_service.get_word_item_row_list(word_book, page_key, limit),
+            lambda page_size: wordbook_service.get_word_item_page_key_list(word_book, page_size)
+        )
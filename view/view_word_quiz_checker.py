@@ -4,6 +4,7 @@ from sqlmodel import Session
 
 from model.models import VocabQuiz
 from view.top_quiz_history import TopQuizHistory
+from view.virtual_word_list import VirtualWordList
 
 
 class ViewWordQuizChecker(ft.View):
@@ -46,22 +47,11 @@ class ViewWordQuizChecker(ft.View):
             on_click=lambda _: self.event_click_create_vocab_quiz()
         )
 
-        # datatableの設定
-        self.data_table_vocab_quiz_data = ft.DataTable(
-            columns=[
-                ft.DataColumn(ft.Text("No")),
-                ft.DataColumn(ft.Text("単語ID")),
-                ft.DataColumn(ft.Text("単語")),
-                ft.DataColumn(ft.Text("意味")),
-            ]
-        )
-        self.list_view_vocab_quiz_data = ft.ListView(
-            controls=[
-                self.data_table_vocab_quiz_data
-            ],
-            expand=1,
-            spacing=10,
-            padding=20
+        # 出題単語一覧の設定(表示範囲の行のみ作成)
+        self.virtual_word_list_vocab_quiz_data = VirtualWordList(
+            column_list=[("No", 60), ("単語ID", 80), ("単語", 250), ("意味", 550)],
+            width=960,
+            height=430
         )
 
         # 行の設定
@@ -85,9 +75,10 @@ class ViewWordQuizChecker(ft.View):
         self.row_quiz_vocab_quiz_data = ft.Row(
             controls=[
                 ft.Container(
-                    content=self.list_view_vocab_quiz_data,
+                    content=self.virtual_word_list_vocab_quiz_data,
                     height=450,
-                    width=1000
+                    width=1000,
+                    padding=10
                 ),
             ],
             scroll="auto",
@@ -105,7 +96,7 @@ class ViewWordQuizChecker(ft.View):
             self.row_button_submit
         ]
 
-        # datatableへの行の設定
+        # 出題単語一覧の行データの設定
         self._set_data_table_rows(vocab_quiz)
 
     #
@@ -113,9 +104,8 @@ class ViewWordQuizChecker(ft.View):
     #
 
     def event_click_create_vocab_quiz(self):
-        # 新規レコードの追加
-        self.session.add(self.vocab_quiz)
-        self.session.commit()
+        # 新規レコードの追加(出題履歴の集計を含む)
+        self.top_quiz_history.quiz_service.save_vocab_quiz_list([self.vocab_quiz])
 
         # トップへと戻る
         self.top_quiz_history.back_from_other_view()
@@ -125,20 +115,17 @@ class ViewWordQuizChecker(ft.View):
     #
 
     def _set_data_table_rows(self, vocab_quiz: VocabQuiz):
-        rows_list = []
-
-        # 行データの設定
-        quiz_data = vocab_quiz.quiz_data["item_list"]
-
-        for index, word_info in enumerate(quiz_data, start=1):
-            row = ft.DataRow(
-                cells=[
-                    ft.DataCell(ft.Text(str(index))),
-                    ft.DataCell(ft.Text(word_info["seq_no"])),
-                    ft.DataCell(ft.Text(word_info["word"])),
-                    ft.DataCell(ft.Text(word_info["meaning"])),
-                ]
-            )
-            rows_list.append(row)
-
-        self.data_table_vocab_quiz_data.rows = rows_list
+        # 行データの設定(単語・意味は作成時にキャッシュ済み)
+        item_list = self.top_quiz_history.quiz_service.quiz_data_service.get_item_list(vocab_quiz)
+
+        # 表示範囲の行データのみ作成する
+        self.virtual_word_list_vocab_quiz_data.set_data_source(
+            lambda: len(item_list),
+            lambda offset, limit: self._get_row_list(item_list, offset, limit)
+        )
+
+    def _get_row_list(self, item_list: list, offset: int, limit: int) -> list:
+        return [
+            [index, word_info["seq_no"], word_info["word"], word_info["meaning"]]
+            for index, word_info in enumerate(item_list[offset:offset + limit], start=offset + 1)
+        ]
@@ -6,6 +6,8 @@ from sqlmodel import Session, select
 
 from model.models import VocabQuiz
 from view.top_quiz_history import TopQuizHistory
+from view.virtual_word_list import VirtualWordList
+from service.domain_event import get_domain_event_bus, VOCAB_QUIZ_UPDATED
 
 
 class ViewWordQuizEdit(ft.View):
@@ -24,25 +26,15 @@ class ViewWordQuizEdit(ft.View):
         # datepickerの設定
         self.date_picker_quiz_dt = ft.DatePicker(
             first_date=datetime.datetime(year=2020, month=1, day=1),
+            value=self.vocab_quiz.quiz_dt,
             on_change=self.event_change_date_pick
         )
 
-        # datatableの設定
-        self.data_table_vocab_quiz_data = ft.DataTable(
-            columns=[
-                ft.DataColumn(ft.Text("No")),
-                ft.DataColumn(ft.Text("単語ID")),
-                ft.DataColumn(ft.Text("単語")),
-                ft.DataColumn(ft.Text("意味")),
-            ]
-        )
-        self.list_view_vocab_quiz_data = ft.ListView(
-            controls=[
-                self.data_table_vocab_quiz_data
-            ],
-            expand=1,
-            spacing=10,
-            padding=20
+        # 出題単語一覧の設定(表示範囲の行のみ作成)
+        self.virtual_word_list_vocab_quiz_data = VirtualWordList(
+            column_list=[("No", 60), ("単語ID", 80), ("単語", 250), ("意味", 550)],
+            width=960,
+            height=440
         )
 
         # テキストフィールドの設定
@@ -63,6 +55,13 @@ class ViewWordQuizEdit(ft.View):
             value=self.vocab_quiz.quiz_dt.strftime("%Y-%m-%d"),
         )
 
+        # テキストの設定
+        self.text_snapshot_changed = ft.Text(
+            "",
+            color=ft.Colors.RED,
+            visible=False
+        )
+
         # ボタンの設定
         self.button_quiz_dt_picker = ft.ElevatedButton(
             "実施日の選択",
@@ -97,9 +96,10 @@ class ViewWordQuizEdit(ft.View):
         self.row_quiz_vocab_quiz_data = ft.Row(
             controls=[
                 ft.Container(
-                    content=self.list_view_vocab_quiz_data,
+                    content=self.virtual_word_list_vocab_quiz_data,
                     height=460,
-                    width=1000
+                    width=1000,
+                    padding=10
                 ),
             ],
             scroll="auto",
@@ -113,11 +113,12 @@ class ViewWordQuizEdit(ft.View):
             self.row_text_field_title,
             self.row_text_field_description,
             self.row_date_picker_quiz_dt,
+            self.text_snapshot_changed,
             self.row_quiz_vocab_quiz_data,
             self.row_button_submit
         ]
 
-        # datatableへの行の設定
+        # 出題単語一覧の行データの設定
         self._set_data_table_rows(vocab_quiz)
 
     #
@@ -152,25 +153,35 @@ class ViewWordQuizEdit(ft.View):
         # 既存レコードの更新
         self.session.add(vocab_quiz)
         self.session.commit()
+        get_domain_event_bus(self.session).publish(VOCAB_QUIZ_UPDATED,
+                                                   word_book_id=vocab_quiz.word_book_id, vocab_quiz_id=vocab_quiz.id)
 
         # 新規レコードを反映の上、トップに戻る
         self.top_quiz_history.back_from_other_view()
 
+    def reset_input_values(self):
+        # 再表示時に未保存の入力内容を破棄する(出題単語一覧は作成済みのものを使用)
+        self.text_field_title.value = self.vocab_quiz.title
+        self.text_field_description.value = self.vocab_quiz.description
+        self.text_field_quiz_dt.value = self.vocab_quiz.quiz_dt.strftime("%Y-%m-%d")
+        self.date_picker_quiz_dt.value = self.vocab_quiz.quiz_dt
+        self.button_submit.disabled = False
+
     def _set_data_table_rows(self, vocab_quiz: VocabQuiz):
-        rows_list = []
-
-        # 行データの設定
-        quiz_data = vocab_quiz.quiz_data
-
-        for index, word_item in enumerate(quiz_data["item_list"], start=1):
-            row = ft.DataRow(
-                cells=[
-                    ft.DataCell(ft.Text(str(index))),
-                    ft.DataCell(ft.Text(word_item["seq_no"])),
-                    ft.DataCell(ft.Text(word_item["word"])),
-                    ft.DataCell(ft.Text(word_item["meaning"])),
-                ]
-            )
-            rows_list.append(row)
-
-        self.data_table_vocab_quiz_data.rows = rows_list
+        # 行データの設定(単語・意味は単語アイテムIDから解決する)
+        quiz_data_service = self.top_quiz_history.quiz_service.quiz_data_service
+        item_list = quiz_data_service.get_item_list(vocab_quiz)
+        self.text_snapshot_changed.value = quiz_data_service.get_snapshot_notice(vocab_quiz)
+        self.text_snapshot_changed.visible = self.text_snapshot_changed.value != ""
+
+        # 表示範囲の行データのみ作成する
+        self.virtual_word_list_vocab_quiz_data.set_data_source(
+            lambda: len(item_list),
+            lambda offset, limit: self._get_row_list(item_list, offset, limit)
+        )
+
+    def _get_row_list(self, item_list: list, offset: int, limit: int) -> list:
+        return [
+            [index, word_item["seq_no"], word_item["word"], word_item["meaning"]]
+            for index, word_item in enumerate(item_list[offset:offset + limit], start=offset + 1)
+        ]
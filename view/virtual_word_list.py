@@ -0,0 +1,189 @@
+import math
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+import flet as ft
+
+# 1行あたりの高さ(ピクセル、全行で固定)
+VIRTUAL_LIST_ROW_HEIGHT = 32
+
+# 見出し行の高さ(ピクセル)
+VIRTUAL_LIST_HEADER_HEIGHT = 36
+
+# データ取得の単位(行数)と保持するページ数の上限
+VIRTUAL_LIST_PAGE_SIZE = 100
+VIRTUAL_LIST_MAX_CACHED_PAGES = 8
+
+# 表示範囲の前後に余分に作成しておく行数(スクロール時のちらつき防止)
+VIRTUAL_LIST_OVERSCAN_ROWS = 5
+
+
+class VirtualWordList(ft.Column):
+    # 表示範囲の行のみコントロールを作成し、スクロールに合わせて同じコントロールを使い回す一覧
+    # Note: 全行分の高さの領域内で表示用の行の位置をずらして描画するため、行数によらずコントロール数は一定
+    # Note: 行データはページ単位で取得し、直近のページのみ保持する
+    def __init__(self, column_list: list, width: int, height: int, row_height: int = VIRTUAL_LIST_ROW_HEIGHT):
+        super().__init__()
+
+        # 列の設定((見出し, 幅)のlist)
+        self.column_list = column_list
+        self.row_height = row_height
+        self.width = width
+        self.spacing = 0
+
+        # データ取得処理(行数の取得, (開始位置, 件数)からの行データ(値のlist)のlistの取得)
+        # Note: ページ毎の先頭行のキーの取得処理がある場合は、開始位置の代わりにページのキーを渡す(キーセットページング)
+        self.get_count = lambda: 0
+        self.get_rows = lambda offset, limit: []
+        self.get_page_keys = None
+
+        # 表示状態
+        self.total_count = 0
+        self.first_index = 0
+        self._page_dict = OrderedDict()
+        self._page_key_list = []
+        self._lock = threading.Lock()
+
+        # 見出し行の設定
+        self.row_header = ft.Row(
+            controls=[
+                ft.Container(content=ft.Text(title, weight=ft.FontWeight.BOLD), width=column_width)
+                for title, column_width in self.column_list
+            ],
+            height=VIRTUAL_LIST_HEADER_HEIGHT,
+            spacing=0
+        )
+
+        # 表示用の行の設定(表示範囲 + 前後の余分の行数のみ作成)
+        body_height = height - VIRTUAL_LIST_HEADER_HEIGHT
+        pool_size = math.ceil(body_height / self.row_height) + VIRTUAL_LIST_OVERSCAN_ROWS * 2
+        self.row_pool_list = [self._create_pool_row() for _ in range(pool_size)]
+        self.column_window = ft.Column(
+            controls=self.row_pool_list,
+            top=0,
+            spacing=0
+        )
+        self.stack_rows = ft.Stack(
+            controls=[self.column_window],
+            height=0
+        )
+        self.column_body = ft.Column(
+            controls=[self.stack_rows],
+            height=body_height,
+            scroll=ft.ScrollMode.AUTO,
+            on_scroll_interval=50,
+            on_scroll=lambda e: self.event_scroll_body(e)
+        )
+
+        self.controls = [
+            self.row_header,
+            ft.Divider(height=1),
+            self.column_body
+        ]
+
+    #
+    # イベント定義
+    #
+
+    def event_scroll_body(self, e: ft.OnScrollEvent):
+        if e.pixels is None:
+            return
+
+        first_index = max(int(e.pixels // self.row_height), 0)
+        with self._lock:
+            if first_index == self.first_index:
+                return
+            self._render_window(first_index)
+        self.column_window.update()
+
+    #
+    # 各種メソッド
+    #
+
+    def set_data_source(self, get_count: Callable[[], int], get_rows: Callable[[object, int], list],
+                        get_page_keys: Callable[[int], list] | None = None):
+        # ページ単位でデータを取得する一覧として設定する(DBからの取得等)
+        self.get_count = get_count
+        self.get_rows = get_rows
+        self.get_page_keys = get_page_keys
+        self.refresh()
+
+    def refresh(self, data_source: tuple | None = None):
+        # 行数・行データを取得し直し、先頭から表示する
+        # Note: data_source((行数, 行データ, ページのキー)の取得処理)を指定した場合、今回の取得のみその処理で行う
+        #       (ワーカースレッドからの再表示で、そのスレッドのセッションから取得するため)
+        with self._lock:
+            saved_data_source = (self.get_count, self.get_rows, self.get_page_keys)
+            if data_source is not None:
+                self.get_count, self.get_rows, self.get_page_keys = data_source
+            try:
+                self._page_dict.clear()
+                self.total_count = self.get_count()
+                if self.get_page_keys is not None:
+                    self._page_key_list = self.get_page_keys(VIRTUAL_LIST_PAGE_SIZE)
+                self.stack_rows.height = self.total_count * self.row_height
+                self._render_window(0)
+            finally:
+                self.get_count, self.get_rows, self.get_page_keys = saved_data_source
+
+        if self.column_body.page is not None:
+            self.column_body.scroll_to(offset=0)
+            self.column_body.update()
+
+    #
+    # privateメソッド
+    #
+
+    def _create_pool_row(self) -> ft.Container:
+        return ft.Container(
+            content=ft.Row(
+                controls=[
+                    ft.Text("", width=column_width, no_wrap=True, overflow=ft.TextOverflow.ELLIPSIS)
+                    for _, column_width in self.column_list
+                ],
+                spacing=0
+            ),
+            height=self.row_height,
+            visible=False
+        )
+
+    def _render_window(self, first_index: int):
+        # 表示用の行に表示範囲の行データを設定し、領域内の位置を移動する
+        self.first_index = first_index
+        start = max(first_index - VIRTUAL_LIST_OVERSCAN_ROWS, 0)
+        self.column_window.top = start * self.row_height
+
+        for offset, pool_row in enumerate(self.row_pool_list):
+            index = start + offset
+            if index >= self.total_count:
+                pool_row.visible = False
+                continue
+
+            row = self._get_row(index)
+            for column_index, text in enumerate(pool_row.content.controls):
+                value = row[column_index] if column_index < len(row) else None
+                text.value = "" if value is None else str(value)
+            pool_row.visible = True
+
+    def _get_row(self, index: int) -> list:
+        # 行データをページ単位で取得する(直近のページのみ保持)
+        page_no = index // VIRTUAL_LIST_PAGE_SIZE
+        row_list = self._page_dict.get(page_no)
+        if row_list is None:
+            if self.get_page_keys is None:
+                row_list = self.get_rows(page_no * VIRTUAL_LIST_PAGE_SIZE, VIRTUAL_LIST_PAGE_SIZE)
+            elif page_no < len(self._page_key_list):
+                row_list = self.get_rows(self._page_key_list[page_no], VIRTUAL_LIST_PAGE_SIZE)
+            else:
+                row_list = []
+            self._page_dict[page_no] = row_list
+            while len(self._page_dict) > VIRTUAL_LIST_MAX_CACHED_PAGES:
+                self._page_dict.popitem(last=False)
+        else:
+            self._page_dict.move_to_end(page_no)
+
+        offset = index - page_no * VIRTUAL_LIST_PAGE_SIZE
+        if offset >= len(row_list):
+            return []
+        return row_list[offset]